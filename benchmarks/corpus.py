@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+基准测试语料
+    sample_corpus       tests/in.txt中的真实文本
+    synthetic_corpus    按词频从核心词典中随机抽词生成的句子, 给定seed时结果可重复
+"""
+
+from __future__ import division, unicode_literals, absolute_import
+
+import bisect
+import io
+import os
+import random
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+SAMPLE_FILE = os.path.join(ROOT_DIR, 'tests', 'in.txt')
+
+LETTERS = ('iPhone', 'NBA', 'CPU', 'Windows', 'GDP', 'WTO')
+
+
+def sample_corpus(limit=None, filename=SAMPLE_FILE):
+    """@:return 非空行的列表, 最多limit行"""
+    lines = []
+    with io.open(filename, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            lines.append(line)
+            if limit is not None and len(lines) >= limit:
+                break
+    return lines
+
+
+class Vocabulary(object):
+    """按词频加权抽样的词表"""
+
+    def __init__(self, dictionary):
+        self.words = []
+        self.cumulative = []
+        total = 0
+        for word, attr in dictionary.iteritems():
+            # 跳过 始##始 未##人 等标识
+            if '#' in word:
+                continue
+            total += sum([freq for freq, pos in attr]) + 1
+            self.words.append(word)
+            self.cumulative.append(total)
+        self.total = total
+
+    def sample(self, rng):
+        # 只用rng.random(), 保证python 2和3下的结果相同
+        return self.words[bisect.bisect_right(self.cumulative, rng.random() * self.total)]
+
+
+def synthetic_corpus(vocabulary, count, length, seed=0):
+    """
+    生成count个长度约为length字的句子, 夹杂数字和英文, 以句号结尾
+    """
+    rng = random.Random(seed)
+    sentences = []
+    for _ in range(count):
+        pieces, size = [], 0
+        while size < length - 1:
+            p = rng.random()
+            if p < 0.03:
+                piece = '{}'.format(int(rng.random() * 10000))
+            elif p < 0.04:
+                piece = LETTERS[int(rng.random() * len(LETTERS))]
+            elif p < 0.1:
+                piece = '，'
+            else:
+                piece = vocabulary.sample(rng)
+            pieces.append(piece)
+            size += len(piece)
+        sentences.append(''.join(pieces)[:length - 1] + '。')
+    return sentences
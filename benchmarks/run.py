@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+"""
+基准测试: 模型加载时间、句子耗时百分位数、process/process_file吞吐量、峰值内存,
+以及Dictionary.matches, generate_words_dag, yen_ksp, hmm.viterbi的微基准和句长扩展性
+
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --output after.json --compare before.json
+"""
+
+from __future__ import division, unicode_literals, absolute_import, print_function
+
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import pycseg
+import pycseg.definitions as definitions
+from pycseg.data_store import DataStore
+from pycseg.segment import Segment
+from pycseg.pos_tagging import POSTagging
+from pycseg.stats import StageStats, timer
+from pycseg.utils import hmm, shortest_path
+
+from benchmarks import corpus
+
+# (模式, 引擎)
+CONFIGS = (
+    (definitions.MODE_SEG, definitions.ENGINE_NSHORT),
+    (definitions.MODE_SEG_OOV, definitions.ENGINE_NSHORT),
+    (definitions.MODE_FULL, definitions.ENGINE_NSHORT),
+    (definitions.MODE_SEG, definitions.ENGINE_FMM),
+)
+SCALING_LENGTHS = (10, 25, 50, 100, 200, 400)
+
+
+def peak_rss():
+    """进程的峰值常驻内存(字节), 不支持时为None"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux下单位为KB, macOS下为字节
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def best_of(func, repeat):
+    """运行repeat次, 返回最短耗时(秒)"""
+    best = None
+    for _ in range(repeat):
+        start = timer()
+        func()
+        elapsed = timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def new_pycseg(data_dir, mode, engine, **kwargs):
+    seg = pycseg.Pycseg(mode=mode, engine=engine, **kwargs)
+    start = timer()
+    seg.load(data_dir)
+    return seg, timer() - start
+
+
+def bench_load(data_dir):
+    """各组件的加载时间(秒), 不包括文件不存在的可选组件"""
+    results = {}
+    for name, filename, _ in DataStore.COMPONENTS:
+        d_store = DataStore()
+        start = timer()
+        d_store.load_component(data_dir, name)
+        if name in d_store.loaded_components:
+            results[name] = timer() - start
+    results['total'] = sum(results.values())
+    return results
+
+
+def bench_pipeline(seg, lines):
+    """process的吞吐量和句子耗时百分位数"""
+    chars = sum(len(line) for line in lines)
+    stats = seg.add_observer(StageStats())
+    start = timer()
+    for line in lines:
+        seg.process(line)
+    elapsed = timer() - start
+    seg.remove_observer(stats)
+    summary = stats.summary(percentiles=(50, 90, 99))
+    return {
+        'chars': chars,
+        'seconds': elapsed,
+        'chars_per_second': chars / elapsed,
+        'sentences': stats.count,
+        'latency': summary.pop('total'),
+        'stages': dict((stage, item) for stage, item in summary.items()
+                       if stage not in ('length', 'atoms', 'vertices', 'edges')),
+    }
+
+
+def bench_process_file(seg, lines):
+    """process_file写文件的吞吐量"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        in_filename = os.path.join(tmp_dir, 'in.txt')
+        with io.open(in_filename, 'w', encoding='utf-8') as f:
+            f.write(''.join(line + '\n' for line in lines))
+        start = timer()
+        seg.process_file(in_filename, os.path.join(tmp_dir, 'out.txt'))
+        elapsed = timer() - start
+    finally:
+        shutil.rmtree(tmp_dir)
+    chars = sum(len(line) for line in lines)
+    return {'chars': chars, 'seconds': elapsed, 'chars_per_second': chars / elapsed}
+
+
+def bench_scaling(seg, vocabulary, count, seed):
+    """
+    不同句长下每个句子的平均耗时, 以及log-log拟合的增长指数(1为线性)
+    @:return {'points': {句长: {...}, ...}, 'exponent': x}
+    """
+    points = []
+    for length in SCALING_LENGTHS:
+        sentences = corpus.synthetic_corpus(vocabulary, count, length, seed)
+        start = timer()
+        for sentence in sentences:
+            seg.process_sentence(sentence)
+        seconds = (timer() - start) / count
+        points.append({'length': length, 'seconds': seconds,
+                       'seconds_per_char': seconds / length})
+    xs = [math.log(p['length']) for p in points]
+    ys = [math.log(p['seconds']) for p in points]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    exponent = (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) /
+                sum((x - mean_x) ** 2 for x in xs))
+    return {'points': dict(('{}'.format(p['length']), p) for p in points),
+            'exponent': exponent}
+
+
+def bench_micro(seg, sentences, repeat):
+    """各核心函数的微基准, 单位为每秒调用次数"""
+    d_store = seg.d_store
+    core_dct = d_store.core_dct
+    results = {}
+
+    suffixes = [sentence[i:] for sentence in sentences for i in range(len(sentence))]
+    seconds = best_of(lambda: [core_dct.matches(s) for s in suffixes], repeat)
+    results['dictionary_matches'] = {'calls': len(suffixes),
+                                     'calls_per_second': len(suffixes) / seconds}
+
+    graphs = []
+    for sentence in sentences:
+        segment = Segment(sentence, d_store)
+        segment.atom_segment()
+        segment.word_match()
+        graphs.append(segment.get_words_graph())
+    seconds = best_of(lambda: [g.generate_words_dag(d_store.bigram_dct) for g in graphs],
+                      repeat)
+    results['generate_words_dag'] = {'calls': len(graphs),
+                                     'calls_per_second': len(graphs) / seconds}
+
+    dags = [(g.words_dag.dag, g.words_dag.first_word()[0], g.words_dag.last_word()[0])
+            for g in graphs]
+    for k in (1, 5):
+        seconds = best_of(lambda: [shortest_path.yen_ksp(dag, source, target, k)
+                                   for dag, source, target in dags], repeat)
+        results['yen_ksp_k{}'.format(k)] = {'calls': len(dags),
+                                            'calls_per_second': len(dags) / seconds}
+
+    models = [POSTagging.generate_hmm_model(g.words_segment()[0]['words'], core_dct,
+                                            d_store.lexical_ctx)
+              for g in graphs]
+    seconds = best_of(lambda: [hmm.viterbi(m.observations, m.states, m.start_prob,
+                                           m.transition_prob, m.emission_prob)
+                               for m in models], repeat)
+    results['hmm_viterbi'] = {'calls': len(models),
+                              'calls_per_second': len(models) / seconds}
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=corpus.ROOT_DIR,
+            stderr=subprocess.STDOUT).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    results = {
+        'meta': {
+            'time': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'revision': git_revision(),
+            'lines': args.lines,
+            'seed': args.seed,
+        },
+        'load': bench_load(args.data_dir),
+        'process': {},
+        'process_file': {},
+    }
+    lines = corpus.sample_corpus(args.lines)
+    full = None
+    for mode, engine in CONFIGS:
+        name = '{}/{}'.format(mode, engine)
+        seg, load_seconds = new_pycseg(args.data_dir, mode, engine)
+        results['process'][name] = bench_pipeline(seg, lines)
+        results['process'][name]['load_seconds'] = load_seconds
+        results['process_file'][name] = bench_process_file(seg, lines)
+        print('{:<20} {:>10.0f} chars/s'.format(
+            name, results['process'][name]['chars_per_second']), file=sys.stderr)
+        if mode == definitions.MODE_FULL and engine == definitions.ENGINE_NSHORT:
+            full = seg
+
+    vocabulary = corpus.Vocabulary(full.d_store.core_dct)
+    results['synthetic'] = bench_pipeline(
+        full, corpus.synthetic_corpus(vocabulary, args.lines, 30, args.seed))
+    full.max_sentence_length = None
+    results['scaling'] = bench_scaling(full, vocabulary, args.scaling_count, args.seed)
+    results['micro'] = bench_micro(full, lines[:args.micro_lines], args.repeat)
+    results['peak_rss'] = peak_rss()
+    return results
+
+
+def flatten(results, prefix=''):
+    """{'a': {'b': 1}} -> {'a.b': 1}, 只保留数值"""
+    items = {}
+    for key, value in results.items():
+        name = prefix + key
+        if isinstance(value, dict):
+            items.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            items[name] = value
+    return items
+
+
+def compare(baseline, results):
+    """打印两次运行中各数值指标的比值(本次/基准)"""
+    old, new = flatten(baseline), flatten(results)
+    lines = []
+    for name in sorted(set(old) & set(new)):
+        if name.startswith('meta.') or not old[name]:
+            continue
+        lines.append('{:<60}{:>14.6g}{:>14.6g}{:>8.2f}x'.format(
+            name, old[name], new[name], new[name] / old[name]))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='pycseg benchmarks')
+    parser.add_argument('--data-dir', default=corpus.DATA_DIR)
+    parser.add_argument('--lines', type=int, default=300,
+                        help='number of sample corpus lines')
+    parser.add_argument('--micro-lines', type=int, default=100,
+                        help='number of sample lines for micro benchmarks')
+    parser.add_argument('--scaling-count', type=int, default=10,
+                        help='sentences per length in the scaling benchmark')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='JSON results of a previous run')
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with io.open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text if isinstance(text, type('')) else text.decode('utf-8'))
+    else:
+        print(text)
+    if args.compare:
+        with io.open(args.compare, encoding='utf-8') as f:
+            print(compare(json.load(f), results))
+
+
+if __name__ == '__main__':
+    main()
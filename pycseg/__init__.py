@@ -3,117 +3,577 @@
 from __future__ import unicode_literals, absolute_import
 
 import codecs
+import gc
 import math
+import re
+import threading
 
 import pycseg.definitions as definitions
-from pycseg.data_store import DataStore, Feature
+from pycseg.data_store import DataStore, Feature, ComponentNotReady
 from pycseg.segment import Segment
-from pycseg.oov_detection import OOVDetection
+from pycseg.oov_detection import OOVDetection, OOV_TYPES
 from pycseg.pos_tagging import POSTagging
+from pycseg.result import SegResult
+from pycseg.session import Session
+from pycseg.stats import SentenceTrace, StageStats, SlowLog, timer, cache_stats
+from pycseg.max_match import MaxMatch
+from pycseg import max_match
+from pycseg import writers
+from pycseg import metrics
+from pycseg import profiling
+
+
+# 各模式依赖的模型组件
+MODE_COMPONENTS = {
+    definitions.MODE_SEG: ('core_dct', 'bigram_dct'),
+    definitions.MODE_SEG_OOV: ('core_dct', 'bigram_dct',
+                               'nr_dct', 'nr_ctx', 'ns_dct', 'ns_ctx',
+                               'tr_dct', 'tr_ctx'),
+    definitions.MODE_FULL: ('core_dct', 'bigram_dct', 'lexical_ctx',
+                            'nr_dct', 'nr_ctx', 'ns_dct', 'ns_ctx',
+                            'tr_dct', 'tr_ctx'),
+}
+
+# 最大匹配引擎对应的匹配方向
+MAX_MATCH_ENGINES = {
+    definitions.ENGINE_FMM: max_match.FORWARD,
+    definitions.ENGINE_BMM: max_match.BACKWARD,
+    definitions.ENGINE_BIMM: max_match.BIDIRECTIONAL,
+}
+
+# 最大匹配引擎在各模式下依赖的模型组件
+MAX_MATCH_COMPONENTS = {
+    definitions.MODE_SEG: ('core_dct',),
+    definitions.MODE_FULL: ('core_dct', 'lexical_ctx'),
+}
+
+
+# 超长句子依次尝试的切分符: 子句分隔符、英文分隔符, 最后是空白符
+SUB_SENTENCE_SEPERATORS = (
+    definitions.SEPERATOR_C_SUB_SENTENCE + definitions.SEPERATOR_E_SENTENCE +
+    definitions.SEPERATOR_E_SUB_SENTENCE,
+    definitions.SEPERATOR_LINK,
+)
+
+# 设置了处理时间预算而max_sentence_length为None时, 超过这个长度的句子也用滑动窗口处理,
+# 每个窗口之前检查一次预算
+DEADLINE_WINDOW_LENGTH = 100
+
+
+# 分隔符 -> (以分隔符结尾的片段或剩余部分, 分隔符)
+_SPLIT_PATTERNS = {}
+_SPLIT_PATTERN_STATS = cache_stats('split_pattern')
+# 数字之间的冒号是时间的一部分, 如"12:30", 不作为分隔符
+_TIME_COLON = '(?<=[0-9０-９])[:：](?=[0-9０-９])'
+
+
+def _split_patterns(delimiters):
+    """Pycseg._split_by使用的正则表达式, 按分隔符缓存"""
+    try:
+        patterns = _SPLIT_PATTERNS[delimiters]
+    except KeyError:
+        _SPLIT_PATTERN_STATS.misses += 1
+        chars = ''.join(re.escape(c) for c in delimiters)
+        delimiter = '(?!{0})[{1}]'.format(_TIME_COLON, chars)
+        other = '(?:{0}|[^{1}])'.format(_TIME_COLON, chars)
+        patterns = _SPLIT_PATTERNS[delimiters] = (
+            re.compile('{0}*{1}|{0}+'.format(other, delimiter)),
+            re.compile(delimiter))
+        return patterns
+    _SPLIT_PATTERN_STATS.hits += 1
+    return patterns
 
 
 class Pycseg(object):
-    def __init__(self):
+    def __init__(self, mode=definitions.MODE_FULL, max_sentence_length=100,
+                 window_overlap=10, engine=definitions.ENGINE_NSHORT, oov_types=OOV_TYPES):
+        """
+        @:param mode    处理模式
+                        'seg': 仅分词
+                        'seg+oov': 分词 + 未登录词识别
+                        'full': 分词 + 未登录词识别 + 词性标注
+        @:param max_sentence_length 句子的最大长度(字数), 超长的句子先按子句
+                                    分隔符和空白符切分, 仍然超长则用滑动窗口处理;
+                                    为None时不限制
+        @:param window_overlap  滑动窗口之间重叠的字数
+        @:param engine  分词引擎
+                        'nshort': N-最短路径 + 二元语法
+                        'fmm', 'bmm', 'bimm': 词典正向/逆向/双向最大匹配,
+                        不识别未登录词, 只支持'seg'和'full'模式
+        @:param oov_types   识别的未登录词类型: 'nr'人名, 'tr'音译人名, 'ns'地名,
+                            只需要加载这些类型的词典和HMM
+        """
+        if mode not in MODE_COMPONENTS:
+            raise ValueError('unknown mode: {}'.format(mode))
+        if engine != definitions.ENGINE_NSHORT:
+            if engine not in MAX_MATCH_ENGINES:
+                raise ValueError('unknown engine: {}'.format(engine))
+            if mode not in MAX_MATCH_COMPONENTS:
+                raise ValueError('engine {} does not support mode {}'.format(engine, mode))
+        if max_sentence_length is not None and not (
+                0 <= window_overlap < max_sentence_length):
+            raise ValueError('window_overlap must be less than max_sentence_length')
+        if not set(oov_types) <= set(OOV_TYPES):
+            raise ValueError('unknown oov types: {}'.format(oov_types))
+        self.mode = mode
+        self.engine = engine
+        self.oov_types = tuple(t for t in OOV_TYPES if t in oov_types)
+        self.max_sentence_length = max_sentence_length
+        self.window_overlap = window_overlap
         self.d_store = DataStore()
+        self._local = threading.local()
+        # 句子处理完成后调用的回调: observer(SentenceTrace)
+        self.observers = []
+
+    @property
+    def session(self):
+        """当前线程的处理会话, 复用句子之间的临时对象和缓冲区"""
+        try:
+            return self._local.session
+        except AttributeError:
+            session = self._local.session = Session()
+            session.oov_detection.oov_types = self.oov_types
+            return session
+
+    def add_observer(self, observer):
+        """
+        添加句子处理的回调, 如StageStats
+        没有observer时不做任何计时
+        """
+        self.observers.append(observer)
+        return observer
+
+    def remove_observer(self, observer):
+        self.observers.remove(observer)
+
+    def enable_metrics(self, registry=None):
+        """
+        开始更新运行指标, 参见pycseg.metrics
+        @:param registry    MetricsRegistry, 为None时新建; 多个Pycseg可以共用一个registry
+        @:return registry
+        """
+        if registry is None:
+            registry = metrics.MetricsRegistry()
+        engine_metrics = registry.engine_metrics or metrics.EngineMetrics(registry)
+        if engine_metrics not in self.observers:
+            self.add_observer(engine_metrics)
+        return registry
+
+    def enable_slow_log(self, threshold=0.1, capacity=100, filename=None):
+        """
+        记录耗时超过threshold秒的句子及其词图信息, 参见pycseg.stats.SlowLog
+        @:return SlowLog
+        """
+        return self.add_observer(SlowLog(threshold, capacity, filename))
+
+    def profile(self, lines, profiler=profiling.PROFILER_CPROFILE, interval=0.001):
+        """
+        在剖析器下逐行处理lines, 参见pycseg.profiling
+        @:param profiler    'cprofile': 确定性剖析, dump()写为pstats文件
+                            'sampling': 采样剖析, dump()写为collapsed stack文件
+        @:return ProfileReport, 热点函数按处理阶段归类
+        """
+        def run():
+            for line in lines:
+                self.process(line.strip())
+        return profiling.profile(run, profiler, interval)[1]
+
+    def components(self):
+        """当前模式、引擎和未登录词类型需要的组件"""
+        if self.engine in MAX_MATCH_ENGINES:
+            return MAX_MATCH_COMPONENTS[self.mode]
+        return tuple(name for name in MODE_COMPONENTS[self.mode]
+                     if name[:2] not in OOV_TYPES or name[:2] in self.oov_types)
+
+    def load(self, data_dir, components=None, lazy=False):
+        """
+        加载模型数据, 默认只加载当前模式、引擎和未登录词类型需要的组件
+        @:param lazy    为True时组件在第一次使用时才加载, components为需要立即加载的组件;
+                        用d_store.component_status()查看各组件是否已加载
+        """
+        if lazy:
+            return self.d_store.load(data_dir, components, lazy=True)
+        if components is None:
+            components = self.components()
+        return self.d_store.load(data_dir, components)
+
+    def load_async(self, data_dir, components=None, threads=2, block=True):
+        """
+        在后台线程中加载模型数据, 立即返回LoadFuture, 参见DataStore.load_async()
+        默认只加载当前模式、引擎和未登录词类型需要的组件
+        @:param block   加载完成之前调用process时是否等待需要的组件,
+                        为False时抛出ComponentNotReady
+        """
+        if components is None:
+            components = self.components()
+        return self.d_store.load_async(data_dir, components, threads, block)
+
+    def ready(self):
+        """当前配置需要的组件是否都已加载(或为缺失的可选组件), 可用于健康检查"""
+        status = self.d_store.component_status()
+        return all(status[name] in (DataStore.STATUS_LOADED, DataStore.STATUS_MISSING)
+                   for name in self.components())
+
+    def load_user_dict(self, filename, tenant=None):
+        """
+        加载用户词典, 作为core_dct之上的覆盖层, 不修改也不重新加载core_dct
+        每行为: 词 [词频 [词性]], 词性为'n', 'nr'等标记, 参见LayeredDictionary.load()
+        可以多次调用, 后加载的词替换先加载的同名词
+        @:param tenant  为None时加入所有租户共用的覆盖层, 否则加入这个租户的增量层
+        @:return 加入的词数
+        """
+        return self.data_store(tenant).user_dictionary().load(filename)
+
+    def add_word(self, word, freq=None, tag=None, tenant=None):
+        """
+        添加或替换一个词, 只修改用户词典覆盖层中这个词的路径
+        @:param freq    词频, 为None时为LayeredDictionary.DEFAULT_FREQUENCE
+        @:param tag 词性标记, 如'n'
+        """
+        self.data_store(tenant).user_dictionary().add_word(
+            word, freq, Feature.encode(tag) if tag else 0)
+
+    def remove_word(self, word, tenant=None):
+        """
+        删除一个词, core_dct中的词在覆盖层中标记为删除
+        @:return 删除之前这个词是否存在
+        """
+        return self.data_store(tenant).user_dictionary().remove_word(word)
+
+    def tenant(self, name):
+        """
+        租户name的模型数据视图TenantDataStore, 第一次调用时创建
+        各租户共享d_store中的模型, 只另外保存自己的词典和二元词典增量层,
+        process(content, tenant=name)时先查这个租户的增量层, 再查共享的词典
+        """
+        return self.d_store.tenant(name)
 
-    def load(self, data_dir):
-        return self.d_store.load(data_dir)
+    def remove_tenant(self, name):
+        return self.d_store.remove_tenant(name)
 
-    def process_sentence(self, sentence):
+    def data_store(self, tenant=None):
+        """租户的模型数据视图, tenant为None时为共享的d_store"""
+        return self.d_store if tenant is None else self.d_store.tenant(tenant)
+
+    def prefork(self, quantize=None):
+        """
+        为fork工作进程做准备, 在load()之后、fork之前调用
+        加载当前配置需要的所有组件, 把词典换成不含python对象引用的只读数组(DataStore.freeze()),
+        再用gc.freeze()(python 3.7+)把剩余对象移出GC的跟踪范围,
+        工作进程中的引用计数和垃圾回收就不会改写模型所在的内存页, 各进程共享同一份模型
+        @:param quantize    'float32'或'fixed16'时HMM模型的概率也量化保存, 参见DataStore.freeze()
+        """
+        for name in self.components():
+            getattr(self.d_store, name)
+        self.d_store.freeze(quantize)
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
+    def process_sentence(self, sentence, tenant=None):
         """
         处理句子，返回分词和词性标注结果
-        返回格式：[(word, pos), (word, pos) ...(word, pos)]
+        返回格式：{'words': [word, ...], 'tags': [pos, ...]}
+        'seg'和'seg+oov'模式下不做词性标注, tags为词典中的唯一词性, 没有则为0
+        @:param tenant  租户名, 使用这个租户的词典增量层, 参见tenant()
+        """
+        if self.engine in MAX_MATCH_ENGINES:
+            return self.process_greedy(sentence, self.mode == definitions.MODE_FULL,
+                                       MAX_MATCH_ENGINES[self.engine], tenant)
+        words, spans, tags = self._process_lattice(sentence, tenant)
+        return {'words': [w.content for w in words], 'tags': tags}
+
+    def _process_lattice(self, sentence, tenant=None):
         """
+        用词图处理句子
+        @:return (words, spans, tags): 最优路径上的Word(不含句子开始和结束标识),
+                 每个词在原子列表中的[left, right)区间, 以及词性编码;
+                 原子列表为self.session.words_graph.atoms, 处理下一个句子之前有效
+        """
+        # 后台加载时, 在开始处理之前等待需要的组件
+        self.d_store.ensure_ready(self.components())
+        d_store = self.data_store(tenant)
+        session = self.session
+        trace = SentenceTrace(sentence) if self.observers else None
         #print('=== Segment =====')
-        seg = Segment(sentence, d_store=self.d_store)
+        seg = session.start(sentence, d_store)
+        if trace is not None:
+            trace.watch_pool(seg.get_words_graph())
         seg.atom_segment()
+        if trace is not None:
+            trace.lap('atom_segment')
         seg.word_match()
+        if trace is not None:
+            trace.lap('word_match')
 
         words_graph = seg.get_words_graph()
 
-        #print('=== OOV Detection =====')
-        detection = OOVDetection(words_graph, self.d_store)
-        detection.oov_detection()
+        if self.mode != definitions.MODE_SEG:
+            #print('=== OOV Detection =====')
+            session.oov_detection.oov_detection()
+            if trace is not None:
+                trace.lap('oov_detection')
+                trace.oov_words = dict(session.oov_detection.oov_counts)
+                trace.oov_candidates = dict(session.oov_detection.oov_candidates)
 
-        words_graph.generate_words_dag(self.d_store.bigram_dct)
+        words_graph.generate_words_dag(d_store.bigram_dct)
+        if trace is not None:
+            trace.lap('generate_words_dag')
         #words_graph.print_words()
         #words_graph.print_words_dag()
         seg_words_result = words_graph.words_segment()
+        if trace is not None:
+            trace.lap('words_segment')
+            trace.count_lattice(words_graph)
+            trace.paths = len(seg_words_result)
         #print(' '.join([w.content for w in seg_words_result[0]['words']]))
 
+        if self.mode != definitions.MODE_FULL:
+            words = seg_words_result[0]['words'][1:-1]
+            tags = [w.feature.tag_code if w.feature else 0 for w in words]
+            if trace is not None:
+                self._notify(trace)
+            return words, seg_words_result[0]['index'][1:-1], tags
+
         #print('=== POS Tagging =====')
         pre_poss = 0
-        best_words, best_tags = None, None
+        best_words, best_spans, best_tags = None, None, None
         for seg_result in seg_words_result:
             words = seg_result['words']
-            tagging = POSTagging()
-            tags = tagging.generate_pos_tags(words,
-                                             self.d_store.core_dct,
-                                             self.d_store.lexical_ctx)
+            tags = session.pos_tagging.generate_pos_tags(words,
+                                                         d_store.core_dct,
+                                                         d_store.lexical_ctx)
             #print(' '.join(['{}/{}'.format(w, p) for w, p in zip(words, tags)]))
 
             # 对结果进行评分，并记住评分最高的一个
-            poss = self.compute_possibility(words, tags, self.d_store)
+            poss = self.compute_possibility(words, tags, d_store)
             if poss > pre_poss:
                 pre_poss = poss
                 best_words = words
+                best_spans = seg_result['index']
                 best_tags = tags
 
-        best_words = map(lambda w: w.content, best_words)
-        return {'words': best_words[1:-1], 'tags': best_tags[1:-1]}
+        if trace is not None:
+            trace.lap('pos_tagging')
+            self._notify(trace)
+        return best_words[1:-1], best_spans[1:-1], best_tags[1:-1]
+
+    def _notify(self, trace):
+        trace.finish()
+        for observer in self.observers:
+            observer(trace)
+
+    def process_greedy(self, sentence, pos=False, direction=max_match.FORWARD, tenant=None):
+        """
+        用词典最大匹配处理句子, 不识别未登录词
+        @:param pos 是否做词性标注, 需要加载lexical_ctx
+        @:param direction   匹配方向: 'forward', 'backward', 'bidirectional'
+        返回格式与process_sentence相同
+        """
+        self.d_store.ensure_ready(MAX_MATCH_COMPONENTS[definitions.MODE_FULL if pos else
+                                                       definitions.MODE_SEG])
+        d_store = self.data_store(tenant)
+        trace = SentenceTrace(sentence) if self.observers else None
+        seg = self.session.start(sentence, d_store)
+        seg.atom_segment()
+        if trace is not None:
+            trace.lap('atom_segment')
+            trace.atoms = len(seg.get_words_graph().atoms)
+        matcher = MaxMatch(d_store, direction)
+        words = matcher.segment(seg)
+        if trace is not None:
+            trace.lap('max_match')
+        if pos and words:
+            words = matcher.sentence_words(words)
+            tags = self.session.pos_tagging.generate_pos_tags(
+                words, d_store.core_dct, d_store.lexical_ctx)[1:-1]
+            words = words[1:-1]
+            if trace is not None:
+                trace.lap('pos_tagging')
+        else:
+            tags = [w.feature.tag_code if w.feature else 0 for w in words]
+        if trace is not None:
+            self._notify(trace)
+        return {'words': [w.content for w in words], 'tags': tags}
 
-    def process(self, content):
+    def process(self, content, deadline=None, fallback_pos=False, tenant=None):
         """
         处理文本，返回分词和词性标注结果
-        返回格式：[(word, pos), (word, pos) ...(word, pos)]
+        返回格式：{'words': [word, ...], 'tags': [pos, ...]}
+
+        @:param deadline    处理时间预算(秒), 每个句子和超长句子的每个滑动窗口之前检查,
+                            超时后剩余的部分改用process_greedy处理,
+                            返回结果中增加'degraded': [(start, end), ...],
+                            即降级处理的部分在content中的区间
+        @:param fallback_pos    降级处理时是否做词性标注
+        @:param tenant  租户名, 使用这个租户的词典增量层, 参见tenant()
         """
-        sentences = self._split_by(content, definitions.SEPERATOR_C_SENTENCE,
-                                   contains_delimiter=True)
         results = {'words': [], 'tags': []}
-        for sentence in sentences:
-            result = self.process_sentence(sentence)
+        end_time = None
+        if deadline is not None:
+            end_time = timer() + deadline
+            results['degraded'] = []
+        begin = 0
+        for sentence in self.split_sentences(content):
+            if end_time is not None and timer() >= end_time:
+                result = self.process_greedy(sentence, fallback_pos, tenant=tenant)
+                results['degraded'].append((begin, begin + len(sentence)))
+            else:
+                result = self._process_bounded(sentence, tenant, end_time, fallback_pos)
+                if result.get('degraded') is not None:
+                    results['degraded'].append((begin + result['degraded'],
+                                                begin + len(sentence)))
             results['words'].extend(result['words'])
             results['tags'].extend(result['tags'])
+            begin += len(sentence)
         return results
 
-    def process_file(self, filename, out_filename=None):
+    def process_offsets(self, content, tenant=None):
         """
-        处理文件，结果写入文件或将结果返回
+        处理文本，返回列式结果SegResult: 词在content中的(start, end)偏移及词性编码
+        词图处理的句子直接用最优路径上每个词的原子区间计算偏移, 不生成词的字符串列表和结果dict;
+        最大匹配引擎和滑动窗口处理的超长句子按词的长度换算偏移
+        """
+        results = SegResult(content)
+        begin = 0
+        for sentence in self.split_sentences(content):
+            if (self.engine in MAX_MATCH_ENGINES or
+                    (self.max_sentence_length is not None and
+                     len(sentence) > self.max_sentence_length)):
+                result = self._process_bounded(sentence, tenant)
+                results.extend(begin, result['words'], result['tags'])
+            else:
+                words, spans, tags = self._process_lattice(sentence, tenant)
+                results.extend_spans(begin, self.session.words_graph.atoms, spans, tags)
+            begin += len(sentence)
+        return results
+
+    def _process_bounded(self, sentence, tenant=None, end_time=None, fallback_pos=False):
+        max_length = self.max_sentence_length
+        if max_length is None and end_time is not None:
+            max_length = DEADLINE_WINDOW_LENGTH
+        if max_length is not None and len(sentence) > max_length:
+            return self.process_windows(sentence, tenant, end_time, fallback_pos, max_length)
+        return self.process_sentence(sentence, tenant)
+
+    def split_sentences(self, content):
+        """
+        按句子分隔符切分文本, 超过max_sentence_length的句子再依次按
+        SUB_SENTENCE_SEPERATORS切分, 切分后的片段在不超长的前提下合并
+        """
+        sentences = self._split_by(content, definitions.SEPERATOR_C_SENTENCE,
+                                   contains_delimiter=True)
+        if self.max_sentence_length is None:
+            return sentences
+        results = []
+        for sentence in sentences:
+            results.extend(self._bound_sentence(sentence, 0))
+        return results
+
+    def _bound_sentence(self, sentence, level):
+        if (len(sentence) <= self.max_sentence_length or
+                level >= len(SUB_SENTENCE_SEPERATORS)):
+            return [sentence]
+        results, pending = [], ''
+        for piece in self._split_by(sentence, SUB_SENTENCE_SEPERATORS[level],
+                                    contains_delimiter=True):
+            if len(pending) + len(piece) <= self.max_sentence_length:
+                pending += piece
+                continue
+            if pending:
+                results.append(pending)
+            if len(piece) > self.max_sentence_length:
+                results.extend(self._bound_sentence(piece, level + 1))
+                pending = ''
+            else:
+                pending = piece
+        if pending:
+            results.append(pending)
+        return results
+
+    def process_windows(self, sentence, tenant=None, end_time=None, fallback_pos=False,
+                        max_length=None):
+        """
+        用滑动窗口处理没有分隔符的超长句子
+        每个窗口长度为max_length(默认为max_sentence_length),
+        窗口末尾window_overlap个字内的词被丢弃, 下一个窗口从最后一个保留的词之后开始, 保证窗口边界处的词切分有上下文
+        @:param end_time    timer()的截止时间, 超过后句子剩余的部分改用process_greedy处理,
+                            返回结果中增加'degraded': 降级部分在句子中的起始位置
         """
+        results = {'words': [], 'tags': []}
+        if max_length is None:
+            max_length = self.max_sentence_length
+        keep_length = max_length - self.window_overlap
+        begin = 0
+        while True:
+            if end_time is not None and timer() >= end_time:
+                result = self.process_greedy(sentence[begin:], fallback_pos, tenant=tenant)
+                results['words'].extend(result['words'])
+                results['tags'].extend(result['tags'])
+                results['degraded'] = begin
+                return results
+            result = self.process_sentence(sentence[begin:begin + max_length], tenant)
+            if begin + max_length >= len(sentence):
+                results['words'].extend(result['words'])
+                results['tags'].extend(result['tags'])
+                return results
+            # 至少保留一个词，保证窗口向前移动
+            count, length = 0, 0
+            for word in result['words']:
+                if count > 0 and length + len(word) > keep_length:
+                    break
+                count += 1
+                length += len(word)
+            results['words'].extend(result['words'][:count])
+            results['tags'].extend(result['tags'][:count])
+            begin += length
+
+    def process_file(self, filename, out_filename=None, fmt='text', tenant=None):
+        """
+        逐行处理文件，结果写入文件或将结果返回
+        写入文件时每处理一行就输出一行的结果, 不保存整个文件的结果
+        @:param fmt 输出格式: 'text', 'tsv', 'jsonl', 'conll', 参见pycseg.writers
+        """
+        if out_filename is not None:
+            with codecs.open(filename, 'r', 'utf-8') as input_file, \
+                    codecs.open(out_filename, 'w', 'utf-8') as output_file:
+                with writers.get_writer(fmt, output_file) as writer:
+                    self.process_stream(input_file, writer, tenant)
+            return
+
         results = {'words': [], 'tags': []}
         with codecs.open(filename, 'r', 'utf-8') as input_file:
             for line in input_file:
-                print('PROCESS LINE:{}'.format(line))
-                result = self.process(line.strip())
-                print(self.format_result(result))
+                result = self.process(line.strip(), tenant=tenant)
                 results['words'].extend(result['words'])
                 results['tags'].extend(result['tags'])
+        return results
 
-        if out_filename is None:
-            return results
-        else:
-            with codecs.open(out_filename, 'w', 'utf-8') as output_file:
-                output_file.write(self.format_result(results))
-                output_file.write('\n')
+    def process_stream(self, lines, writer, tenant=None):
+        """逐行处理lines, 每一行的结果交给writer输出"""
+        for line in lines:
+            writer.write(self.process(line.strip(), tenant=tenant))
 
     @staticmethod
     def format_result(result):
-        return ' '.join(['{}/{}'.format(w, Feature(tag_code=p).tag) for w, p in zip(result['words'], result['tags'])])
+        """结果格式化为 "词/词性" 字符串, 没有词性的词只输出词"""
+        pairs = result if isinstance(result, SegResult) else zip(
+            result['words'], result['tags'])
+        return ' '.join(['{}/{}'.format(w, Feature(tag_code=p).tag) if p else w
+                         for w, p in pairs])
 
     @staticmethod
     def _split_by(content, delimiters, contains_delimiter=False):
-        results = []
-        begin_pos, pos = 0, 0
-        for c in content:
-            if c in delimiters:
-                if contains_delimiter:
-                    results.append(content[begin_pos:pos+1])
-                else:
-                    results.append(content[begin_pos:pos])
-                begin_pos = pos + 1
-            pos += 1
-        if begin_pos < pos:
-            results.append(content[begin_pos:pos])
+        """
+        在delimiters中的每个字符之后切分, contains_delimiter为False时去掉分隔符
+        末尾没有分隔符的剩余部分作为最后一段, 数字之间的冒号不切分
+        """
+        patterns = _split_patterns(delimiters)
+        if contains_delimiter:
+            return patterns[0].findall(content)
+        results = patterns[1].split(content)
+        if not results[-1]:
+            results.pop()
         return results
 
     @staticmethod
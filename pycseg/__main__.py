@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""
+命令行:
+    python -m pycseg input.txt -o output.txt --format tsv
+    python -m pycseg input.txt -o output.txt --profile pycseg.prof
+    python -m pycseg input.txt -o output.txt --profile pycseg.folded --profiler sampling
+"""
+
+from __future__ import unicode_literals, absolute_import, print_function
+
+import argparse
+import sys
+
+import pycseg
+import pycseg.definitions as definitions
+from pycseg import profiling, writers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m pycseg',
+                                     description='Chinese word segmentation')
+    parser.add_argument('input', help='UTF-8 text file, one document per line')
+    parser.add_argument('-o', '--output', required=True, help='output file')
+    parser.add_argument('--format', default='text', choices=sorted(writers.WRITERS))
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--components', help='comma separated components to load')
+    parser.add_argument('--lazy', action='store_true',
+                        help='load components on first use')
+    parser.add_argument('--mode', default=definitions.MODE_FULL,
+                        choices=sorted(pycseg.MODE_COMPONENTS))
+    parser.add_argument('--engine', default=definitions.ENGINE_NSHORT,
+                        choices=[definitions.ENGINE_NSHORT] + sorted(pycseg.MAX_MATCH_ENGINES))
+    parser.add_argument('--profile', metavar='FILE',
+                        help='profile the run and write pstats or collapsed stacks to FILE')
+    parser.add_argument('--profiler', default=profiling.PROFILER_CPROFILE,
+                        choices=profiling.PROFILERS)
+    parser.add_argument('--interval', type=float, default=0.001,
+                        help='sampling interval in seconds')
+    args = parser.parse_args(argv)
+
+    seg = pycseg.Pycseg(mode=args.mode, engine=args.engine)
+    seg.load(args.data_dir, args.components.split(',') if args.components else None,
+             lazy=args.lazy)
+
+    def run():
+        seg.process_file(args.input, args.output, args.format)
+
+    if args.profile is None:
+        run()
+        return 0
+    _, report = profiling.profile(run, args.profiler, args.interval)
+    report.dump(args.profile)
+    print(report.format(), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,23 +3,53 @@
 from __future__ import division, unicode_literals, absolute_import
 
 import os
+import array
 import codecs
+import gc
+import heapq
+import io
 import math
+import threading
+import time
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 
 import pycseg.definitions as definitions
-from pycseg.utils import trie, hmm, shortest_path
+from pycseg.stats import cache_stats
+from pycseg.utils import trie, hmm, shortest_path, memory
+from pycseg.utils.flat_trie import FlatTrie
 
 
 class Feature(object):
-    """词的词性"""
+    """
+    词的词性
+    Feature是不可变的享元对象, 同一个词性编码只创建一个实例:
+    Feature('nr') is Feature(tag_code=Feature.encode('nr'))
+    """
+    __slots__ = ('tag_code',)
+    # 词性编码 -> Feature实例
+    _cache = {}
+    _cache_stats = cache_stats('feature')
+
+    def __new__(cls, tag=None, tag_code=None):
+        if tag_code is None:
+            tag_code = cls.encode(tag) if tag is not None else 0
+        try:
+            feature = cls._cache[tag_code]
+        except KeyError:
+            cls._cache_stats.misses += 1
+            feature = super(Feature, cls).__new__(cls)
+            feature.tag_code = tag_code
+            cls._cache[tag_code] = feature
+            return feature
+        cls._cache_stats.hits += 1
+        return feature
 
-    def __init__(self, tag=None, tag_code=None):
-        if tag_code is not None:
-            self.tag_code = tag_code
-        elif tag is not None:
-            self.tag_code = self.encode(tag)
-        else:
-            self.tag_code = 0
+    def __reduce__(self):
+        return Feature, (None, self.tag_code)
 
     def __str__(self):
         return self.tag
@@ -53,6 +83,7 @@ class Feature(object):
 
 class Atom(object):
     """原子类: 不可拆分的原子，如汉字，英文单词，数字，标点符号"""
+    __slots__ = ('content', 'feature')
 
     def __init__(self, content=None, feature=None):
         self.content = content
@@ -67,6 +98,7 @@ class Atom(object):
 
 class Word(object):
     """词类: 匹配词，合成词"""
+    __slots__ = ('content', 'feature', 'weight', 'alias')
 
     def __init__(self, content=None, feature=None, weight=0, alias=None):
         self.content = content
@@ -92,10 +124,17 @@ class AtomsDAG():
     """
     def __init__(self):
         self.dag = {}
+        # clear()回收的dict, add()时复用
+        self.pool = []
+        self.reused = 0
 
     def add(self, left_index, right_index=None, word=None):
         if right_index is None:
-            self.dag[left_index] = {}
+            if self.pool:
+                self.dag[left_index] = self.pool.pop()
+                self.reused += 1
+            else:
+                self.dag[left_index] = {}
         else:
             self.dag[left_index][right_index] = word
 
@@ -109,6 +148,9 @@ class AtomsDAG():
             return None
 
     def clear(self):
+        for edges in self.dag.values():
+            edges.clear()
+            self.pool.append(edges)
         self.dag.clear()
 
     def all_words(self):
@@ -152,10 +194,17 @@ class WordsDAG(object):
     """
     def __init__(self):
         self.dag = {}
+        # clear()回收的dict, add()时复用
+        self.pool = []
+        self.reused = 0
 
     def add(self, prev_index, next_index=None, value=None):
         if next_index is None:
-            self.dag[prev_index] = {}
+            if self.pool:
+                self.dag[prev_index] = self.pool.pop()
+                self.reused += 1
+            else:
+                self.dag[prev_index] = {}
         else:
             self.dag[prev_index][next_index] = value
 
@@ -169,6 +218,9 @@ class WordsDAG(object):
             return None
 
     def clear(self):
+        for edges in self.dag.values():
+            edges.clear()
+            self.pool.append(edges)
         self.dag.clear()
 
     def all_words(self):
@@ -228,6 +280,23 @@ class WordsGraph(object):
         # key_index = left_index*(len(words)+1) + right_index
         self.words_dag = WordsDAG()
 
+        # reset()回收的Atom和Word对象, 生成新的原子和词时复用
+        self.atom_pool = []
+        self.word_pool = []
+        self.atoms_reused = 0
+        self.words_reused = 0
+        self.atoms_allocated = 0
+        self.words_allocated = 0
+
+    def reset(self):
+        """清空原子和词图, 回收其中的对象供下一个句子使用"""
+        self.atom_pool.extend(self.atoms)
+        del self.atoms[:]
+        for left_index, right_index, word in self.words.all_words():
+            self.word_pool.append(word)
+        self.words.clear()
+        self.words_dag.clear()
+
     def get_atoms(self):
         return self.atoms
 
@@ -238,7 +307,14 @@ class WordsGraph(object):
         return self.words_dag
 
     def append_atom(self, content, feature=None):
-        self.atoms.append(Atom(content, feature))
+        if self.atom_pool:
+            atom = self.atom_pool.pop()
+            atom.content, atom.feature = content, feature
+            self.atoms_reused += 1
+        else:
+            atom = Atom(content, feature)
+            self.atoms_allocated += 1
+        self.atoms.append(atom)
         # 每一个原子都是一个词
         self.words.add(len(self.atoms)-1)
 
@@ -252,7 +328,14 @@ class WordsGraph(object):
         @:param alias 词的别名, 如 "北京"在计算词的连接权值时用"未##地"来代替
         """
         content = ''.join([atom.content for atom in self.atoms[left:right]])
-        self.words.add(left, right, Word(content, feature, weight, alias))
+        if self.word_pool:
+            word = self.word_pool.pop()
+            word.__init__(content, feature, weight, alias)
+            self.words_reused += 1
+        else:
+            word = Word(content, feature, weight, alias)
+            self.words_allocated += 1
+        self.words.add(left, right, word)
 
     def get_word(self, left, right):
         return self.words.get(left, right)
@@ -380,15 +463,56 @@ class Dictionary(trie.Trie):
             ...
         }
         即： key = 词 , value = [(词频_1，词性_1), (词频_2，词性_2)..]
+
+        词典文件按词排序(GB2312顺序), 相邻的词大多有公共前缀: 逐行读取, 保留上一个词路径上的节点,
+        只为与上一个词不同的后缀新建节点; 词频和词性读完后一次性转换为整数; 构建期间暂停GC
         """
-        with codecs.open(filename, 'r', 'utf-8') as f:
-            for line in f.readlines():
-                items = line.strip().split()
-                if len(items) == 3:
-                    self.setdefault(items[0], []
-                                    ).append((int(items[1]), int(items[2])))
+        fields = []
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with io.open(filename, 'r', encoding='utf-8') as f:
+                for line in f:
+                    items = line.split()
+                    if len(items) == 3:
+                        fields.extend(items)
+            self._build(fields[0::3], list(zip(map(int, fields[1::3]), map(int, fields[2::3]))))
+        finally:
+            if gc_enabled:
+                gc.enable()
         return True
 
+    def _build(self, words, values):
+        """
+        按顺序插入words[i]: values[i], 重复的词追加到同一个值列表
+        只为与上一个词不同的后缀查找或新建节点, 词无序时结果不变, 只是共享的前缀变少
+        """
+        no_value = trie.TrieNode.no_value
+        new_node = trie.TrieNode
+        # path[i]为prev_word前i个字对应的节点
+        prev_word, path = '', [self.root]
+        node = self.root
+        for word, value in zip(words, values):
+            if word != prev_word:
+                if word.startswith(prev_word):
+                    common = len(prev_word)
+                else:
+                    common, limit = 0, min(len(word), len(prev_word))
+                    while common < limit and word[common] == prev_word[common]:
+                        common += 1
+                    del path[common + 1:]
+                node = path[-1]
+                for c in word[common:]:
+                    child = node.children.get(c)
+                    if child is None:
+                        child = node.children[c] = new_node(c, no_value, node, {})
+                    node = child
+                    path.append(node)
+                prev_word = word
+                if node.value is no_value:
+                    node.value = []
+            node.value.append(value)
+
     def matches(self, k):
         """
         找出字典中所有与k拥有共同前缀的词及词频词性
@@ -418,6 +542,245 @@ class Dictionary(trie.Trie):
         return total_freq
 
 
+class FrozenDictionary(FlatTrie):
+    """
+    只读字典: 与Dictionary的查询接口相同, 数据保存在几个array中, 没有每个词的python对象,
+    fork之后各进程可以共享内存页, 参见DataStore.freeze()
+    每次查询都生成新的[(词频, 词性), ...]列表
+    词频列为array('i'), 词性编码不超过Feature.encode('zz'), 用array('H')每项只占2字节
+    """
+
+    TYPECODES = ('i', 'H')
+
+    def __init__(self, dictionary):
+        super(FrozenDictionary, self).__init__(dictionary, 2, lambda value: value,
+                                               self.TYPECODES)
+
+    def __getitem__(self, k):
+        n = self._getnode(k)
+        if n < 0 or not self._has_value(n):
+            raise KeyError(k)
+        return self._rows(n)
+
+    def get(self, k, default=None):
+        n = self._getnode(k)
+        if n < 0 or not self._has_value(n):
+            return default
+        return self._rows(n)
+
+    def iteritems(self):
+        for key, n in self._walk():
+            yield key, self._rows(n)
+
+    def matches(self, k):
+        """与Dictionary.matches相同"""
+        match_words = []
+        chars = []
+        n = 0
+        for c in k:
+            n = self._child(n, c)
+            if n < 0:
+                break
+            chars.append(c)
+            if self._has_value(n):
+                match_words.append((''.join(chars), self._rows(n)))
+        return match_words
+
+    def get_frequence(self, k, k_pos=0):
+        total_freq = 0
+        for freq, pos in self.get(k, []):
+            if pos == 0 or pos == k_pos:
+                total_freq += freq
+        return total_freq
+
+
+class LayeredDictionary(object):
+    """
+    词典视图: 基础词典(Dictionary或FrozenDictionary)之上叠加若干可修改的覆盖层
+    查询时依次查找各覆盖层, 都没有时再查找基础词典, 不复制也不修改基础词典
+    覆盖层是普通的Dictionary, 其中的词替换基础词典中的同名词;
+    删除基础词典中的词时在覆盖层中写入REMOVED
+    """
+
+    # 覆盖层中表示已删除的值
+    REMOVED = object()
+    # 用户词典中没有给出词频时的默认词频
+    DEFAULT_FREQUENCE = 100
+
+    def __init__(self, base, overlays=None):
+        """
+        @:param base    基础词典
+        @:param overlays    覆盖层列表, 靠前的优先; 为None时新建一个空的覆盖层
+        """
+        self.overlays = list(overlays) if overlays is not None else [Dictionary()]
+        self.base = base
+
+    @property
+    def base(self):
+        return self._base
+
+    @base.setter
+    def base(self, base):
+        """替换基础词典(如重新加载或freeze之后), 覆盖层保持不变"""
+        self._base = base
+        if isinstance(base, FlatTrie):
+            self._base_root = 0
+            self._base_step = self._flat_step
+            self._base_value = self._flat_value
+        else:
+            self._base_root = base.root
+            self._base_step = self._trie_step
+            self._base_value = self._trie_value
+
+    @property
+    def overlay(self):
+        """add_word/remove_word修改的覆盖层"""
+        return self.overlays[0]
+
+    @staticmethod
+    def _trie_step(node, c):
+        return node.children.get(c)
+
+    @staticmethod
+    def _trie_value(node):
+        return node.value if node.value is not trie.TrieNode.no_value else None
+
+    def _flat_step(self, n, c):
+        n = self._base._child(n, c)
+        return n if n >= 0 else None
+
+    def _flat_value(self, n):
+        return self._base._rows(n) if self._base._has_value(n) else None
+
+    def _walk(self, k):
+        """
+        同时沿k遍历基础词典和各覆盖层, 每个字在每一层只查找一次
+        @:return 每个有值的前缀yield (已匹配的字列表, 值), 字列表在遍历过程中会继续增长
+        """
+        no_value = trie.TrieNode.no_value
+        removed = self.REMOVED
+        base_step, base_value = self._base_step, self._base_value
+        node = self._base_root
+        layer_nodes = [overlay.root for overlay in self.overlays]
+        chars = []
+        for c in k:
+            if node is not None:
+                node = base_step(node, c)
+            alive = node is not None
+            value = None
+            for i, layer_node in enumerate(layer_nodes):
+                if layer_node is None:
+                    continue
+                layer_node = layer_nodes[i] = layer_node.children.get(c)
+                if layer_node is None:
+                    continue
+                alive = True
+                if value is None and layer_node.value is not no_value:
+                    value = layer_node.value
+            if not alive:
+                break
+            chars.append(c)
+            if value is None and node is not None:
+                value = base_value(node)
+            if value is not None and value is not removed:
+                yield chars, value
+
+    def matches(self, k):
+        """与Dictionary.matches相同, 覆盖层中的词优先"""
+        return [(''.join(chars), value) for chars, value in self._walk(k)]
+
+    def longest_key(self, k):
+        length = 0
+        for chars, value in self._walk(k):
+            length = len(chars)
+        return length
+
+    def prefix_lengths(self, k):
+        return [len(chars) for chars, value in self._walk(k)]
+
+    def get(self, k, default=None):
+        for overlay in self.overlays:
+            value = overlay.get(k)
+            if value is not None:
+                return default if value is self.REMOVED else value
+        return self._base.get(k, default)
+
+    def __getitem__(self, k):
+        value = self.get(k)
+        if value is None:
+            raise KeyError(k)
+        return value
+
+    def __contains__(self, k):
+        return self.get(k) is not None
+
+    def get_frequence(self, k, k_pos=0):
+        total_freq = 0
+        for freq, pos in self.get(k, []):
+            if pos == 0 or pos == k_pos:
+                total_freq += freq
+        return total_freq
+
+    def iteritems(self):
+        """按词的顺序合并各层, 与Dictionary.iteritems的顺序相同"""
+        layers = [((key, i, value) for key, value in overlay.iteritems())
+                  for i, overlay in enumerate(self.overlays)]
+        layers.append((key, len(layers), value) for key, value in self._base.iteritems())
+        prev_key = None
+        for key, i, value in heapq.merge(*layers):
+            if key == prev_key:
+                continue
+            prev_key = key
+            if value is not self.REMOVED:
+                yield key, value
+
+    def __iter__(self):
+        for key, value in self.iteritems():
+            yield key
+
+    def add_word(self, word, freq=None, pos=0):
+        """
+        在覆盖层中添加或替换一个词, 只修改覆盖层中这个词的路径
+        @:param pos 词性编码, 参见Feature.encode; 0表示没有词性
+        """
+        if freq is None:
+            freq = self.DEFAULT_FREQUENCE
+        self.overlay[word] = [(freq, pos)]
+
+    def remove_word(self, word):
+        """
+        删除一个词: 下层有这个词时在覆盖层中写入REMOVED, 否则只从覆盖层中删除
+        @:return 删除之前这个词是否存在
+        """
+        existed = word in self
+        if word in self.overlay:
+            del self.overlay[word]
+        below = LayeredDictionary(self._base, self.overlays[1:])
+        if word in below:
+            self.overlay[word] = self.REMOVED
+        return existed
+
+    def load(self, filename):
+        """
+        把用户词典加入覆盖层, 每行为: 词 [词频 [词性]]
+        词性为'n', 'nr'等标记或整数编码, 空行和#开头的行被忽略
+        @:return 加入的词数
+        """
+        count = 0
+        with io.open(filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                items = line.split()
+                if not items or items[0].startswith('#'):
+                    continue
+                freq = int(items[1]) if len(items) > 1 else None
+                pos = 0
+                if len(items) > 2:
+                    pos = int(items[2]) if items[2].isdigit() else Feature.encode(items[2])
+                self.add_word(items[0], freq, pos)
+                count += 1
+        return count
+
+
 class BiDictionary(dict):
     """
     二元字典类: 存储二元词及词频
@@ -429,14 +792,92 @@ class BiDictionary(dict):
             raise IOError
 
     def load(self, filename):
-        with codecs.open(filename, 'r', 'utf-8') as f:
-            for line in f.readlines():
-                items = line.strip().split()
-                if len(items) > 1:
-                    self.__setitem__(items[0], int(items[1]))
+        """逐行读取, 构建期间暂停GC"""
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with io.open(filename, 'r', encoding='utf-8') as f:
+                for line in f:
+                    items = line.split()
+                    if len(items) > 1:
+                        self[items[0]] = int(items[1])
+        finally:
+            if gc_enabled:
+                gc.enable()
         return True
 
 
+class FrozenBiDictionary(FlatTrie):
+    """只读二元字典, 参见FrozenDictionary"""
+
+    def __init__(self, bi_dictionary):
+        bigrams = trie.Trie()
+        for key, freq in bi_dictionary.items():
+            bigrams[key] = freq
+        super(FrozenBiDictionary, self).__init__(bigrams, 1, lambda value: [(value,)])
+
+    def __getitem__(self, k):
+        n = self._getnode(k)
+        if n < 0 or not self._has_value(n):
+            raise KeyError(k)
+        return self.columns[0][self.value_offsets[n]]
+
+    def get(self, k, default=None):
+        n = self._getnode(k)
+        if n < 0 or not self._has_value(n):
+            return default
+        return self.columns[0][self.value_offsets[n]]
+
+
+class LayeredBiDictionary(object):
+    """
+    二元词典视图: 基础二元词典(BiDictionary或FrozenBiDictionary)之上叠加若干BiDictionary覆盖层,
+    与LayeredDictionary相同, 靠前的覆盖层优先, 删除的二元词记为REMOVED
+    """
+
+    REMOVED = LayeredDictionary.REMOVED
+
+    def __init__(self, base, overlays=None):
+        self.base = base
+        self.overlays = list(overlays) if overlays is not None else [BiDictionary()]
+
+    @property
+    def overlay(self):
+        return self.overlays[0]
+
+    def get(self, k, default=None):
+        for overlay in self.overlays:
+            value = overlay.get(k)
+            if value is not None:
+                return default if value is self.REMOVED else value
+        return self.base.get(k, default)
+
+    def __getitem__(self, k):
+        value = self.get(k)
+        if value is None:
+            raise KeyError(k)
+        return value
+
+    def __contains__(self, k):
+        return self.get(k) is not None
+
+    def add(self, k, freq):
+        """添加或替换二元词k, 如'北京@天安门'"""
+        self.overlay[k] = freq
+
+    def remove(self, k):
+        """@:return 删除之前二元词k是否存在"""
+        existed = k in self
+        self.overlay.pop(k, None)
+        if k in LayeredBiDictionary(self.base, self.overlays[1:]):
+            self.overlay[k] = self.REMOVED
+        return existed
+
+    def load(self, filename):
+        """把二元词典文件(格式与bigramDict.dct相同)加入覆盖层"""
+        return self.overlay.load(filename)
+
+
 class Context(hmm.HMM):
     """
     HMM模型: 存储词性及未登录词的概率统计概率
@@ -490,45 +931,505 @@ class Context(hmm.HMM):
         return prob * (self.total_freq + self.total_state)
 
 
+class QuantizedProbabilities(Mapping):
+    """
+    只读的{状态: 概率}, 概率按状态顺序保存在一个array中
+        'float32': array('f'), 每个概率4字节, 相对误差约1e-7
+        'fixed16': 定点对数概率 round(-ln(p) * FIXED_SCALE), array('H'), 每个概率2字节,
+                   相对误差不超过1/(2 * FIXED_SCALE); 0概率保存为FIXED_ZERO
+    """
+
+    FLOAT32 = 'float32'
+    FIXED16 = 'fixed16'
+    PRECISIONS = (FLOAT32, FIXED16)
+    FIXED_SCALE = 1024
+    FIXED_ZERO = 65535
+
+    __slots__ = ('index', 'values', 'precision')
+
+    def __init__(self, index, probs, precision):
+        """
+        @:param index   {状态: 下标}, 同一个模型的各行共用
+        @:param probs   按下标顺序的概率列表
+        """
+        if precision == self.FLOAT32:
+            values = array.array(str('f'), probs)
+        elif precision == self.FIXED16:
+            values = array.array(str('H'), [
+                min(int(round(-math.log(p) * self.FIXED_SCALE)), self.FIXED_ZERO - 1)
+                if p > 0 else self.FIXED_ZERO for p in probs])
+        else:
+            raise ValueError('unknown precision: {}'.format(precision))
+        self.index = index
+        self.values = values
+        self.precision = precision
+
+    def __getitem__(self, state):
+        value = self.values[self.index[state]]
+        if self.precision == self.FLOAT32:
+            return value
+        return 0.0 if value == self.FIXED_ZERO else math.exp(-value / self.FIXED_SCALE)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+
+class FrozenContext(object):
+    """
+    只读、量化的HMM模型: 初始概率和转移概率保存为QuantizedProbabilities, 与Context的查询接口相同
+    (states, start_prob, transition_prob, state_freq, total_freq, prob_to_frequence)
+    参见DataStore.freeze(quantize=...)
+    """
+
+    def __init__(self, context, precision=QuantizedProbabilities.FLOAT32):
+        self.precision = precision
+        self.states = list(context.states)
+        self.total_state = context.total_state
+        self.total_freq = context.total_freq
+        self.state_freq = dict(context.state_freq)
+        index = dict((state, i) for i, state in enumerate(self.states))
+        self.start_prob = QuantizedProbabilities(
+            index, [context.start_prob.get(state, 0.0) for state in self.states], precision)
+        self.transition_prob = dict(
+            (state_i, QuantizedProbabilities(
+                index, [context.transition_prob.get(state_i, {}).get(state_j, 0.0)
+                        for state_j in self.states], precision))
+            for state_i in self.states)
+        # 发射概率在处理句子时生成, 与Context相同为空
+        self.emission_prob = {}
+
+    def prob_to_frequence(self, prob):
+        """概率转换为频率"""
+        return prob * (self.total_freq + self.total_state)
+
+
+class TenantDataStore(object):
+    """
+    租户的模型数据视图, 由DataStore.tenant()创建
+    core_dct和bigram_dct为共享DataStore中的词典加上这个租户的增量层(LayeredDictionary/
+    LayeredBiDictionary), 先查增量层再查共享词典, 不复制共享词典; 其它组件直接使用共享DataStore中的组件
+    共享DataStore的用户词典(user_dictionary())位于增量层之下, 对所有租户生效
+    """
+
+    def __init__(self, d_store, name):
+        self.d_store = d_store
+        self.name = name
+        # 租户的增量层
+        self.dct_delta = Dictionary()
+        self.bigram_delta = BiDictionary()
+        self.core_dct = None
+        self.bigram_dct = None
+        # 生成core_dct/bigram_dct时共享DataStore中的词典及其基础词典
+        self._sources = ()
+
+    def __getattr__(self, name):
+        return getattr(self.d_store, name)
+
+    @staticmethod
+    def _sources_of(*components):
+        sources = []
+        for component in components:
+            sources.append(component)
+            sources.append(getattr(component, 'base', None))
+        return sources
+
+    def refresh(self):
+        """
+        共享DataStore中的core_dct/bigram_dct被替换(加载、冻结、创建用户词典)之后重新生成视图,
+        增量层不变; 没有替换时只比较几个对象的id
+        @:return self
+        """
+        core_dct, bigram_dct = self.d_store.core_dct, self.d_store.bigram_dct
+        sources = self._sources_of(core_dct, bigram_dct)
+        if len(sources) == len(self._sources) and all(
+                a is b for a, b in zip(sources, self._sources)):
+            return self
+        if isinstance(core_dct, LayeredDictionary):
+            self.core_dct = LayeredDictionary(core_dct.base,
+                                              [self.dct_delta] + core_dct.overlays)
+        else:
+            self.core_dct = LayeredDictionary(core_dct, [self.dct_delta])
+        if isinstance(bigram_dct, LayeredBiDictionary):
+            self.bigram_dct = LayeredBiDictionary(bigram_dct.base,
+                                                  [self.bigram_delta] + bigram_dct.overlays)
+        else:
+            self.bigram_dct = LayeredBiDictionary(bigram_dct, [self.bigram_delta])
+        self._sources = sources
+        return self
+
+    def user_dictionary(self):
+        """这个租户的词典视图, add_word/remove_word只修改租户的增量层"""
+        return self.refresh().core_dct
+
+    def bigram_dictionary(self):
+        """这个租户的二元词典视图, add/remove只修改租户的增量层"""
+        return self.refresh().bigram_dct
+
+
+class ComponentNotReady(RuntimeError):
+    """组件还在后台加载, 且DataStore.load_async()的block为False"""
+
+
+class LoadFuture(object):
+    """
+    DataStore.load_async()的结果: 每个组件一个threading.Event, 加载完成(或失败)时置位
+    可以只等待部分组件, 如健康检查在core_dct可用时就返回:
+        future.ready(['core_dct'])
+    """
+
+    def __init__(self, d_store, names):
+        self.d_store = d_store
+        self.names = tuple(names)
+        self._events = dict((name, threading.Event()) for name in self.names)
+        # 加载失败的组件: {组件名: 异常}
+        self.errors = {}
+
+    def _finish(self, name, error=None):
+        if error is not None:
+            self.errors[name] = error
+        self._events[name].set()
+
+    def done(self, names=None):
+        """names(默认为全部组件)是否都已结束加载, 包括加载失败的"""
+        return all(self._events[name].is_set() for name in names or self.names)
+
+    def ready(self, names=None):
+        """names(默认为全部组件)是否都已加载成功"""
+        names = names or self.names
+        return self.done(names) and not any(name in self.errors for name in names)
+
+    def wait(self, names=None, timeout=None):
+        """
+        等待names(默认为全部组件)结束加载
+        @:param timeout 总的等待时间(秒), 为None时一直等待
+        @:return 是否都已结束加载
+        """
+        end_time = None if timeout is None else time.time() + timeout
+        for name in names or self.names:
+            event = self._events[name]
+            if end_time is None:
+                # 不带超时的Event.wait()在python 2下不响应KeyboardInterrupt
+                while not event.wait(1):
+                    pass
+            elif not event.wait(max(end_time - time.time(), 0)):
+                return False
+        return True
+
+    def result(self, timeout=None):
+        """
+        等待全部组件加载完成
+        @:return DataStore
+        @:raise ComponentNotReady   超时; 组件加载失败时抛出加载时的异常
+        """
+        if not self.wait(timeout=timeout):
+            raise ComponentNotReady(', '.join(
+                name for name in self.names if not self._events[name].is_set()))
+        for name in self.names:
+            if name in self.errors:
+                raise self.errors[name]
+        return self.d_store
+
+
 class DataStore(object):
-    def __init__(self, data_dir=None):
+    """
+    模型数据: 核心词典、二元词典、词性HMM及三种未登录词的词典和HMM
+    """
+
+    # (组件名, 文件名, 组件类)
+    COMPONENTS = (
+        ('core_dct', 'coreDict.dct', Dictionary),
+        ('bigram_dct', 'bigramDict.dct', BiDictionary),
+        ('lexical_ctx', 'lexical.ctx', Context),
+        ('nr_dct', 'nr.dct', Dictionary),
+        ('nr_ctx', 'nr.ctx', Context),
+        ('ns_dct', 'ns.dct', Dictionary),
+        ('ns_ctx', 'ns.ctx', Context),
+        ('tr_dct', 'tr.dct', Dictionary),
+        ('tr_ctx', 'tr.ctx', Context),
+    )
+
+    # 文件不存在时用空组件代替的组件, 发布的data目录中没有bigramDict.dct
+    OPTIONAL_COMPONENTS = ('bigram_dct',)
+
+    # 组件状态
+    STATUS_LOADED = 'loaded'
+    STATUS_MISSING = 'missing'
+    STATUS_PENDING = 'pending'
+    STATUS_EMPTY = 'empty'
+    STATUS_LOADING = 'loading'
+    STATUS_FAILED = 'failed'
+
+    def __init__(self, data_dir=None, lazy=False):
+        # 延迟加载时的数据目录, 组件在第一次访问时从这里加载
+        self.data_dir = None
+        # 已从文件加载的组件
+        self.loaded_components = set()
+        # 文件不存在, 用空组件代替的可选组件
+        self.missing_components = set()
+        # 后台加载失败的组件: {组件名: 异常}, 访问这些组件时抛出该异常
+        self.failed_components = {}
+        # 正在后台加载的组件: {组件名: LoadFuture}
+        self._loading = {}
+        # 租户视图: {租户名: TenantDataStore}
+        self._tenants = {}
+        # 访问正在后台加载的组件时是否等待, 为False时抛出ComponentNotReady
+        self.block_on_loading = True
+        self._lock = threading.RLock()
+        # freeze()之后为True
+        self.frozen = False
+        self.is_load = True
         if data_dir:
-            self.core_dct = Dictionary(os.path.join(data_dir, 'coreDict.dct'))
-            self.bigram_dct = BiDictionary(
-                os.path.join(data_dir, 'bigramDict.dct'))
-            self.lexical_ctx = Context(os.path.join(data_dir, 'lexical.ctx'))
-            self.nr_dct = Dictionary(os.path.join(data_dir, 'nr.dct'))
-            self.nr_ctx = Context(os.path.join(data_dir, 'nr.ctx'))
-            self.ns_dct = Dictionary(os.path.join(data_dir, 'ns.dct'))
-            self.ns_ctx = Context(os.path.join(data_dir, 'ns.ctx'))
-            self.tr_dct = Dictionary(os.path.join(data_dir, 'tr.dct'))
-            self.tr_ctx = Context(os.path.join(data_dir, 'tr.ctx'))
-            self.is_load = True
+            self.load(data_dir, lazy=lazy)
+
+    def __getattr__(self, name):
+        """
+        组件在第一次访问时才创建: 延迟加载时从data_dir加载, 否则为空组件
+        加载后组件成为实例属性, 之后的访问不再经过这里
+        """
+        for component_name, filename, component_class in self.COMPONENTS:
+            if component_name == name:
+                break
         else:
-            self.core_dct = Dictionary()
-            self.bigram_dct = BiDictionary()
-            self.lexical_ctx = Context()
-            self.nr_dct = Dictionary()
-            self.nr_ctx = Context()
-            self.ns_dct = Dictionary()
-            self.ns_ctx = Context()
-            self.tr_dct = Dictionary()
-            self.tr_ctx = Context()
-            self.is_load = True
-
-    def load(self, data_dir):
-        self.core_dct.load(os.path.join(data_dir, 'coreDict.dct'))
-        self.bigram_dct.load(os.path.join(data_dir, 'bigramDict.dct'))
-        self.lexical_ctx.load(os.path.join(data_dir, 'lexical.ctx'))
-        self.nr_dct.load(os.path.join(data_dir, 'nr.dct'))
-        self.nr_ctx.load(os.path.join(data_dir, 'nr.ctx'))
-        self.ns_dct.load(os.path.join(data_dir, 'ns.dct'))
-        self.ns_ctx.load(os.path.join(data_dir, 'ns.ctx'))
-        self.tr_dct.load(os.path.join(data_dir, 'tr.dct'))
-        self.tr_ctx.load(os.path.join(data_dir, 'tr.ctx'))
+            raise AttributeError(name)
+        if name in self._loading:
+            self.ensure_ready((name,))
+        if name in self.failed_components:
+            raise self.failed_components[name]
+        with self._lock:
+            if name in self.__dict__:
+                return self.__dict__[name]
+            if self.data_dir is not None:
+                return self.load_component(self.data_dir, name)
+            component = component_class()
+            setattr(self, name, component)
+            return component
+
+    def load(self, data_dir, components=None, lazy=False):
+        """
+        加载模型数据
+        @:param components  需要加载的组件名列表, 为None时加载全部组件;
+                            延迟加载时为需要立即加载的组件
+        @:param lazy    为True时其它组件在第一次使用时才加载
+        """
+        if lazy:
+            self.data_dir = data_dir
+            components = components or ()
+        for name, filename, component_class in self.COMPONENTS:
+            if components is not None and name not in components:
+                continue
+            self.load_component(data_dir, name)
         self.is_load = True
         return self.is_load
 
+    def load_component(self, data_dir, name):
+        """
+        只加载一个组件, 替换已有的同名组件
+        可以在新建的DataStore中单独加载一个组件, 用memory_report()测量其内存
+        可选组件的文件不存在时用空组件代替, 并记录在missing_components中
+        """
+        for component_name, filename, component_class in self.COMPONENTS:
+            if component_name == name:
+                break
+        else:
+            raise ValueError('unknown component: {}'.format(name))
+        filename = os.path.join(data_dir, filename)
+        component = component_class()
+        missing = name in self.OPTIONAL_COMPONENTS and not os.path.exists(filename)
+        if not missing:
+            # 在锁外解析文件, 后台加载时各组件可以同时读取
+            component.load(filename)
+        with self._lock:
+            if missing:
+                self.missing_components.add(name)
+            else:
+                self.loaded_components.add(name)
+                self.missing_components.discard(name)
+            self.failed_components.pop(name, None)
+            current = self.__dict__.get(name)
+            if isinstance(current, LayeredDictionary):
+                # 重新加载基础词典, 保留用户词典
+                current.base = component
+                component = current
+            setattr(self, name, component)
+        return component
+
+    def load_async(self, data_dir, components=None, threads=2, block=True):
+        """
+        在后台线程中加载模型数据, 立即返回LoadFuture
+        组件按COMPONENTS的顺序分给各线程, core_dct最先开始加载;
+        受GIL限制, 多个线程主要是让文件读取和解析交错进行, 而不是并行解析
+        @:param components  需要加载的组件名列表, 为None时加载全部组件
+        @:param threads 加载线程数
+        @:param block   访问还在加载的组件时是否等待, 为False时抛出ComponentNotReady
+        """
+        names = [name for name, filename, component_class in self.COMPONENTS
+                 if components is None or name in components]
+        future = LoadFuture(self, names)
+        pending = list(reversed(names))
+        with self._lock:
+            self.block_on_loading = block
+            for name in names:
+                self._loading[name] = future
+
+        def worker():
+            while True:
+                with self._lock:
+                    if not pending:
+                        return
+                    name = pending.pop()
+                error = None
+                try:
+                    self.load_component(data_dir, name)
+                except Exception as e:
+                    error = e
+                with self._lock:
+                    if error is not None:
+                        self.failed_components[name] = error
+                    del self._loading[name]
+                future._finish(name, error)
+
+        for _ in range(max(min(threads, len(names)), 1)):
+            thread = threading.Thread(target=worker, name='pycseg-loader')
+            thread.daemon = True
+            thread.start()
+        self.is_load = True
+        return future
+
+    def user_dictionary(self):
+        """
+        core_dct之上的用户词典视图LayeredDictionary, 第一次调用时创建并替换core_dct
+        之后的add_word/remove_word只修改覆盖层, 不重建core_dct
+        """
+        # 在锁外访问, 后台加载时等待core_dct
+        core_dct = self.core_dct
+        with self._lock:
+            core_dct = self.__dict__['core_dct']
+            if not isinstance(core_dct, LayeredDictionary):
+                core_dct = self.core_dct = LayeredDictionary(core_dct)
+            return core_dct
+
+    def tenant(self, name):
+        """
+        租户name的模型数据视图, 第一次调用时创建, 之后返回同一个对象
+        返回之前检查共享词典是否被替换, 参见TenantDataStore.refresh()
+        """
+        view = self._tenants.get(name)
+        if view is None:
+            with self._lock:
+                view = self._tenants.setdefault(name, TenantDataStore(self, name))
+        return view.refresh()
+
+    def remove_tenant(self, name):
+        """删除租户的视图及增量层, @:return 租户是否存在"""
+        with self._lock:
+            return self._tenants.pop(name, None) is not None
+
+    @property
+    def tenants(self):
+        """已创建的租户名"""
+        return sorted(self._tenants)
+
+    def ensure_ready(self, names):
+        """
+        等待names中正在后台加载的组件, block_on_loading为False时抛出ComponentNotReady
+        没有后台加载时直接返回
+        """
+        if not self._loading:
+            return
+        loading = [name for name in names if name in self._loading]
+        if not loading:
+            return
+        if not self.block_on_loading:
+            raise ComponentNotReady(', '.join(loading))
+        for name in loading:
+            future = self._loading.get(name)
+            if future is not None:
+                future.wait((name,))
+
+    def component_status(self):
+        """
+        各组件的状态:
+            'loaded'    已从文件加载
+            'missing'   可选组件的文件不存在, 使用空组件
+            'pending'   延迟加载, 还没有用到
+            'empty'     没有加载, 为空组件
+            'loading'   正在后台加载
+            'failed'    后台加载失败
+        """
+        status = {}
+        for name, filename, component_class in self.COMPONENTS:
+            if name in self._loading:
+                status[name] = self.STATUS_LOADING
+            elif name in self.failed_components:
+                status[name] = self.STATUS_FAILED
+            elif name in self.loaded_components:
+                status[name] = self.STATUS_LOADED
+            elif name in self.missing_components:
+                status[name] = self.STATUS_MISSING
+            elif self.data_dir is not None and name not in self.__dict__:
+                status[name] = self.STATUS_PENDING
+            else:
+                status[name] = self.STATUS_EMPTY
+        return status
+
+    def freeze(self, quantize=None):
+        """
+        把已加载的词典和二元词典换成只读的FrozenDictionary/FrozenBiDictionary,
+        用于fork工作进程之前, 参见Pycseg.prefork()
+        冻结之后不能再修改这些组件, 用户词典的覆盖层除外
+        @:param quantize    为'float32'或'fixed16'时把HMM模型也换成量化的FrozenContext,
+                            参见QuantizedProbabilities; 为None时HMM模型不变
+        """
+        if quantize is not None and quantize not in QuantizedProbabilities.PRECISIONS:
+            raise ValueError('unknown precision: {}'.format(quantize))
+        with self._lock:
+            for name, filename, component_class in self.COMPONENTS:
+                component = self.__dict__.get(name)
+                if isinstance(component, LayeredDictionary):
+                    # 只冻结基础词典, 覆盖层仍然可以修改
+                    if isinstance(component.base, Dictionary):
+                        component.base = FrozenDictionary(component.base)
+                elif isinstance(component, Dictionary):
+                    setattr(self, name, FrozenDictionary(component))
+                elif isinstance(component, BiDictionary):
+                    setattr(self, name, FrozenBiDictionary(component))
+                elif isinstance(component, Context) and quantize is not None:
+                    setattr(self, name, FrozenContext(component, quantize))
+        self.frozen = True
+
+    @property
+    def resident_components(self):
+        """已在内存中的组件名, 按COMPONENTS的顺序"""
+        return [name for name, filename, component_class in self.COMPONENTS
+                if name in self.__dict__]
+
+    def memory_report(self):
+        """
+        各组件的内存占用: 对象个数及递归计算的字节数(sys.getsizeof之和)
+        组件之间共享的对象(如小整数)只计入第一个组件, 不会触发延迟加载
+        @:return {组件名: {'loaded': bool, 'status': 状态, 'objects': n, 'bytes': n}, ...,
+                  'total': {'objects': n, 'bytes': n}}
+        """
+        report = {}
+        seen = set()
+        status = self.component_status()
+        total_bytes, total_objects = 0, 0
+        for name, filename, component_class in self.COMPONENTS:
+            if name in self.__dict__:
+                size, count = memory.deep_sizeof(self.__dict__[name], seen)
+            else:
+                size, count = 0, 0
+            report[name] = {'loaded': name in self.loaded_components,
+                            'status': status[name],
+                            'objects': count, 'bytes': size}
+            total_bytes += size
+            total_objects += count
+        report['total'] = {'objects': total_objects, 'bytes': total_bytes}
+        return report
+
     @property
     def is_loaded(self):
         return self.is_load
@@ -30,6 +30,24 @@ CT_CHINESE = CT_SINGLE + 2
 CT_LETTER = CT_SINGLE + 3
 CT_NUM = CT_SINGLE + 4
 CT_INDEX = CT_SINGLE + 5
+# 日期、时间
+CT_TIME = CT_SINGLE + 6
 CT_OTHER = CT_SINGLE + 12
 
 MAX_FREQUENCE = 2079997
+
+# Pipeline mode
+# 仅分词: 原子切分 + 词典匹配 + 最短路径
+MODE_SEG = 'seg'
+# 分词 + 未登录词识别
+MODE_SEG_OOV = 'seg+oov'
+# 分词 + 未登录词识别 + 词性标注 + 路径评分
+MODE_FULL = 'full'
+
+# Segmentation engine
+# N-最短路径 + 二元语法
+ENGINE_NSHORT = 'nshort'
+# 词典正向/逆向/双向最大匹配, 不识别未登录词
+ENGINE_FMM = 'fmm'
+ENGINE_BMM = 'bmm'
+ENGINE_BIMM = 'bimm'
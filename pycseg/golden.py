@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+"""
+金标准对比: 用参考配置和候选配置的Pycseg处理同一语料, 统计词级和句子级的差异
+
+    reference = pycseg.Pycseg()
+    candidate = pycseg.Pycseg(engine='bimm')
+    ...
+    report = golden.compare(reference, candidate, lines)
+    print(report.format())
+    assert report.passed(token_tolerance=0.01)
+
+命令行:
+    python -m pycseg.golden --candidate engine=bimm,mode=full tests/in.txt
+"""
+
+from __future__ import division, unicode_literals, absolute_import, print_function
+
+import argparse
+import io
+import sys
+
+import pycseg
+
+
+def word_spans(words, tags):
+    """@:return {(start, end, tag), ...} 每个词在句子中的区间及词性"""
+    spans = set()
+    begin = 0
+    for word, tag in zip(words, tags):
+        spans.add((begin, begin + len(word), tag))
+        begin += len(word)
+    return spans
+
+
+class SentenceDiff(object):
+    """一个结果不同的句子"""
+    __slots__ = ('sentence', 'reference', 'candidate')
+
+    def __init__(self, sentence, reference, candidate):
+        self.sentence = sentence
+        self.reference = reference
+        self.candidate = candidate
+
+    def format(self):
+        return '\n'.join([self.sentence,
+                          '  - ' + pycseg.Pycseg.format_result(self.reference),
+                          '  + ' + pycseg.Pycseg.format_result(self.candidate)])
+
+
+class GoldenReport(object):
+    """
+    对比结果
+    词级: 两边切分区间相同的词数, 以及区间和词性都相同的词数
+    句子级: 分词(和词性)完全相同的句子数
+    """
+
+    def __init__(self, tags=True, max_diffs=100):
+        """
+        @:param tags    是否比较词性, 'seg'模式的结果没有标注的词性
+        @:param max_diffs   最多保存的不同句子数
+        """
+        self.tags = tags
+        self.max_diffs = max_diffs
+        self.sentences = 0
+        self.sentences_differ = 0
+        self.reference_tokens = 0
+        self.candidate_tokens = 0
+        self.words_matched = 0
+        self.tags_matched = 0
+        self.diffs = []
+
+    def add(self, sentence, reference, candidate):
+        ref_spans = word_spans(reference['words'], reference['tags'])
+        cand_spans = word_spans(candidate['words'], candidate['tags'])
+        ref_words = set(span[:2] for span in ref_spans)
+        cand_words = set(span[:2] for span in cand_spans)
+
+        self.sentences += 1
+        self.reference_tokens += len(ref_spans)
+        self.candidate_tokens += len(cand_spans)
+        self.words_matched += len(ref_words & cand_words)
+        self.tags_matched += len(ref_spans & cand_spans)
+
+        differ = ref_spans != cand_spans if self.tags else ref_words != cand_words
+        if differ:
+            self.sentences_differ += 1
+            if len(self.diffs) < self.max_diffs:
+                self.diffs.append(SentenceDiff(sentence, reference, candidate))
+
+    def _agreement(self, matched):
+        total = self.reference_tokens + self.candidate_tokens
+        return 2 * matched / total if total else 1.0
+
+    @property
+    def word_agreement(self):
+        """切分区间的F1"""
+        return self._agreement(self.words_matched)
+
+    @property
+    def tag_agreement(self):
+        """切分区间和词性都相同的F1"""
+        return self._agreement(self.tags_matched)
+
+    @property
+    def token_disagreement(self):
+        return 1 - (self.tag_agreement if self.tags else self.word_agreement)
+
+    @property
+    def sentence_disagreement(self):
+        return self.sentences_differ / self.sentences if self.sentences else 0.0
+
+    def passed(self, token_tolerance=0.0, sentence_tolerance=None):
+        """
+        @:param token_tolerance 允许的词级差异比例
+        @:param sentence_tolerance  允许的句子级差异比例, 为None时不检查
+        """
+        if self.token_disagreement > token_tolerance:
+            return False
+        return (sentence_tolerance is None or
+                self.sentence_disagreement <= sentence_tolerance)
+
+    def to_dict(self):
+        return {
+            'sentences': self.sentences,
+            'sentences_differ': self.sentences_differ,
+            'reference_tokens': self.reference_tokens,
+            'candidate_tokens': self.candidate_tokens,
+            'word_agreement': self.word_agreement,
+            'tag_agreement': self.tag_agreement,
+            'token_disagreement': self.token_disagreement,
+            'sentence_disagreement': self.sentence_disagreement,
+        }
+
+    def format(self):
+        lines = [
+            'sentences: {} differ: {} ({:.4%})'.format(
+                self.sentences, self.sentences_differ, self.sentence_disagreement),
+            'tokens: reference {} candidate {}'.format(
+                self.reference_tokens, self.candidate_tokens),
+            'word agreement: {:.4%}'.format(self.word_agreement),
+        ]
+        if self.tags:
+            lines.append('tag agreement: {:.4%}'.format(self.tag_agreement))
+        for diff in self.diffs:
+            lines.append('')
+            lines.append(diff.format())
+        return '\n'.join(lines)
+
+
+def compare(reference, candidate, lines, tags=True, max_diffs=100):
+    """
+    逐句对比两个Pycseg的结果, 句子按reference.split_sentences切分
+    @:param lines   文本行的可迭代对象
+    @:return GoldenReport
+    """
+    report = GoldenReport(tags, max_diffs)
+    for line in lines:
+        for sentence in reference.split_sentences(line.strip()):
+            report.add(sentence, reference.process(sentence),
+                       candidate.process(sentence))
+    return report
+
+
+def parse_config(text):
+    """'mode=seg,engine=fmm,max_sentence_length=50' -> Pycseg的参数"""
+    kwargs = {}
+    for item in filter(None, text.split(',')):
+        key, value = item.split('=', 1)
+        if value == 'None':
+            value = None
+        elif value.isdigit():
+            value = int(value)
+        kwargs[key.strip()] = value
+    return kwargs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='compare a candidate Pycseg configuration against the reference')
+    parser.add_argument('corpus', help='UTF-8 text file, one document per line')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--components', help='comma separated components to load')
+    parser.add_argument('--reference', default='',
+                        help='reference Pycseg arguments, e.g. mode=full')
+    parser.add_argument('--candidate', default='',
+                        help='candidate Pycseg arguments, e.g. engine=bimm')
+    parser.add_argument('--no-tags', action='store_true', help='compare words only')
+    parser.add_argument('--token-tolerance', type=float, default=0.0)
+    parser.add_argument('--sentence-tolerance', type=float)
+    parser.add_argument('--max-diffs', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    components = args.components.split(',') if args.components else None
+    segs = []
+    for config in (args.reference, args.candidate):
+        seg = pycseg.Pycseg(**parse_config(config))
+        seg.load(args.data_dir, components)
+        segs.append(seg)
+    with io.open(args.corpus, encoding='utf-8') as f:
+        report = compare(segs[0], segs[1], f, not args.no_tags, args.max_diffs)
+    print(report.format())
+    passed = report.passed(args.token_tolerance, args.sentence_tolerance)
+    print('PASSED' if passed else 'FAILED')
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
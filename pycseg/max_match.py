@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals, absolute_import
+
+import itertools
+
+import pycseg.definitions as definitions
+from pycseg.data_store import Feature, Word
+from pycseg.segment import ATOM_ALIASES
+
+# 匹配方向
+FORWARD = 'forward'
+BACKWARD = 'backward'
+BIDIRECTIONAL = 'bidirectional'
+
+
+def forward_max_match(atoms, dictionary):
+    """
+    正向最大匹配
+    @:param atoms   原子内容列表
+    @:param dictionary  Dictionary
+    @:return [(left, right), ...] 每个词在atoms中的区间
+    """
+    spans = []
+    i, count = 0, len(atoms)
+    while i < count:
+        length = dictionary.longest_key(itertools.islice(atoms, i, None)) or 1
+        spans.append((i, i + length))
+        i += length
+    return spans
+
+
+def backward_max_match(atoms, dictionary):
+    """
+    逆向最大匹配: 从句尾开始, 每次取以当前位置结尾的最长词
+    先用一次正向的前缀匹配求出每个位置结尾的最长词的起点, 不需要反向的Trie树
+    @:return [(left, right), ...] 按在atoms中的顺序
+    """
+    count = len(atoms)
+    # starts[right]: 以right结尾的最长词的起点
+    starts = list(range(-1, count))
+    for left in range(count):
+        for length in dictionary.prefix_lengths(itertools.islice(atoms, left, None)):
+            right = left + length
+            if left < starts[right]:
+                starts[right] = left
+    spans = []
+    right = count
+    while right > 0:
+        left = starts[right]
+        spans.append((left, right))
+        right = left
+    spans.reverse()
+    return spans
+
+
+def bidirectional_max_match(atoms, dictionary):
+    """
+    双向最大匹配: 取正向和逆向结果中词数较少的,
+    词数相同时取单字词较少的, 仍相同时取逆向结果
+    """
+    forward = forward_max_match(atoms, dictionary)
+    backward = backward_max_match(atoms, dictionary)
+    if len(forward) != len(backward):
+        return forward if len(forward) < len(backward) else backward
+    if forward == backward:
+        return backward
+    forward_singles = sum([1 for left, right in forward if right - left == 1])
+    backward_singles = sum([1 for left, right in backward if right - left == 1])
+    return forward if forward_singles < backward_singles else backward
+
+
+MATCHERS = {
+    FORWARD: forward_max_match,
+    BACKWARD: backward_max_match,
+    BIDIRECTIONAL: bidirectional_max_match,
+}
+
+
+class MaxMatch(object):
+    """
+    词典最大匹配分词: 不建词图、不识别未登录词, 用于快速分词和超时降级
+    """
+
+    def __init__(self, d_store=None, direction=FORWARD):
+        if direction not in MATCHERS:
+            raise ValueError('unknown max match direction: {}'.format(direction))
+        self.d_store = d_store
+        self.direction = direction
+
+    def segment(self, segment):
+        """
+        @:param segment 已完成原子切分的Segment
+        @:return [Word(), ...], 不含句子开始和结束标识
+        """
+        atoms = segment.get_words_graph().get_atoms()[1:-1]
+        contents = [atom.content for atom in atoms]
+        core_dct = self.d_store.core_dct
+        words = []
+        for left, right in MATCHERS[self.direction](contents, core_dct):
+            content = ''.join(contents[left:right])
+            word_attr = core_dct.get(content)
+            if word_attr:
+                pos = 0 if len(word_attr) > 1 else word_attr[0][1]
+                words.append(Word(content, Feature(tag_code=pos),
+                                  sum([v[0] for v in word_attr])))
+            elif right - left == 1:
+                # 数字和字母串使用别名
+                feature, alias = ATOM_ALIASES.get(atoms[left].feature.tag_code, (None, None))
+                words.append(Word(content, feature, alias=alias))
+            else:
+                words.append(Word(content))
+        return words
+
+    def sentence_words(self, words):
+        """在words前后加上句子开始和结束标识, 用于词性标注"""
+        core_dct = self.d_store.core_dct
+        begin = core_dct[definitions.SENTENCE_BEGIN][0]
+        end = core_dct[definitions.SENTENCE_END][0]
+        return ([Word(definitions.SENTENCE_BEGIN, Feature(tag_code=begin[1]), begin[0])] +
+                words +
+                [Word(definitions.SENTENCE_END, Feature(tag_code=end[1]), end[0])])
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+
+"""
+运行指标: 计数器、仪表和直方图, 可以导出为Prometheus文本格式
+
+    seg = pycseg.Pycseg()
+    registry = seg.enable_metrics()
+    seg.process(content)
+    registry.write_prometheus('/var/lib/node_exporter/pycseg.prom')
+    # 或者 registry.serve(9108)
+"""
+
+from __future__ import division, unicode_literals, absolute_import
+
+import io
+import os
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from pycseg.stats import CACHE_STATS
+
+# 词图顶点数/边数直方图的分桶
+LATTICE_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+# 句子耗时直方图的分桶(秒)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+def _format_labels(labelnames, labelvalues):
+    if not labelnames:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, value) for name, value in
+                          zip(labelnames, labelvalues)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(object):
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError('{} expects labels {}'.format(self.name, self.labelnames))
+        return tuple(labels[name] for name in self.labelnames)
+
+    def samples(self):
+        """@:return [(name, labelnames, labelvalues, value), ...]"""
+        raise NotImplementedError
+
+    def render(self):
+        lines = ['# HELP {} {}'.format(self.name, self.documentation),
+                 '# TYPE {} {}'.format(self.name, self.metric_type)]
+        for name, labelnames, labelvalues, value in self.samples():
+            lines.append('{}{} {}'.format(name, _format_labels(labelnames, labelvalues),
+                                          _format_value(value)))
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """单调递增的计数器, 或者在导出时由function计算的{标签值: 计数}"""
+    metric_type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super(Counter, self).__init__(name, documentation, labelnames)
+        self.function = function
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def _values(self):
+        return self.function() if self.function is not None else self.values
+
+    def get(self, **labels):
+        return self._values().get(self._key(labels), 0)
+
+    def samples(self):
+        return [(self.name, self.labelnames, key, value)
+                for key, value in sorted(self._values().items())]
+
+
+class Gauge(Metric):
+    """可增可减的值, 或者在导出时由function计算的值"""
+    metric_type = 'gauge'
+
+    def __init__(self, name, documentation, function=None):
+        super(Gauge, self).__init__(name, documentation)
+        self.function = function
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def get(self):
+        return self.function() if self.function is not None else self.value
+
+    def samples(self):
+        return [(self.name, (), (), self.get())]
+
+
+class Histogram(Metric):
+    """分桶计数的直方图"""
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, buckets):
+        super(Histogram, self).__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            self.count += 1
+            self.sum += value
+
+    def samples(self):
+        samples, cumulative = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            samples.append((self.name + '_bucket', ('le',), (_format_value(bound),),
+                            cumulative))
+        samples.append((self.name + '_count', (), (), self.count))
+        samples.append((self.name + '_sum', (), (), self.sum))
+        return samples
+
+
+class MetricsRegistry(object):
+    """指标的集合, 按注册顺序导出"""
+
+    def __init__(self):
+        self.metrics = []
+        self._names = {}
+        # 注册在这个registry上的EngineMetrics, 多个Pycseg可以共用
+        self.engine_metrics = None
+
+    def register(self, metric):
+        if metric.name in self._names:
+            raise ValueError('duplicated metric: {}'.format(metric.name))
+        self._names[metric.name] = metric
+        self.metrics.append(metric)
+        return metric
+
+    def get(self, name):
+        return self._names[name]
+
+    def counter(self, name, documentation, labelnames=(), function=None):
+        return self.register(Counter(name, documentation, labelnames, function))
+
+    def gauge(self, name, documentation, function=None):
+        return self.register(Gauge(name, documentation, function))
+
+    def histogram(self, name, documentation, buckets):
+        return self.register(Histogram(name, documentation, buckets))
+
+    def render(self):
+        """Prometheus文本格式"""
+        return ''.join(metric.render() + '\n' for metric in self.metrics)
+
+    def write_prometheus(self, filename):
+        """写入文件, 先写临时文件再改名, 避免读到不完整的内容"""
+        tmp_filename = '{}.{}.tmp'.format(filename, os.getpid())
+        with io.open(tmp_filename, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.rename(tmp_filename, filename)
+
+    def serve(self, port, host='127.0.0.1'):
+        """
+        在后台线程中启动HTTP服务, 任意路径都返回当前指标
+        @:return HTTPServer, 调用shutdown()停止
+        """
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer((host, port), MetricsHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return server
+
+
+class EngineMetrics(object):
+    """
+    Pycseg的运行指标, 作为observer从每个句子的SentenceTrace更新
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        registry.engine_metrics = self
+        self.sentences = registry.counter(
+            'pycseg_sentences_total', 'Sentences processed.')
+        self.chars = registry.counter(
+            'pycseg_chars_total', 'Characters processed.')
+        self.seconds = registry.counter(
+            'pycseg_processing_seconds_total', 'Time spent processing sentences.')
+        registry.gauge('pycseg_chars_per_second',
+                       'Characters processed per second of processing time.',
+                       self._chars_per_second)
+        self.stage_seconds = registry.counter(
+            'pycseg_stage_seconds_total', 'Time spent in each pipeline stage.',
+            ('stage',))
+        self.oov_words = registry.counter(
+            'pycseg_oov_words_total', 'OOV words added to the lattice by type.',
+            ('type',))
+        self.paths = registry.counter(
+            'pycseg_nbest_paths_total', 'N-best segmentation paths evaluated.')
+        self.pool = registry.counter(
+            'pycseg_pool_requests_total',
+            'Atom/Word pool requests by whether a pooled object was reused.', ('result',))
+        # 进程内的缓存(Feature实例、切分句子的正则表达式), 导出时读取累计值
+        self.cache = registry.counter(
+            'pycseg_cache_requests_total', 'Lookup cache requests by cache and result.',
+            ('cache', 'result'), self._cache_requests)
+        self.vertices = registry.histogram(
+            'pycseg_lattice_vertices', 'Word lattice vertices per sentence.',
+            LATTICE_BUCKETS)
+        self.edges = registry.histogram(
+            'pycseg_lattice_edges', 'Word lattice edges per sentence.',
+            LATTICE_BUCKETS)
+        self.latency = registry.histogram(
+            'pycseg_sentence_seconds', 'Sentence processing time.',
+            LATENCY_BUCKETS)
+
+    def _chars_per_second(self):
+        seconds = self.seconds.get()
+        return self.chars.get() / seconds if seconds else 0
+
+    @staticmethod
+    def _cache_requests():
+        values = {}
+        for name, stats in CACHE_STATS.items():
+            values[(name, 'hit')] = stats.hits
+            values[(name, 'miss')] = stats.misses
+        return values
+
+    def __call__(self, trace):
+        self.sentences.inc()
+        self.chars.inc(trace.length)
+        self.seconds.inc(trace.total)
+        for stage, seconds in trace.timings:
+            self.stage_seconds.inc(seconds, stage=stage)
+        for oov_type, count in trace.oov_words.items():
+            self.oov_words.inc(count, type=oov_type)
+        self.paths.inc(trace.paths)
+        self.pool.inc(trace.pool_hits, result='reused')
+        self.pool.inc(trace.pool_misses, result='allocated')
+        self.vertices.observe(trace.vertices)
+        self.edges.observe(trace.edges)
+        self.latency.observe(trace.total)
@@ -8,6 +8,9 @@ import pycseg.definitions as definitions
 from pycseg.utils import hmm
 from pycseg.data_store import Feature, WordsGraph
 
+# 未登录词类型, 按识别顺序: 人名, 音译人名, 地名
+OOV_TYPES = ('nr', 'tr', 'ns')
+
 
 class OOVDetection(object):
     """未登录词识别"""
@@ -25,30 +28,36 @@ class OOVDetection(object):
 
         self.d_store = d_store
         self.words_graph = words_graph
+        # 可复用的HMM模型和viterbi表, 为None时每次重新生成
+        self.hmm_model = None
+        self.viterbi_table = None
+        # 需要识别的未登录词类型, 只会用到这些类型的词典和HMM
+        self.oov_types = OOV_TYPES
+        # 上一次oov_detection()生成的各类型未登录词个数
+        self.oov_counts = {'nr': 0, 'tr': 0, 'ns': 0}
+        # 上一次oov_detection()中各类型匹配到模式的候选个数, 包括权值不够而没有加入词图的
+        self.oov_candidates = {'nr': 0, 'tr': 0, 'ns': 0}
 
     def oov_detection(self):
+        for oov_type in self.oov_counts:
+            self.oov_counts[oov_type] = 0
+            self.oov_candidates[oov_type] = 0
         self.words_graph.generate_words_dag(self.d_store.bigram_dct)
         seg_words_result = self.words_graph.words_segment()
         #print(' '.join([w.content for w in seg_words_result[0]['words']]))
         for seg_words in seg_words_result:
             words = seg_words['words']
             index = seg_words['index']
-            nr_tag = self.oov_tagging(words,
-                                      self.d_store.nr_dct,
-                                      self.d_store.nr_ctx,
-                                      self.d_store.core_dct)
-            tr_tag = self.oov_tagging(words,
-                                      self.d_store.tr_dct,
-                                      self.d_store.tr_ctx,
-                                      self.d_store.core_dct)
-            ns_tag = self.oov_tagging(words,
-                                      self.d_store.ns_dct,
-                                      self.d_store.ns_ctx,
-                                      self.d_store.core_dct)
-
-            self.generate_nr_words(nr_tag, index)
-            self.generate_tr_words(tr_tag, index)
-            self.generate_ns_words(ns_tag, index)
+            oov_tags = []
+            for oov_type in self.oov_types:
+                oov_tags.append((oov_type, self.oov_tagging(
+                    words,
+                    getattr(self.d_store, oov_type + '_dct'),
+                    getattr(self.d_store, oov_type + '_ctx'),
+                    self.d_store.core_dct)))
+
+            for oov_type, oov_tag in oov_tags:
+                getattr(self, 'generate_{}_words'.format(oov_type))(oov_tag, index)
 
     def generate_nr_words(self, nr_tag, seg_index):
         self.generate_oov_words('nr', nr_tag, seg_index,
@@ -98,6 +107,7 @@ class OOVDetection(object):
                 continue
 
             # print('match[{}] {} = {}'.format(i, oov_type, pattern_match))
+            self.oov_candidates[oov_type] += 1
             # 找到未登录词pattern后， 合并未登录词
 
             # 未登录词的左右边界
@@ -114,6 +124,7 @@ class OOVDetection(object):
                 feature = Feature('nr') if oov_type == 'tr' else Feature(oov_type)
                 self.words_graph.generate_word(oov_left, oov_right,
                                  feature, weight, oov_alias)
+                self.oov_counts[oov_type] += 1
             i += len(pattern_match)
 
     def compute_possibility(self, start_position, seg_index, oov_pattern, oov_dct, oov_ctx):
@@ -154,10 +165,12 @@ class OOVDetection(object):
 
         @:return viterbi标注序列
         """
-        h_model = self.generate_hmm_model(words, oov_dct, oov_ctx, core_dct)
+        h_model = self.generate_hmm_model(words, oov_dct, oov_ctx, core_dct,
+                                          self.hmm_model)
         prob, path = hmm.viterbi(h_model.observations, h_model.states,
                                  h_model.start_prob, h_model.transition_prob,
-                                 h_model.emission_prob)
+                                 h_model.emission_prob,
+                                 table=self.viterbi_table)
 
         # 打印结果
         #print(' '.join(['{}/{}'.format(word.content, pos_decode(pos))
@@ -166,14 +179,20 @@ class OOVDetection(object):
         return oov_tag
 
     @staticmethod
-    def generate_hmm_model(words, oov_dct, oov_ctx, core_dct):
+    def generate_hmm_model(words, oov_dct, oov_ctx, core_dct, h_model=None):
         """
         生成未登录词HMM模型中的观察序列 和 发射概率
+        @:param h_model 复用的HMM模型, 为None时新建
 
         @:return HMM model
         """
         smoothing_param = 0.1
-        h_model = hmm.HMM(states=oov_ctx.states,
+        if h_model is None:
+            h_model = hmm.HMM(states=oov_ctx.states,
+                              start_prob=oov_ctx.start_prob,
+                              transition_prob=oov_ctx.transition_prob)
+        else:
+            h_model.reset(states=oov_ctx.states,
                           start_prob=oov_ctx.start_prob,
                           transition_prob=oov_ctx.transition_prob)
         for word in words:
@@ -14,6 +14,9 @@ class POSTagging(object):
     def __init__(self, words_graph=None, d_store=None):
         self.words_graph = words_graph
         self.d_store = d_store
+        # 可复用的HMM模型和viterbi表, 为None时每次重新生成
+        self.hmm_model = None
+        self.viterbi_table = None
 
     def pos_tagging(self):
         self.words_graph.generate_words_dag()
@@ -26,12 +29,14 @@ class POSTagging(object):
 
     def generate_pos_tags(self, words, dictionary=None, lexical=None):
         """词性标注"""
-        hmm_model = self.generate_hmm_model(words, dictionary, lexical)
+        hmm_model = self.generate_hmm_model(words, dictionary, lexical,
+                                            self.hmm_model)
 
         prob, tags = hmm.viterbi(hmm_model.observations, hmm_model.states,
                                  hmm_model.start_prob,
                                  hmm_model.transition_prob,
-                                 hmm_model.emission_prob)
+                                 hmm_model.emission_prob,
+                                 table=self.viterbi_table)
 
         # 打印结果
         #print(' '.join(['{}/{}'.format(word.content, Feature(tag_code=tag).tag
@@ -39,12 +44,20 @@ class POSTagging(object):
         return tags
 
     @staticmethod
-    def generate_hmm_model(words, dictionary, lexical):
-        """生成HMM模型中的观察序列 和 发射概率"""
+    def generate_hmm_model(words, dictionary, lexical, hmm_model=None):
+        """
+        生成HMM模型中的观察序列 和 发射概率
+        @:param hmm_model   复用的HMM模型, 为None时新建
+        """
         smoothing_param = 0.1
-        hmm_model = hmm.HMM(states=lexical.states,
-                          start_prob=lexical.start_prob,
-                          transition_prob=lexical.transition_prob)
+        if hmm_model is None:
+            hmm_model = hmm.HMM(states=lexical.states,
+                                start_prob=lexical.start_prob,
+                                transition_prob=lexical.transition_prob)
+        else:
+            hmm_model.reset(states=lexical.states,
+                            start_prob=lexical.start_prob,
+                            transition_prob=lexical.transition_prob)
         for word in words:
             # 观察序列
             hmm_model.add_observations(word.alias)
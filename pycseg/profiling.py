@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+"""
+性能剖析: 在确定性(cProfile)或采样剖析器下运行, 并把热点函数归到处理阶段
+
+    seg = pycseg.Pycseg()
+    seg.load('data')
+    report = seg.profile(lines, profiler='sampling')
+    print(report.format())
+    report.dump('pycseg.folded')    # flamegraph.pl pycseg.folded > pycseg.svg
+
+cprofile的结果写为pstats文件, sampling的结果写为collapsed stack格式
+"""
+
+from __future__ import division, unicode_literals, absolute_import
+
+import cProfile
+import collections
+import io
+import os
+import pstats
+import signal
+
+from pycseg.data_store import WordsGraph
+from pycseg.segment import Segment
+from pycseg.oov_detection import OOVDetection
+from pycseg.pos_tagging import POSTagging
+from pycseg.max_match import MaxMatch
+
+PROFILER_CPROFILE = 'cprofile'
+PROFILER_SAMPLING = 'sampling'
+PROFILERS = (PROFILER_CPROFILE, PROFILER_SAMPLING)
+
+# 不属于任何处理阶段的耗时, 如句子切分和结果输出
+STAGE_OTHER = 'other'
+
+
+def _code(cls, name):
+    function = cls.__dict__[name]
+    return getattr(function, '__func__', function).__code__
+
+
+def stage_functions():
+    """@:return {code对象: 处理阶段}, 与pycseg.stats.STAGES对应"""
+    from pycseg import Pycseg
+    return {
+        _code(Segment, 'atom_segment'): 'atom_segment',
+        _code(Segment, 'word_match'): 'word_match',
+        _code(OOVDetection, 'oov_detection'): 'oov_detection',
+        _code(WordsGraph, 'generate_words_dag'): 'generate_words_dag',
+        _code(WordsGraph, 'words_segment'): 'words_segment',
+        _code(MaxMatch, 'segment'): 'max_match',
+        _code(POSTagging, 'generate_pos_tags'): 'pos_tagging',
+        _code(Pycseg, 'compute_possibility'): 'pos_tagging',
+    }
+
+
+def _code_label(code):
+    return '{} ({}:{})'.format(code.co_name, os.path.basename(code.co_filename),
+                               code.co_firstlineno)
+
+
+def _pstats_label(func):
+    filename, lineno, name = func
+    return '{} ({}:{})'.format(name, os.path.basename(filename), lineno)
+
+
+class ProfileReport(object):
+    """
+    剖析结果
+    stages: {阶段: 秒数(cprofile)或样本数(sampling)}
+    functions: [(函数, 自身耗时或样本数, {阶段: 比例}), ...] 按自身耗时从大到小
+    """
+
+    def __init__(self, profiler, stages, functions, unit):
+        self.profiler = profiler
+        self.stages = stages
+        self.functions = functions
+        self.unit = unit
+
+    def format(self, count=20):
+        lines = ['{:<20}{:>12}'.format('stage', self.unit)]
+        for stage, value in sorted(self.stages.items(), key=lambda item: -item[1]):
+            lines.append('{:<20}{:>12.4g}'.format(stage, value))
+        lines.append('')
+        lines.append('{:>12}  {:<40} {}'.format(self.unit, 'function', 'stages'))
+        for label, value, stages in self.functions[:count]:
+            lines.append('{:>12.4g}  {:<40} {}'.format(value, label, ', '.join(
+                '{} {:.0%}'.format(stage, share)
+                for stage, share in sorted(stages.items(), key=lambda item: -item[1])
+                if share >= 0.005)))
+        return '\n'.join(lines)
+
+    def dump(self, filename):
+        raise NotImplementedError
+
+
+class CProfileReport(ProfileReport):
+    """cProfile的结果, 用调用关系中每条边的累计时间把函数的自身耗时分摊到处理阶段"""
+
+    def __init__(self, profile):
+        self.stats = pstats.Stats(profile)
+        stats = self.stats.stats
+        stage_keys = dict(((code.co_filename, code.co_firstlineno, code.co_name), stage)
+                          for code, stage in stage_functions().items())
+        shares = {}
+
+        def stage_shares(func, visiting):
+            if func in stage_keys:
+                return {stage_keys[func]: 1.0}
+            if func in shares:
+                return shares[func]
+            result = collections.defaultdict(float)
+            callers = stats[func][4] if func in stats else {}
+            total = sum(edge[3] for edge in callers.values())
+            visiting.add(func)
+            for caller, edge in callers.items():
+                if caller in visiting or not total:
+                    continue
+                for stage, share in stage_shares(caller, visiting).items():
+                    result[stage] += share * edge[3] / total
+            visiting.discard(func)
+            result = dict(result)
+            shares[func] = result
+            return result
+
+        stages = collections.defaultdict(float)
+        functions = []
+        for func, (cc, nc, tt, ct, callers) in stats.items():
+            func_stages = stage_shares(func, set())
+            attributed = 0
+            for stage, share in func_stages.items():
+                stages[stage] += tt * share
+                attributed += share
+            stages[STAGE_OTHER] += tt * max(1 - attributed, 0)
+            functions.append((_pstats_label(func), tt, func_stages))
+        functions.sort(key=lambda item: -item[1])
+        super(CProfileReport, self).__init__(PROFILER_CPROFILE, dict(stages),
+                                             functions, 'seconds')
+
+    def dump(self, filename):
+        """写入pstats文件, 可以用pstats/snakeviz等工具查看"""
+        self.stats.dump_stats(filename)
+
+
+class SamplingReport(ProfileReport):
+    """采样剖析的结果, 每个样本按调用栈中最内层的阶段函数归类"""
+
+    def __init__(self, stacks):
+        # {(code, ...)由外到内: 样本数}
+        self.stacks = stacks
+        codes = stage_functions()
+        stages = collections.Counter()
+        leaves = collections.defaultdict(collections.Counter)
+        for stack, count in stacks.items():
+            stage = STAGE_OTHER
+            for code in reversed(stack):
+                if code in codes:
+                    stage = codes[code]
+                    break
+            stages[stage] += count
+            leaves[stack[-1]][stage] += count
+        functions = []
+        for code, counter in leaves.items():
+            total = sum(counter.values())
+            functions.append((_code_label(code), total,
+                              dict((stage, count / total) for stage, count in counter.items())))
+        functions.sort(key=lambda item: -item[1])
+        super(SamplingReport, self).__init__(PROFILER_SAMPLING, dict(stages),
+                                             functions, 'samples')
+
+    def collapsed(self):
+        """flamegraph.pl使用的collapsed stack格式: 'f1;f2;f3 count'"""
+        lines = []
+        for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+            lines.append('{} {}\n'.format(
+                ';'.join(_code_label(code).replace(';', ':') for code in stack), count))
+        return ''.join(lines)
+
+    def dump(self, filename):
+        with io.open(filename, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+
+
+class SamplingProfiler(object):
+    """
+    基于SIGPROF的采样剖析器, 每interval秒CPU时间记录一次主线程的调用栈
+    只能在Unix的主线程中使用
+    """
+
+    def __init__(self, interval=0.001):
+        if not hasattr(signal, 'setitimer'):
+            raise RuntimeError('sampling profiler requires signal.setitimer')
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._previous = None
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        stack.reverse()
+        self.stacks[tuple(stack)] += 1
+
+    def start(self):
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous or signal.SIG_DFL)
+
+
+def profile(function, profiler=PROFILER_CPROFILE, interval=0.001):
+    """
+    在剖析器下运行function()
+    @:param profiler    'cprofile'或'sampling'
+    @:param interval    采样间隔(秒), 只用于sampling
+    @:return (function的返回值, ProfileReport)
+    """
+    if profiler == PROFILER_CPROFILE:
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            result = function()
+        finally:
+            prof.disable()
+        return result, CProfileReport(prof)
+    if profiler == PROFILER_SAMPLING:
+        sampler = SamplingProfiler(interval)
+        sampler.start()
+        try:
+            result = function()
+        finally:
+            sampler.stop()
+        return result, SamplingReport(sampler.stacks)
+    raise ValueError('unknown profiler: {}'.format(profiler))
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+
+"""
+模型剪枝: 去掉核心词典中的低频词条和二元词典中的低频二元词, 写出精简的模型目录,
+并报告每个剪枝模型的加载时间、内存、吞吐量以及与原模型结果的一致率, 用于选择线上使用的阈值
+
+    stats = prune.prune_model('data', 'pruned/min_freq-1', min_freq=1, top_k=20)
+    reports = prune.sweep('data', 'pruned', lines, [{'min_freq': 1}, {'min_freq': 5}])
+    print(prune.format_reports(reports))
+
+命令行:
+    python -m pycseg.prune --min-freq 0,1,5 --top-k 20 tests/in.txt
+"""
+
+from __future__ import division, unicode_literals, absolute_import, print_function
+
+import argparse
+import collections
+import io
+import os
+import shutil
+import sys
+
+import pycseg
+import pycseg.definitions as definitions
+from pycseg import golden
+from pycseg.data_store import DataStore
+from pycseg.stats import timer
+
+
+def _internal(word, pos):
+    """系统内部标识符(如 始##始, 未##数)不剪枝"""
+    return 0 < pos < 256 or '##' in word
+
+
+def prune_dictionary(src, dst, min_freq=1):
+    """
+    只保留词频不小于min_freq的词条, 一个词的多个词性分别判断
+    词典格式: 词 词频 词性, 保留的行原样写出
+    @:return (保留的词条数, 删除的词条数)
+    """
+    kept, removed = 0, 0
+    with io.open(src, encoding='utf-8') as f, io.open(dst, 'w', encoding='utf-8') as out:
+        for line in f:
+            items = line.split()
+            if len(items) != 3:
+                continue
+            if int(items[1]) >= min_freq or _internal(items[0], int(items[2])):
+                out.write(line)
+                kept += 1
+            else:
+                removed += 1
+    return kept, removed
+
+
+def prune_bigrams(src, dst, min_freq=1, top_k=None):
+    """
+    只保留词频不小于min_freq的二元词, top_k不为None时每个前词最多保留词频最高的top_k个
+    二元词典格式: 前词@后词 词频, 保留的行按原顺序写出
+    @:return (保留的二元词数, 删除的二元词数)
+    """
+    entries = []
+    groups = collections.defaultdict(list)
+    with io.open(src, encoding='utf-8') as f:
+        for line in f:
+            items = line.split()
+            if len(items) < 2:
+                continue
+            freq = int(items[1])
+            if freq < min_freq:
+                entries.append((line, False))
+                continue
+            groups[items[0].split(definitions.WORD_SEGMENTER, 1)[0]].append((freq, len(entries)))
+            entries.append((line, True))
+    if top_k is not None:
+        keep = set()
+        for group in groups.values():
+            # 词频相同时保留文件中靠前的
+            group.sort(key=lambda item: (-item[0], item[1]))
+            keep.update(index for freq, index in group[:top_k])
+        entries = [(line, index in keep) for index, (line, kept) in enumerate(entries)]
+    with io.open(dst, 'w', encoding='utf-8') as out:
+        for line, kept in entries:
+            if kept:
+                out.write(line)
+    kept = sum(1 for line, k in entries if k)
+    return kept, len(entries) - kept
+
+
+def prune_model(data_dir, out_dir, min_freq=1, bigram_min_freq=None, top_k=None):
+    """
+    把data_dir中的模型文件写到out_dir: coreDict.dct和bigramDict.dct剪枝, 其它文件原样复制
+    @:param bigram_min_freq 二元词的最小词频, 为None时与min_freq相同
+    @:return {组件名: (保留数, 删除数)}, 只包含剪枝的组件
+    """
+    if bigram_min_freq is None:
+        bigram_min_freq = min_freq
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    stats = {}
+    for name, filename, component_class in DataStore.COMPONENTS:
+        src = os.path.join(data_dir, filename)
+        dst = os.path.join(out_dir, filename)
+        if not os.path.isfile(src):
+            continue
+        if name == 'core_dct':
+            stats[name] = prune_dictionary(src, dst, min_freq)
+        elif name == 'bigram_dct':
+            stats[name] = prune_bigrams(src, dst, bigram_min_freq, top_k)
+        else:
+            shutil.copyfile(src, dst)
+    return stats
+
+
+class ModelReport(object):
+    """一个模型的加载时间(秒)、组件内存(字节)、吞吐量(字/秒)和与参考模型的对比结果"""
+
+    def __init__(self, name, data_dir, load_seconds, memory_bytes, chars, seconds, golden_report,
+                 pruned=None):
+        self.name = name
+        self.data_dir = data_dir
+        self.load_seconds = load_seconds
+        self.memory_bytes = memory_bytes
+        self.chars = chars
+        self.seconds = seconds
+        self.golden = golden_report
+        self.pruned = pruned or {}
+
+    @property
+    def chars_per_second(self):
+        return self.chars / self.seconds if self.seconds else 0.0
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'data_dir': self.data_dir,
+            'load_seconds': self.load_seconds,
+            'memory_bytes': self.memory_bytes,
+            'chars_per_second': self.chars_per_second,
+            'pruned': dict((name, {'kept': kept, 'removed': removed})
+                           for name, (kept, removed) in self.pruned.items()),
+            'golden': self.golden.to_dict(),
+        }
+
+
+def reference_results(reference, lines):
+    """@:return [(句子, 结果), ...] 句子按reference.split_sentences切分"""
+    results = []
+    for line in lines:
+        for sentence in reference.split_sentences(line.strip()):
+            results.append((sentence, reference.process(sentence)))
+    return results
+
+
+def evaluate(name, data_dir, references, components=None, tags=True, max_diffs=0,
+             pruned=None, **kwargs):
+    """
+    加载data_dir中的模型并处理references中的句子
+    @:param references  reference_results的结果, 多个模型共用, 参考模型只需处理一次
+    @:param kwargs      Pycseg的参数, 应与参考模型相同
+    @:return ModelReport
+    """
+    seg = pycseg.Pycseg(**kwargs)
+    start = timer()
+    seg.load(data_dir, components)
+    load_seconds = timer() - start
+    memory_bytes = seg.d_store.memory_report()['total']['bytes']
+
+    report = golden.GoldenReport(tags, max_diffs)
+    chars, seconds = 0, 0.0
+    for sentence, expected in references:
+        start = timer()
+        result = seg.process(sentence)
+        seconds += timer() - start
+        chars += len(sentence)
+        report.add(sentence, expected, result)
+    return ModelReport(name, data_dir, load_seconds, memory_bytes, chars, seconds, report, pruned)
+
+
+def setting_name(setting):
+    """{'min_freq': 1, 'top_k': 20} -> 'min_freq-1_top_k-20'"""
+    return '_'.join('{}-{}'.format(key, setting[key]) for key in sorted(setting)) or 'original'
+
+
+def sweep(data_dir, out_dir, lines, settings, components=None, tags=True, **kwargs):
+    """
+    原模型和每组剪枝参数各生成一个报告, 剪枝模型写到out_dir下以参数命名的目录
+    @:param settings    [prune_model的参数dict, ...]
+    @:return [ModelReport, ...] 第一个为原模型
+    """
+    reference = pycseg.Pycseg(**kwargs)
+    reference.load(data_dir, components)
+    references = reference_results(reference, lines)
+    reports = [evaluate('original', data_dir, references, components, tags, **kwargs)]
+    for setting in settings:
+        name = setting_name(setting)
+        model_dir = os.path.join(out_dir, name)
+        pruned = prune_model(data_dir, model_dir, **setting)
+        reports.append(evaluate(name, model_dir, references, components, tags,
+                                pruned=pruned, **kwargs))
+    return reports
+
+
+def format_reports(reports, tags=True):
+    lines = ['{:<32}{:>10}{:>10}{:>10}{:>12}{:>10}{:>10}'.format(
+        'model', 'entries', 'load(s)', 'memory', 'chars/s', 'words', 'tags' if tags else '')]
+    for report in reports:
+        entries = sum(kept for kept, removed in report.pruned.values())
+        lines.append('{:<32}{:>10}{:>10.2f}{:>9.1f}M{:>12.0f}{:>10.4%}{:>10}'.format(
+            report.name, entries or '-', report.load_seconds,
+            report.memory_bytes / (1024 * 1024), report.chars_per_second,
+            report.golden.word_agreement,
+            '{:.4%}'.format(report.golden.tag_agreement) if tags else ''))
+    return '\n'.join(lines)
+
+
+def _int_list(text):
+    return [None if item == 'None' else int(item) for item in text.split(',') if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='prune low frequency dictionary entries and report the speed/accuracy trade-off')
+    parser.add_argument('corpus', help='UTF-8 text file, one document per line')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--output-dir', default='pruned',
+                        help='pruned models are written to sub directories')
+    parser.add_argument('--components', help='comma separated components to load')
+    parser.add_argument('--config', default='', help='Pycseg arguments, e.g. mode=seg')
+    parser.add_argument('--min-freq', default='1',
+                        help='comma separated minimum frequencies of coreDict.dct entries')
+    parser.add_argument('--bigram-min-freq', type=int,
+                        help='minimum bigram frequency, defaults to --min-freq')
+    parser.add_argument('--top-k', default='None',
+                        help='comma separated numbers of bigrams kept per word')
+    parser.add_argument('--lines', type=int, help='use the first LINES corpus lines')
+    parser.add_argument('--no-tags', action='store_true', help='compare words only')
+    args = parser.parse_args(argv)
+
+    settings = []
+    for min_freq in _int_list(args.min_freq):
+        for top_k in _int_list(args.top_k):
+            setting = {'min_freq': min_freq}
+            if args.bigram_min_freq is not None:
+                setting['bigram_min_freq'] = args.bigram_min_freq
+            if top_k is not None:
+                setting['top_k'] = top_k
+            settings.append(setting)
+
+    lines = []
+    with io.open(args.corpus, encoding='utf-8') as f:
+        for line in f:
+            if args.lines is not None and len(lines) >= args.lines:
+                break
+            if line.strip():
+                lines.append(line)
+    components = args.components.split(',') if args.components else None
+    reports = sweep(args.data_dir, args.output_dir, lines, settings, components,
+                    not args.no_tags, **golden.parse_config(args.config))
+    print(format_reports(reports, not args.no_tags))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
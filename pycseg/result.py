@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals, absolute_import
+
+from array import array
+
+from pycseg.data_store import Feature
+
+
+class SegResult(object):
+    """
+    列式分词结果
+    只保存原文、每个词在原文中的[start, end)字符偏移及词性编码,
+    偏移和词性存放在array中, 词的字符串在访问时才生成
+    """
+
+    def __init__(self, text='', starts=None, ends=None, tags=None):
+        self.text = text
+        self.starts = starts if starts is not None else array('l')
+        self.ends = ends if ends is not None else array('l')
+        self.tags = tags if tags is not None else array('l')
+
+    def __len__(self):
+        return len(self.tags)
+
+    def __getitem__(self, i):
+        """返回第i个词及词性编码 (word, tag_code)"""
+        return self.text[self.starts[i]:self.ends[i]], self.tags[i]
+
+    def __iter__(self):
+        text, starts, ends, tags = self.text, self.starts, self.ends, self.tags
+        for i in range(len(tags)):
+            yield text[starts[i]:ends[i]], tags[i]
+
+    def __repr__(self):
+        return '<SegResult {0} words>'.format(len(self))
+
+    def append(self, start, end, tag_code):
+        self.starts.append(start)
+        self.ends.append(end)
+        self.tags.append(tag_code)
+
+    def extend(self, begin, words, tags):
+        """
+        追加从原文begin处开始, 首尾相连的词
+        @:param words   词列表, 只用到词的长度
+        @:param tags    词性编码列表
+        """
+        starts, ends = self.starts, self.ends
+        for word in words:
+            starts.append(begin)
+            begin += len(word)
+            ends.append(begin)
+        self.tags.extend(tags)
+        return begin
+
+    def extend_spans(self, begin, atoms, spans, tags):
+        """
+        追加词图最优路径上的词, 只用到原子的长度, 不生成词的字符串
+        @:param begin   第一个词在原文中的位置
+        @:param atoms   句子的原子列表
+        @:param spans   每个词在atoms中的[left, right)区间, 首尾相连
+        @:param tags    词性编码列表
+        """
+        starts, ends = self.starts, self.ends
+        for left, right in spans:
+            starts.append(begin)
+            for i in range(left, right):
+                begin += len(atoms[i].content)
+            ends.append(begin)
+        self.tags.extend(tags)
+        return begin
+
+    def word(self, i):
+        return self.text[self.starts[i]:self.ends[i]]
+
+    def tag(self, i):
+        return Feature(tag_code=self.tags[i]).tag
+
+    def words(self):
+        text, starts, ends = self.text, self.starts, self.ends
+        for i in range(len(starts)):
+            yield text[starts[i]:ends[i]]
+
+    def offsets(self):
+        starts, ends = self.starts, self.ends
+        for i in range(len(starts)):
+            yield starts[i], ends[i]
+
+    def to_dict(self):
+        """转换为process()的返回格式 {'words': [...], 'tags': [...]}"""
+        return {'words': list(self.words()), 'tags': list(self.tags)}
+
+    def to_numpy(self):
+        """返回(starts, ends, tags)三个共享内存的numpy数组, 需要安装numpy"""
+        import numpy
+        return tuple(numpy.frombuffer(column, dtype=column.typecode)
+                     for column in (self.starts, self.ends, self.tags))
@@ -2,47 +2,116 @@
 
 from __future__ import division, unicode_literals, absolute_import
 
+import re
+import string
+
 import pycseg.definitions as definitions
 from pycseg.data_store import Feature, Atom, Word, WordsGraph, DataStore
 
 
+def _char_types():
+    """字符 -> 字符类型, 只包含ASCII字母、数字和分隔符, 其它字符都是CT_CHINESE"""
+    char_types = {}
+    for c in (definitions.SEPERATOR_C_SUB_SENTENCE + definitions.SEPERATOR_E_SUB_SENTENCE +
+              definitions.SEPERATOR_C_SENTENCE + definitions.SEPERATOR_E_SENTENCE):
+        char_types[c] = definitions.CT_DELIMITER
+    for c in string.digits:
+        char_types[c] = definitions.CT_NUM
+    for c in string.ascii_letters:
+        char_types[c] = definitions.CT_LETTER
+    return char_types
+
+
+CHAR_TYPES = _char_types()
+# 字符 -> 以该字符结尾的原子的Feature
+_ATOM_FEATURES = dict((c, Feature(tag_code=c_type)) for c, c_type in CHAR_TYPES.items())
+
+# 半角和全角数字
+_DIGIT = '[0-9０-９]'
+# 不含位数的中文数字, 如年份"二〇一六"
+_CN_DIGIT = '[〇零一二三四五六七八九]'
+# 年份需要4位数字, "五六年"、"20年"是时长
+_DATE = ('(?:{d}{{4}}|{c}(?:{c}|{d}){{3}})年(?:{month}(?:{day})?)?|{month}(?:{day})?'.format(
+    d=_DIGIT, c=_CN_DIGIT,
+    month='(?:{d}{{1,2}}|十[一二]?|[一二三四五六七八九])月'.format(d=_DIGIT),
+    day='(?:{d}{{1,2}}|[一二三]?十[一二三四五六七八九]?|[一二三四五六七八九])[日号]'.format(
+        d=_DIGIT)))
+_CLOCK = '{d}{{1,2}}(?:[:：]{d}{{2}}(?:[:：]{d}{{2}})?|[时点](?:{d}{{1,2}}分(?:{d}{{1,2}}秒)?)?)'.format(
+    d=_DIGIT)
+# 小数, 全角数字, 以及含位数或者至少三位的中文数字;
+# "千万"、"万一"、"一一"等常用词不以数字开头或者太短, 不作为数字
+_NUMBER = ('{d}+(?:[.．]{d}+)+|[０-９]+|'
+           '(?:[一二三四五六七八九两]?十|[一二三四五六七八九两][百千万亿])[〇零一二三四五六七八九十百千万亿]*|'
+           '{c}{{3,}}'.format(d=_DIGIT, c=_CN_DIGIT))
+
+# 原子: 连续的ASCII字母和数字, 或者单个字符
+ATOM_PATTERN = re.compile(r'[0-9A-Za-z]+|.', re.DOTALL)
+
+# 日期时间和数字, lastindex为1时是日期时间, 为2时是数字
+SPAN_PATTERN = re.compile('({}|{})|({})'.format(_DATE, _CLOCK, _NUMBER))
+
+# 原子或者SPAN_PATTERN区间的类型 -> 词典中没有匹配时使用的(词性, 别名)
+ATOM_ALIASES = {
+    definitions.CT_NUM: (Feature('m'), definitions.OOV_WORD_M),
+    definitions.CT_TIME: (Feature('t'), definitions.OOV_WORD_T),
+    definitions.CT_LETTER: (Feature('nx'), definitions.OOV_WORD_NX),
+}
+
+
 class Segment(object):
     """分词"""
 
-    def __init__(self, sentence, d_store=None):
+    def __init__(self, sentence, d_store=None, words_graph=None):
         self.sentence = sentence
         self.d_store = d_store
-        self.words_graph = WordsGraph()
+        self.words_graph = words_graph if words_graph is not None else WordsGraph()
 
     def get_words_graph(self):
         return self.words_graph
 
     def atom_segment(self):
-        """原子切分"""
-        prev_type, cur_type = definitions.CT_SENTENCE_BEGIN, 0
-        atom = definitions.SENTENCE_BEGIN
-        for c in self.sentence:
-            cur_type = self.char_type(c)
-            if (cur_type == definitions.CT_NUM or
-                        cur_type == definitions.CT_LETTER) and (
-                            prev_type == definitions.CT_NUM or
-                            prev_type == definitions.CT_LETTER):
-                atom = ''.join([atom, c])
-            else:
-                self.words_graph.append_atom(atom, Feature(tag_code=prev_type))
-                atom = c
-            prev_type = cur_type
-        # 最后一个atom
-        self.words_graph.append_atom(atom, Feature(tag_code=prev_type))
-        # SENTENCE_END
-        self.words_graph.append_atom(definitions.SENTENCE_END,
-                               Feature(tag_code=definitions.CT_SENTENCE_END))
+        """
+        原子切分: ATOM_PATTERN一次扫描整个句子, 原子为句子的切片
+        原子的类型为其最后一个字符的类型
+        """
+        append_atom = self.words_graph.append_atom
+        features = _ATOM_FEATURES
+        chinese = Feature(tag_code=definitions.CT_CHINESE)
+        append_atom(definitions.SENTENCE_BEGIN,
+                    Feature(tag_code=definitions.CT_SENTENCE_BEGIN))
+        for atom in ATOM_PATTERN.findall(self.sentence):
+            append_atom(atom, features.get(atom[-1], chinese))
+        append_atom(definitions.SENTENCE_END,
+                    Feature(tag_code=definitions.CT_SENTENCE_END))
+
+    def typed_spans(self):
+        """
+        句子中由多个原子组成的日期时间和数字, 两端都必须是原子的边界
+        @:return {左边界: (右边界, CT_TIME或CT_NUM), ...}
+        """
+        atoms = self.words_graph.get_atoms()
+        # 字符位置 -> 从该位置开始的原子的索引
+        starts, pos = {}, 0
+        for i in range(1, len(atoms) - 1):
+            starts[pos] = i
+            pos += len(atoms[i].content)
+        starts[pos] = len(atoms) - 1
+        spans = {}
+        for m in SPAN_PATTERN.finditer(self.sentence):
+            left, right = starts.get(m.start()), starts.get(m.end())
+            if left is not None and right is not None and right - left > 1:
+                spans[left] = (right, definitions.CT_TIME if m.lastindex == 1
+                               else definitions.CT_NUM)
+        return spans
 
     def word_match(self):
         """
         找出字典中所有匹配的词
+        日期时间和数字(typed_spans)另外作为一个词加入词图, 不改变原子切分,
+        包含这些区间的词典词(如"十五大"、"一五一十")仍然可以匹配
         """
         atoms = self.words_graph.get_atoms()
+        spans = self.typed_spans()
         # 处理开始标识符
         match = self.d_store.core_dct[definitions.SENTENCE_BEGIN]
         self.words_graph.generate_word(0, 1, Feature(tag_code=match[0][1]),
@@ -70,18 +139,16 @@ class Segment(object):
                                                    weight=weight
                                                    )
             else:
-                # 没有找到任何匹配
-                feature = None
-                if atoms[i].feature == definitions.CT_NUM:
-                    feature = Feature('m')
-                    alias = definitions.OOV_WORD_M
-                elif atoms[i].feature == definitions.CT_LETTER:
-                    feature = Feature('nx')
-                    alias = definitions.OOV_WORD_NX
-                else:
-                    pos, alias = 0, None
+                # 没有找到任何匹配, 数字、日期时间和字母串使用别名
+                feature, alias = ATOM_ALIASES.get(atoms[i].feature.tag_code, (None, None))
                 self.words_graph.generate_word(i, i + 1, feature, 0, alias)
                 # print('==match end===')
+            if i in spans:
+                right, c_type = spans[i]
+                # 词典中已有的词(如"十五")使用词典中的词频和词性
+                if self.words_graph.get_word(i, right) is None:
+                    feature, alias = ATOM_ALIASES[c_type]
+                    self.words_graph.generate_word(i, right, feature, 0, alias)
 
         # 处理结束标识符
         match = self.d_store.core_dct[definitions.SENTENCE_END]
@@ -89,22 +156,10 @@ class Segment(object):
                                        Feature(tag_code=match[0][1]),
                                        weight=match[0][0])
 
-    def char_type(self, c):
-        """返回汉字/字符类型"""
-        c_type = 0
-        c_str = c.encode('utf-8')
-        if c_str.isalpha():
-            c_type = definitions.CT_LETTER
-        elif c_str.isdigit():
-            c_type = definitions.CT_NUM
-        elif (c in definitions.SEPERATOR_C_SUB_SENTENCE or
-                      c in definitions.SEPERATOR_E_SUB_SENTENCE or
-                      c in definitions.SEPERATOR_C_SENTENCE or
-                      c in definitions.SEPERATOR_E_SENTENCE):
-            c_type = definitions.CT_DELIMITER
-        else:
-            c_type = definitions.CT_CHINESE
-        return c_type
+    @staticmethod
+    def char_type(c):
+        """返回汉字/字符类型, 参见CHAR_TYPES"""
+        return CHAR_TYPES.get(c, definitions.CT_CHINESE)
 
     def segment(self):
         self.atom_segment()
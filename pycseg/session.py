@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals, absolute_import
+
+from pycseg.data_store import WordsGraph
+from pycseg.segment import Segment
+from pycseg.oov_detection import OOVDetection
+from pycseg.pos_tagging import POSTagging
+from pycseg.utils import hmm
+
+
+class Session(object):
+    """
+    处理会话: 每个工作线程一个, 不是线程安全的
+    持有Segment、WordsGraph、OOVDetection、POSTagging以及HMM模型和viterbi表,
+    处理句子时只重置这些对象, 原子、词、词图的dict和viterbi表都在句子之间复用
+    """
+
+    def __init__(self):
+        self.words_graph = WordsGraph()
+        self.segment = Segment('', words_graph=self.words_graph)
+        self.oov_detection = OOVDetection(self.words_graph)
+        self.pos_tagging = POSTagging()
+
+        self.hmm_model = hmm.HMM()
+        self.viterbi_table = hmm.ViterbiTable()
+        self.oov_detection.hmm_model = self.hmm_model
+        self.oov_detection.viterbi_table = self.viterbi_table
+        self.pos_tagging.hmm_model = self.hmm_model
+        self.pos_tagging.viterbi_table = self.viterbi_table
+
+        self.sentences = 0
+
+    def start(self, sentence, d_store):
+        """
+        开始处理一个新句子, 重置词图
+        @:return 可以直接进行原子切分的Segment
+        """
+        self.words_graph.reset()
+        self.segment.sentence = sentence
+        self.segment.d_store = d_store
+        self.oov_detection.d_store = d_store
+        self.sentences += 1
+        return self.segment
+
+    def counters(self):
+        """
+        复用计数, 即避免的分配次数
+        objects: 每个句子复用的Segment/WordsGraph/AtomsDAG/WordsDAG/OOVDetection/POSTagging
+        atoms, words: 复用的Atom和Word对象
+        dicts: 复用的词图邻接dict
+        hmm_models: 复用的HMM模型
+        viterbi_rows: 复用的viterbi表行
+        """
+        words_graph = self.words_graph
+        return {
+            'sentences': self.sentences,
+            'objects': 6 * max(self.sentences - 1, 0),
+            'atoms': words_graph.atoms_reused,
+            'words': words_graph.words_reused,
+            'dicts': words_graph.words.reused + words_graph.words_dag.reused,
+            'hmm_models': self.hmm_model.reused,
+            'viterbi_rows': self.viterbi_table.reused,
+        }
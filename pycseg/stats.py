@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+"""
+处理过程的统计: 每个句子各阶段的耗时及词图大小
+
+    seg = pycseg.Pycseg()
+    stats = seg.add_observer(StageStats())
+    seg.process(content)
+    print(stats.format_summary())
+"""
+
+from __future__ import division, unicode_literals, absolute_import
+
+import collections
+import io
+import json
+import math
+import threading
+import time
+import timeit
+
+# 处理阶段, 按执行顺序
+STAGES = ('atom_segment', 'word_match', 'oov_detection',
+          'generate_words_dag', 'words_segment', 'pos_tagging')
+# 最大匹配引擎的处理阶段
+MAX_MATCH_STAGES = ('atom_segment', 'max_match', 'pos_tagging')
+
+timer = timeit.default_timer
+
+# 缓存名 -> CacheStats, 进程内所有Pycseg共用
+CACHE_STATS = collections.OrderedDict()
+
+
+class CacheStats(object):
+    """进程内查找缓存的命中/未命中次数, 由缓存的查找函数累加"""
+    __slots__ = ('hits', 'misses')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+
+def cache_stats(name):
+    """注册名为name的缓存, 返回它的CacheStats"""
+    return CACHE_STATS.setdefault(name, CacheStats())
+
+
+class SentenceTrace(object):
+    """一个句子的处理记录, 只在Pycseg有observer时生成"""
+    __slots__ = ('sentence', 'timings', 'atoms', 'vertices', 'edges',
+                 'paths', 'oov_words', 'oov_candidates', 'pool_hits', 'pool_misses', 'total',
+                 '_start', '_last', '_pool')
+
+    def __init__(self, sentence):
+        self.sentence = sentence
+        # [(stage, seconds), ...]
+        self.timings = []
+        # 原子数, 词图的顶点(词)数和边数, N-最短路径数
+        self.atoms = 0
+        self.vertices = 0
+        self.edges = 0
+        self.paths = 0
+        # 各类型未登录词个数 {'nr': n, 'tr': n, 'ns': n}
+        self.oov_words = {}
+        # 各类型匹配到模式的未登录词候选个数, 格式同oov_words
+        self.oov_candidates = {}
+        # Atom/Word对象池的命中和未命中次数
+        self.pool_hits = 0
+        self.pool_misses = 0
+        self._pool = None
+        self.total = 0
+        self._start = self._last = timer()
+
+    @property
+    def length(self):
+        return len(self.sentence)
+
+    def lap(self, stage):
+        """记录从上一阶段结束到现在的耗时"""
+        now = timer()
+        self.timings.append((stage, now - self._last))
+        self._last = now
+
+    @staticmethod
+    def _pool_counters(words_graph):
+        return (words_graph.atoms_reused + words_graph.words_reused,
+                words_graph.atoms_allocated + words_graph.words_allocated)
+
+    def watch_pool(self, words_graph):
+        """记录句子开始时对象池的计数"""
+        self._pool = self._pool_counters(words_graph)
+
+    def count_lattice(self, words_graph):
+        self.atoms = len(words_graph.atoms)
+        if self._pool is not None:
+            hits, misses = self._pool_counters(words_graph)
+            self.pool_hits = hits - self._pool[0]
+            self.pool_misses = misses - self._pool[1]
+        dag = words_graph.words_dag.dag
+        self.vertices = len(dag)
+        self.edges = sum(len(edges) for edges in dag.values())
+
+    def finish(self):
+        self.total = timer() - self._start
+
+    def to_dict(self):
+        return {
+            'sentence': self.sentence,
+            'length': self.length,
+            'atoms': self.atoms,
+            'vertices': self.vertices,
+            'edges': self.edges,
+            'paths': self.paths,
+            'oov_words': dict(self.oov_words),
+            'oov_candidates': dict(self.oov_candidates),
+            'pool_hits': self.pool_hits,
+            'pool_misses': self.pool_misses,
+            'total': self.total,
+            'timings': dict(self.timings),
+        }
+
+
+def percentile(sorted_values, p):
+    """最近秩法求百分位数, sorted_values需已排序"""
+    if not sorted_values:
+        return 0
+    rank = int(math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[max(rank, 1) - 1]
+
+
+class StageStats(object):
+    """
+    各阶段耗时及词图大小的统计, 作为Pycseg的observer使用
+    每个指标只保留最近max_samples个句子的样本
+    """
+
+    def __init__(self, max_samples=100000):
+        self.max_samples = max_samples
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.samples = collections.defaultdict(
+            lambda: collections.deque(maxlen=self.max_samples))
+
+    def __call__(self, trace):
+        self.record(trace)
+
+    def record(self, trace):
+        self.count += 1
+        samples = self.samples
+        for stage, seconds in trace.timings:
+            samples[stage].append(seconds)
+        samples['total'].append(trace.total)
+        samples['length'].append(trace.length)
+        samples['atoms'].append(trace.atoms)
+        samples['vertices'].append(trace.vertices)
+        samples['edges'].append(trace.edges)
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """
+        @:return {指标: {'count': n, 'mean': x, 'max': x, 'p50': x, ...}, ...}
+        耗时的单位为秒
+        """
+        result = {}
+        for name, values in self.samples.items():
+            values = sorted(values)
+            if not values:
+                continue
+            item = {'count': len(values),
+                    'mean': sum(values) / len(values),
+                    'max': values[-1]}
+            for p in percentiles:
+                item['p{}'.format(p)] = percentile(values, p)
+            result[name] = item
+        return result
+
+    def format_summary(self, percentiles=(50, 90, 99)):
+        """各阶段耗时(毫秒)的表格"""
+        summary = self.summary(percentiles)
+        columns = ['mean'] + ['p{}'.format(p) for p in percentiles] + ['max']
+        lines = ['{:<20}{:>8}'.format('stage', 'count') +
+                 ''.join('{:>10}'.format(c) for c in columns)]
+        stages = STAGES + tuple(s for s in MAX_MATCH_STAGES if s not in STAGES)
+        for stage in stages + ('total',):
+            if stage not in summary:
+                continue
+            item = summary[stage]
+            lines.append('{:<20}{:>8}'.format(stage, item['count']) +
+                         ''.join('{:>10.3f}'.format(item[c] * 1000) for c in columns))
+        return '\n'.join(lines)
+
+
+class SlowLog(object):
+    """
+    慢句子日志, 作为Pycseg的observer使用
+    耗时超过threshold秒的句子连同长度、原子数、词图大小、未登录词及其候选数和各阶段耗时
+    保存在最多capacity条的环形缓冲区中, 指定filename时同时以JSON Lines格式追加到文件
+    """
+
+    def __init__(self, threshold=0.1, capacity=100, filename=None):
+        self.threshold = threshold
+        self.filename = filename
+        self.entries = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def __call__(self, trace):
+        if trace.total >= self.threshold:
+            self.record(trace)
+
+    def record(self, trace):
+        entry = trace.to_dict()
+        entry['time'] = time.time()
+        with self._lock:
+            self.entries.append(entry)
+            if self.filename is not None:
+                with io.open(self.filename, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, sort_keys=True) + '\n')
+
+    def slowest(self, count=10):
+        """按耗时从大到小返回缓冲区中的记录"""
+        return sorted(self.entries, key=lambda entry: entry['total'],
+                      reverse=True)[:count]
+
+    def clear(self):
+        self.entries.clear()
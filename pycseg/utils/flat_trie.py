@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+"""Read-only trie stored in flat arrays.
+
+A FlatTrie holds no per-node python objects: node labels, child ranges and
+values live in a handful of array.array buffers. Lookups never touch the
+reference counts of shared objects, so after fork() the pages stay shared
+between processes, and the cyclic GC has nothing to traverse.
+"""
+
+import bisect
+from array import array
+from collections import deque
+
+try:
+    unichr
+except NameError:
+    unichr = chr
+
+
+class FlatTrie(object):
+    """
+    Nodes are numbered in breadth-first order; the children of node n are the
+    nodes first_child[n] .. first_child[n + 1] - 1, sorted by label, and
+    labels[i] is the code point of the edge into node i.
+
+    Each key stores a list of rows of `width` integers, the rows of node n
+    are value_offsets[n] .. value_offsets[n + 1] - 1 in the value columns.
+    """
+
+    def __init__(self, trie, width, encode, typecodes=None):
+        """
+        :param trie:   a trie.Trie whose keys are strings
+        :param width:  number of integers per value row
+        :param encode: function(value) -> list of rows (tuples of width ints)
+        :param typecodes: array typecode of each value column, 'i' by default;
+                          e.g. 'H' stores a column of small non-negative
+                          integers in 2 bytes per row
+        """
+        self.width = width
+        self.labels = array('I', [0])
+        self.first_child = array('i')
+        self.value_offsets = array('i')
+        self.columns = tuple(array(str(typecode)) for typecode in typecodes or 'i' * width)
+        self.size = 0
+
+        no_value = type(trie.root).no_value
+        queue = deque([trie.root])
+        next_index = 1
+        while queue:
+            node = queue.popleft()
+            self.first_child.append(next_index)
+            self.value_offsets.append(len(self.columns[0]) if width else 0)
+            for key in sorted(node.children):
+                self.labels.append(ord(key))
+                queue.append(node.children[key])
+                next_index += 1
+            if node.value is not no_value:
+                self.size += 1
+                for row in encode(node.value):
+                    for column, v in zip(self.columns, row):
+                        column.append(v)
+        self.first_child.append(next_index)
+        self.value_offsets.append(len(self.columns[0]) if width else 0)
+
+    def _child(self, n, c):
+        """Return the child of node n with label c, or -1"""
+        try:
+            code = ord(c)
+        except TypeError:
+            # multi-character atoms never match a single-character edge
+            return -1
+        lo, hi = self.first_child[n], self.first_child[n + 1]
+        i = bisect.bisect_left(self.labels, code, lo, hi)
+        if i < hi and self.labels[i] == code:
+            return i
+        return -1
+
+    def _getnode(self, k):
+        n = 0
+        for c in k:
+            n = self._child(n, c)
+            if n < 0:
+                return -1
+        return n
+
+    def _has_value(self, n):
+        return self.value_offsets[n] != self.value_offsets[n + 1]
+
+    def _rows(self, n):
+        start, end = self.value_offsets[n], self.value_offsets[n + 1]
+        columns = self.columns
+        if self.width == 1:
+            return list(columns[0][start:end])
+        return list(zip(*[column[start:end] for column in columns]))
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, k):
+        n = self._getnode(k)
+        return n >= 0 and self._has_value(n)
+
+    def has_prefix(self, k):
+        return self._getnode(k) >= 0
+
+    def longest_prefix(self, k):
+        max_length, n = 0, 0
+        for c in k:
+            n = self._child(n, c)
+            if n < 0:
+                break
+            max_length += 1
+        return max_length
+
+    def longest_key(self, k):
+        key_length, max_length, n = 0, 0, 0
+        for c in k:
+            n = self._child(n, c)
+            if n < 0:
+                break
+            max_length += 1
+            if self._has_value(n):
+                key_length = max_length
+        return key_length
+
+    def prefix_lengths(self, k):
+        lengths = []
+        length, n = 0, 0
+        for c in k:
+            n = self._child(n, c)
+            if n < 0:
+                break
+            length += 1
+            if self._has_value(n):
+                lengths.append(length)
+        return lengths
+
+    def _walk(self):
+        """Yield (key, node) for nodes with a value, in key order"""
+        stack = [(0, '')]
+        labels, first_child = self.labels, self.first_child
+        while stack:
+            n, key = stack.pop()
+            if n and self._has_value(n):
+                yield key, n
+            for i in range(first_child[n + 1] - 1, first_child[n] - 1, -1):
+                stack.append((i, key + unichr(labels[i])))
+
+    def __iter__(self):
+        for key, n in self._walk():
+            yield key
@@ -2,7 +2,7 @@
 """Implementation of hidden Markov model."""
 
 
-def viterbi(obs, states, start_p, trans_p, emit_p, default_prob=0):
+def viterbi(obs, states, start_p, trans_p, emit_p, default_prob=0, table=None):
     """
     Return the best path, given an HMM model and a sequence of observations
     The complexity of this algorithm is O(T * squr(|S|))
@@ -15,43 +15,45 @@ def viterbi(obs, states, start_p, trans_p, emit_p, default_prob=0):
     :param start_p:初始概率（隐状态）
     :param trans_p:转移概率（隐状态）
     :param emit_p: 发射概率 （隐状态表现为显状态的概率）
+    :param table: ViterbiTable, 复用上一次调用分配的概率表和回溯表
     :return:
     """
+    if table is None:
+        table = ViterbiTable()
     # 路径概率表 V[时间][隐状态] = 概率
-    V = [{}]
-    # 一个中间变量，代表当前状态是哪个隐状态
-    path = {}
+    # 回溯表 B[时间][隐状态] = 前一时刻的隐状态
+    V, B = table.rows(len(obs))
 
     # Initialize base cases (t == 0)
     for y in states:
         V[0][y] = start_p[y] * emit_p[y][obs[0]]
         # V[0][y] = start_p[y] * emit_p.get(y, {}).get(obs[0], default_prob)
-        path[y] = [y]
 
     # Run Viterbi for t > 0
     for t in range(1, len(obs)):
-        V.append({})
-        newpath = {}
-
+        prev_v, cur_v, cur_b = V[t - 1], V[t], B[t]
         for y in states:
             # (概率 隐状态) =  前状态是y0的概率 * y0转移到y的概率 * y表现为当前状态的概率
             # (V[t - 1][y0] * trans_p[y0][y] * emit_p.get(y, {}).get(obs[t], default_prob), y0)
+            emit = emit_p[y][obs[t]]
             (prob, state) = max(
-                (V[t - 1][y0] * trans_p[y0][y] * emit_p[y][obs[t]], y0)
+                (prev_v[y0] * trans_p[y0][y] * emit, y0)
                 for y0 in states)
             # 记录最大概率
-            V[t][y] = prob
+            cur_v[y] = prob
             # 记录路径
-            newpath[y] = path[state] + [y]
-
-        # Don't need to remember the old paths
-        path = newpath
+            cur_b[y] = state
 
     # __viterbi_print_dptable(V)
     # Return the most likely sequence over the given time frame
     n = len(obs) - 1
     (prob, state) = max((V[n][y], y) for y in states)
-    return prob, path[state]
+    path = [state]
+    for t in range(n, 0, -1):
+        state = B[t][state]
+        path.append(state)
+    path.reverse()
+    return prob, path
 
 
 def __viterbi_print_dptable(V):
@@ -64,6 +66,26 @@ def __viterbi_print_dptable(V):
     print(s)
 
 
+class ViterbiTable(object):
+    """
+    viterbi的概率表和回溯表
+    每个时刻一行, 行在多次调用之间复用, 表只增长不收缩
+    """
+
+    def __init__(self):
+        self.probs = []
+        self.backs = []
+        self.reused = 0
+
+    def rows(self, count):
+        """返回至少count行的(probs, backs)"""
+        self.reused += min(count, len(self.probs))
+        while len(self.probs) < count:
+            self.probs.append({})
+            self.backs.append({})
+        return self.probs, self.backs
+
+
 class HMM(object):
     """Implementation of hidden Markov model."""
     def __init__(self, states=None, observations=None,
@@ -80,6 +102,17 @@ class HMM(object):
         self.start_prob = start_prob if start_prob else {}
         self.transition_prob = transition_prob if transition_prob else {}
         self.emission_prob = emission_prob if emission_prob else {}
+        self.reused = 0
+
+    def reset(self, states=None, start_prob=None, transition_prob=None):
+        """清空观测序列和发射概率, 复用已分配的list和dict"""
+        self.states = states if states else []
+        self.start_prob = start_prob if start_prob else {}
+        self.transition_prob = transition_prob if transition_prob else {}
+        del self.observations[:]
+        for emit_state in self.emission_prob.values():
+            emit_state.clear()
+        self.reused += 1
 
     def add_state(self, state):
         self.states.append(state)
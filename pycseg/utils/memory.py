@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Deep memory size of python object graphs."""
+
+import sys
+import types
+
+# 不计入大小的类型: 类、模块、函数等全局共享的对象
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType,
+                  types.BuiltinFunctionType, types.MethodType)
+
+
+def _slot_names(cls, cache={}):
+    try:
+        return cache[cls]
+    except KeyError:
+        pass
+    names = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get('__slots__', ())
+        if not isinstance(slots, (list, tuple)):
+            slots = (slots,)
+        names.extend(name for name in slots
+                     if name not in ('__dict__', '__weakref__'))
+    cache[cls] = names
+    return names
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Return (bytes, objects) reachable from obj, each object counted once.
+    Follows dict keys/values, list/tuple/set items, instance __dict__ and
+    __slots__ attributes (e.g. TrieNode).
+
+    :param seen: set of object ids already counted, shared between calls to
+                 exclude objects that were counted before
+    """
+    if seen is None:
+        seen = set()
+    size, count = 0, 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, _SKIPPED_TYPES):
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        count += 1
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        if hasattr(o, '__dict__'):
+            stack.append(o.__dict__)
+        for name in _slot_names(type(o)):
+            if hasattr(o, name):
+                stack.append(getattr(o, name))
+    return size, count
@@ -17,10 +17,12 @@ class TrieNode(object):
 
     @property
     def key_path(self):
+        kpath = []
         n = self
-        kpath = [n.key for n in iter(lambda: n.parent, None) if n.key]
+        while n.parent is not None:
+            kpath.append(n.key)
+            n = n.parent
         kpath.reverse()
-        kpath.append(self.key)
         return ''.join(kpath)
 
     def walk(self):
@@ -180,3 +182,18 @@ class Trie(object):
             except KeyError:
                 break
         return key_length
+
+    def prefix_lengths(self, k):
+        """Return lengths of all keys that are prefixes of k, in ascending order"""
+        lengths = []
+        length = 0
+        n = self.root
+        for c in k:
+            try:
+                n = n.children[c]
+            except KeyError:
+                break
+            length += 1
+            if n.value is not TrieNode.no_value:
+                lengths.append(length)
+        return lengths
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""
+流式结果输出: 每次write()输出一个文档(一行文本)的结果, 缓冲区满时批量写入文件,
+不在内存中保存整个文件的格式化结果
+
+支持的格式:
+    text    词/词性 以空格分隔, 每个文档一行
+    tsv     每个词一行: 文档序号 词 词性
+    jsonl   每个文档一个JSON对象: {"words": [...], "tags": [...]}
+    conll   CoNLL-X格式, 每个词一行, 文档之间空一行
+"""
+
+from __future__ import unicode_literals, absolute_import
+
+import json
+
+from pycseg.data_store import Feature
+from pycseg.result import SegResult
+
+
+class TagTable(dict):
+    """词性编码到词性字符串的查找表, 预先生成所有单字母和双字母词性"""
+
+    def __init__(self):
+        super(TagTable, self).__init__()
+        letters = [ord(c) for c in 'abcdefghijklmnopqrstuvwxyz']
+        for first in letters:
+            self[first * 256] = Feature.decode(first * 256)
+            for second in letters:
+                self[first * 256 + second] = Feature.decode(first * 256 + second)
+
+    def __missing__(self, tag_code):
+        tag = self[tag_code] = Feature.decode(tag_code)
+        return tag
+
+
+TAG_TABLE = TagTable()
+
+
+class ResultWriter(object):
+    """输出格式基类, 子类实现write_tokens()"""
+
+    def __init__(self, output, buffer_size=65536):
+        """
+        @:param output  文本模式的文件对象
+        @:param buffer_size 缓冲的字符数, 超过后写入output
+        """
+        self.output = output
+        self.buffer_size = buffer_size
+        self.documents = 0
+        self._buffer = []
+        self._buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, result):
+        """输出一个文档的结果, result为process()返回的dict或SegResult"""
+        if isinstance(result, SegResult):
+            words, tags = list(result.words()), result.tags
+        else:
+            words, tags = result['words'], result['tags']
+        self.write_tokens(words, tags)
+        self.documents += 1
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def write_tokens(self, words, tags):
+        raise NotImplementedError
+
+    def _emit(self, text):
+        self._buffer.append(text)
+        self._buffered += len(text)
+
+    def flush(self):
+        if self._buffer:
+            self.output.write(''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+    def close(self):
+        self.flush()
+
+
+class WordTagWriter(ResultWriter):
+    """词/词性, 与Pycseg.format_result()格式相同"""
+
+    def write_tokens(self, words, tags):
+        tag_table = TAG_TABLE
+        self._emit(' '.join([w + '/' + tag_table[t] if t else w
+                             for w, t in zip(words, tags)]))
+        self._emit('\n')
+
+
+class TSVWriter(ResultWriter):
+    """文档序号\\t词\\t词性"""
+
+    def write_tokens(self, words, tags):
+        tag_table = TAG_TABLE
+        prefix = '{}\t'.format(self.documents)
+        self._emit(''.join([prefix + w + '\t' + (tag_table[t] if t else '') + '\n'
+                            for w, t in zip(words, tags)]))
+
+
+class JSONLinesWriter(ResultWriter):
+    """{"words": [...], "tags": [...]}, 没有词性的词tag为null"""
+
+    def write_tokens(self, words, tags):
+        tag_table = TAG_TABLE
+        self._emit(json.dumps({'words': list(words),
+                               'tags': [tag_table[t] if t else None for t in tags]},
+                              ensure_ascii=False))
+        self._emit('\n')
+
+
+class CoNLLWriter(ResultWriter):
+    """CoNLL-X: ID FORM LEMMA CPOSTAG POSTAG FEATS HEAD DEPREL PHEAD PDEPREL"""
+
+    def write_tokens(self, words, tags):
+        tag_table = TAG_TABLE
+        lines = []
+        for i, (w, t) in enumerate(zip(words, tags)):
+            tag = tag_table[t] if t else '_'
+            lines.append('{}\t{}\t_\t{}\t{}\t_\t_\t_\t_\t_\n'.format(i + 1, w, tag[0], tag))
+        lines.append('\n')
+        self._emit(''.join(lines))
+
+
+WRITERS = {
+    'text': WordTagWriter,
+    'tsv': TSVWriter,
+    'jsonl': JSONLinesWriter,
+    'conll': CoNLLWriter,
+}
+
+
+def get_writer(fmt, output, **kwargs):
+    """根据格式名创建ResultWriter"""
+    try:
+        writer_class = WRITERS[fmt]
+    except KeyError:
+        raise ValueError('unknown output format: {}'.format(fmt))
+    return writer_class(output, **kwargs)
@@ -3,12 +3,24 @@
 from __future__ import absolute_import, unicode_literals
 
 import sys
+import io
 import os
+import pickle
+import shutil
+import tempfile
+import threading
 import unittest
 
-from pycseg.data_store import Feature, Dictionary, BiDictionary, Context, DataStore
+import pycseg.segment
+import pycseg.data_store
+from pycseg.data_store import Feature, Atom, Word, Dictionary, BiDictionary, Context, DataStore
+from pycseg.data_store import FrozenDictionary, FrozenBiDictionary, ComponentNotReady
+from pycseg.data_store import LayeredDictionary, LayeredBiDictionary, TenantDataStore
+from pycseg.data_store import FrozenContext, QuantizedProbabilities
+from pycseg.utils import memory
 
 PYCSEG_DATA_DIR='pycseg'
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
 
 
 class DictionaryTestCase(unittest.TestCase):
@@ -76,5 +88,476 @@ class POSCodeTestCase(unittest.TestCase):
         print('{} = {}'.format(30058, Feature(tag_code=30058).tag))
 
 
+class FeatureFlyweightTestCase(unittest.TestCase):
+    def test_interned(self):
+        self.assertIs(Feature('nr'), Feature(tag_code=Feature.encode('nr')))
+        self.assertIs(Feature(), Feature(tag_code=0))
+        self.assertIs(pickle.loads(pickle.dumps(Feature('ns'), 2)), Feature('ns'))
+
+    def test_slots(self):
+        self.assertFalse(hasattr(Feature('nr'), '__dict__'))
+        self.assertFalse(hasattr(Atom('a'), '__dict__'))
+        self.assertFalse(hasattr(Word('a'), '__dict__'))
+
+
+class _DictFeature(Feature):
+    """带__dict__且不共享实例的Feature, 用于对比内存"""
+
+    def __new__(cls, tag=None, tag_code=None):
+        feature = object.__new__(cls)
+        feature.tag_code = tag_code if tag_code is not None else (
+            cls.encode(tag) if tag is not None else 0)
+        return feature
+
+
+class _DictAtom(Atom):
+    pass
+
+
+class _DictWord(Word):
+    pass
+
+
+class DataModelMemoryTestCase(unittest.TestCase):
+    """用memory.deep_sizeof测量词图中原子和词的内存占用"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.d_store = DataStore()
+        cls.d_store.load(DATA_DIR, ['core_dct'])
+        cls.sentences = ['张华平在北京说的确实在理。',
+                         '奥斯特洛夫斯基来到了北京天安门。',
+                         '2016年6月12日，ABC公司发布了123个产品。'] * 20
+
+    def _measure(self):
+        graphs = []
+        for sentence in self.sentences:
+            seg = pycseg.segment.Segment(sentence, d_store=self.d_store)
+            seg.atom_segment()
+            seg.word_match()
+            graphs.append(seg.get_words_graph())
+        # 原子列表和词的邻接dict, 以及其中的Atom、Word、Feature和字符串
+        size, count = memory.deep_sizeof([(graph.get_atoms(), graph.get_words().dag)
+                                           for graph in graphs])
+        return float(size) / len(self.sentences), float(count) / len(self.sentences)
+
+    def _swap(self, feature, atom, word):
+        pycseg.segment.Feature = feature
+        pycseg.data_store.Atom = atom
+        pycseg.data_store.Word = word
+
+    def test_memory_reduction(self):
+        self._swap(_DictFeature, _DictAtom, _DictWord)
+        try:
+            dict_size, dict_count = self._measure()
+        finally:
+            self._swap(Feature, Atom, Word)
+        slots_size, slots_count = self._measure()
+        print('per sentence: {:.0f} bytes/{:.0f} objects with __dict__, '
+              '{:.0f} bytes/{:.0f} objects with __slots__'.format(
+                  dict_size, dict_count, slots_size, slots_count))
+        self.assertLess(slots_size, dict_size * 0.5)
+        self.assertLess(slots_count, dict_count)
+
+
+class DictionaryBulkLoadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, 'test.dct')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def load(self, lines):
+        with io.open(self.filename, 'w', encoding='utf-8') as f:
+            f.write(''.join(line + '\n' for line in lines))
+        return Dictionary(self.filename)
+
+    def test_unsorted(self):
+        d = self.load(['北京大学 10 1', '北京 20 2', '北 5 3', '北京 7 4', '南京 3 2',
+                       '北京市 1 2', 'invalid line', '', '北京大学 2 3'])
+        self.assertListEqual(list(d.iteritems()), [
+            ('北', [(5, 3)]),
+            ('北京', [(20, 2), (7, 4)]),
+            ('北京大学', [(10, 1), (2, 3)]),
+            ('北京市', [(1, 2)]),
+            ('南京', [(3, 2)]),
+        ])
+        self.assertListEqual([node.key_path for node in d.root.walk()],
+                             [word for word, value in d.iteritems()])
+
+    def test_same_as_setdefault(self):
+        lines = [line.strip() for line in io.open(os.path.join(DATA_DIR, 'ns.dct'),
+                                                  encoding='utf-8')]
+        d = self.load(lines)
+        expected = Dictionary()
+        for line in lines:
+            items = line.split()
+            if len(items) == 3:
+                expected.setdefault(items[0], []).append((int(items[1]), int(items[2])))
+        self.assertListEqual(list(d.iteritems()), list(expected.iteritems()))
+
+
+class DataStoreLazyLoadTestCase(unittest.TestCase):
+    def test_lazy(self):
+        d_store = DataStore(DATA_DIR, lazy=True)
+        self.assertSetEqual(set(d_store.component_status().values()),
+                            {DataStore.STATUS_PENDING})
+        self.assertListEqual(d_store.resident_components, [])
+        self.assertGreater(len(d_store.ns_ctx.states), 0)
+        self.assertEqual(d_store.component_status()['ns_ctx'], DataStore.STATUS_LOADED)
+        self.assertListEqual(d_store.resident_components, ['ns_ctx'])
+        self.assertRaises(AttributeError, getattr, d_store, 'unknown')
+
+    def test_missing_optional(self):
+        d_store = DataStore()
+        d_store.load(DATA_DIR, ['bigram_dct', 'tr_ctx'])
+        self.assertEqual(len(d_store.bigram_dct), 0)
+        status = d_store.component_status()
+        self.assertEqual(status['bigram_dct'], DataStore.STATUS_MISSING)
+        self.assertEqual(status['tr_ctx'], DataStore.STATUS_LOADED)
+        self.assertEqual(status['core_dct'], DataStore.STATUS_EMPTY)
+        # 没有延迟加载时未加载的组件为空组件
+        self.assertIsNone(d_store.core_dct.get('北京'))
+
+    def test_missing_required(self):
+        d_store = DataStore(os.path.join(DATA_DIR, 'missing'), lazy=True)
+        self.assertRaises(IOError, getattr, d_store, 'core_dct')
+
+
+class _BlockedComponent(object):
+    """load()一直等待到released置位, 用于测试后台加载"""
+    released = threading.Event()
+
+    def load(self, filename):
+        self.released.wait()
+        return True
+
+
+class _BlockedDataStore(DataStore):
+    COMPONENTS = DataStore.COMPONENTS + (('blocked', 'blocked.dct', _BlockedComponent),)
+
+
+class DataStoreAsyncLoadTestCase(unittest.TestCase):
+    def setUp(self):
+        _BlockedComponent.released.clear()
+
+    def tearDown(self):
+        _BlockedComponent.released.set()
+
+    def test_load_async(self):
+        d_store = DataStore()
+        future = d_store.load_async(DATA_DIR, ['ns_dct', 'ns_ctx'])
+        self.assertIs(future.result(), d_store)
+        self.assertTrue(future.ready())
+        status = d_store.component_status()
+        self.assertEqual(status['ns_dct'], DataStore.STATUS_LOADED)
+        self.assertEqual(status['ns_ctx'], DataStore.STATUS_LOADED)
+        self.assertEqual(status['nr_dct'], DataStore.STATUS_EMPTY)
+        self.assertGreater(len(list(d_store.ns_dct.iteritems())), 0)
+
+    def test_failed(self):
+        d_store = DataStore()
+        future = d_store.load_async(os.path.join(DATA_DIR, 'missing'), ['ns_dct'])
+        self.assertRaises(IOError, future.result)
+        self.assertTrue(future.done())
+        self.assertFalse(future.ready())
+        self.assertEqual(d_store.component_status()['ns_dct'], DataStore.STATUS_FAILED)
+        self.assertRaises(IOError, getattr, d_store, 'ns_dct')
+
+    def test_fail_fast(self):
+        d_store = _BlockedDataStore()
+        future = d_store.load_async(DATA_DIR, ['ns_ctx', 'blocked'], block=False)
+        self.assertTrue(future.wait(['ns_ctx'], timeout=10))
+        self.assertTrue(future.ready(['ns_ctx']))
+        self.assertFalse(future.wait(timeout=0.01))
+        self.assertRaises(ComponentNotReady, future.result, 0.01)
+        self.assertEqual(d_store.component_status()['blocked'], DataStore.STATUS_LOADING)
+        self.assertRaises(ComponentNotReady, getattr, d_store, 'blocked')
+        _BlockedComponent.released.set()
+        future.result()
+        self.assertIsInstance(d_store.blocked, _BlockedComponent)
+
+    def test_block(self):
+        d_store = _BlockedDataStore()
+        future = d_store.load_async(DATA_DIR, ['blocked'])
+        timer = threading.Timer(0.05, _BlockedComponent.released.set)
+        timer.start()
+        self.assertIsInstance(d_store.blocked, _BlockedComponent)
+        self.assertTrue(future.ready())
+        timer.join()
+
+
+class FrozenDictionaryTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dct = Dictionary(os.path.join(DATA_DIR, 'ns.dct'))
+        cls.frozen = FrozenDictionary(cls.dct)
+
+    def test_items(self):
+        self.assertListEqual(list(self.frozen.iteritems()), list(self.dct.iteritems()))
+        self.assertEqual(len(self.frozen), len(list(self.dct)))
+
+    def test_lookup(self):
+        for word in ['北京', '中国', '天安门', '未##地', '不存在的词', '北']:
+            self.assertEqual(self.frozen.get(word), self.dct.get(word))
+            self.assertEqual(word in self.frozen, word in self.dct)
+            self.assertEqual(self.frozen.get_frequence(word, 1), self.dct.get_frequence(word, 1))
+        self.assertRaises(KeyError, self.frozen.__getitem__, '不存在的词')
+
+    def test_matches(self):
+        for sentence in ['北京天安门', '中华人民共和国', 'ABC北京']:
+            atoms = list(sentence)
+            self.assertListEqual(self.frozen.matches(atoms), self.dct.matches(atoms))
+            self.assertEqual(self.frozen.longest_key(atoms), self.dct.longest_key(atoms))
+            self.assertListEqual(self.frozen.prefix_lengths(atoms), self.dct.prefix_lengths(atoms))
+        # 多字符原子不会匹配
+        self.assertListEqual(self.frozen.matches(['2016', '年']), [])
+
+    def test_columns(self):
+        self.assertListEqual([column.typecode for column in self.frozen.columns], ['i', 'H'])
+
+    def test_bigram(self):
+        bigrams = BiDictionary()
+        bigrams['北京@天安门'] = 3
+        bigrams['北京@大学'] = 5
+        frozen = FrozenBiDictionary(bigrams)
+        self.assertEqual(frozen['北京@大学'], 5)
+        self.assertEqual(frozen.get('北京@天安门', 0), 3)
+        self.assertEqual(frozen.get('北京@', 0), 0)
+        self.assertEqual(len(frozen), 2)
+
+    def test_freeze(self):
+        d_store = DataStore()
+        d_store.load(DATA_DIR, ['ns_dct', 'ns_ctx', 'bigram_dct'])
+        d_store.freeze()
+        self.assertTrue(d_store.frozen)
+        self.assertIsInstance(d_store.ns_dct, FrozenDictionary)
+        self.assertIsInstance(d_store.bigram_dct, FrozenBiDictionary)
+        self.assertIsInstance(d_store.ns_ctx, Context)
+
+
+class LayeredDictionaryTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dct = Dictionary(os.path.join(DATA_DIR, 'ns.dct'))
+        cls.frozen = FrozenDictionary(cls.dct)
+
+    def check(self, base):
+        layered = LayeredDictionary(base)
+        layered.add_word('安徽大学', 50, Feature.encode('nt'))
+        layered.add_word('安徽', 7)
+        self.assertTrue(layered.remove_word('安达'))
+        self.assertFalse(layered.remove_word('不存在的词'))
+        # 基础词典不变
+        self.assertEqual(base.get('安徽'), [(1, 11)])
+        self.assertIn('安达', base)
+
+        self.assertEqual(layered.get('安徽'), [(7, 0)])
+        self.assertEqual(layered['安徽大学'], [(50, Feature.encode('nt'))])
+        self.assertEqual(layered.get('安徽省'), [(1, 11)])
+        self.assertNotIn('安达', layered)
+        self.assertIsNone(layered.get('安达'))
+        self.assertRaises(KeyError, layered.__getitem__, '安达')
+        self.assertEqual(layered.get_frequence('安徽'), 7)
+
+        atoms = list('安徽大学在安达')
+        self.assertListEqual(layered.matches(atoms), [
+            ('安', [(3, 1), (4, 2), (1, 3)]), ('安徽', [(7, 0)]),
+            ('安徽大学', [(50, Feature.encode('nt'))])])
+        self.assertEqual(layered.longest_key(atoms), 4)
+        self.assertListEqual(layered.prefix_lengths(atoms), [1, 2, 4])
+        self.assertListEqual(layered.matches(list('安达')), [('安', [(3, 1), (4, 2), (1, 3)])])
+
+        items = dict(base.iteritems())
+        items['安徽'] = [(7, 0)]
+        items['安徽大学'] = [(50, Feature.encode('nt'))]
+        del items['安达']
+        self.assertListEqual(list(layered.iteritems()), sorted(items.items()))
+
+        # 删除之后重新添加
+        layered.add_word('安达', 2)
+        self.assertEqual(layered.get('安达'), [(2, 0)])
+        # 只在覆盖层中的词直接删除
+        self.assertTrue(layered.remove_word('安徽大学'))
+        self.assertNotIn('安徽大学', layered.overlay)
+        self.assertListEqual(list(layered.overlay), ['安徽', '安达'])
+
+    def test_dictionary(self):
+        self.check(self.dct)
+
+    def test_frozen(self):
+        self.check(self.frozen)
+
+    def test_overlays(self):
+        lower = Dictionary()
+        lower['安徽'] = [(9, 0)]
+        lower['安徽大学'] = [(5, 0)]
+        layered = LayeredDictionary(self.dct, [Dictionary(), lower])
+        self.assertEqual(layered.get('安徽'), [(9, 0)])
+        layered.remove_word('安徽大学')
+        self.assertNotIn('安徽大学', layered)
+        self.assertIn('安徽大学', lower)
+
+    def test_data_store(self):
+        d_store = DataStore()
+        d_store.load(DATA_DIR, ['ns_ctx'])
+        d_store.core_dct = Dictionary(os.path.join(DATA_DIR, 'ns.dct'))
+        user_dct = d_store.user_dictionary()
+        self.assertIs(d_store.user_dictionary(), user_dct)
+        self.assertIs(d_store.core_dct, user_dct)
+        user_dct.add_word('安徽大学', 50)
+        d_store.freeze()
+        self.assertIs(d_store.core_dct, user_dct)
+        self.assertIsInstance(user_dct.base, FrozenDictionary)
+        self.assertEqual(user_dct.get('安徽大学'), [(50, 0)])
+        self.assertEqual(user_dct.get('安徽'), [(1, 11)])
+
+
+class TenantDataStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.d_store = DataStore()
+        self.d_store.load(DATA_DIR, ['ns_ctx', 'bigram_dct'])
+        self.d_store.core_dct = Dictionary(os.path.join(DATA_DIR, 'ns.dct'))
+
+    def test_layered_bigram(self):
+        base = BiDictionary()
+        base['北京@天安门'] = 3
+        layered = LayeredBiDictionary(FrozenBiDictionary(base))
+        layered.add('北京@大学', 5)
+        self.assertEqual(layered.get('北京@大学', 0), 5)
+        self.assertEqual(layered['北京@天安门'], 3)
+        self.assertTrue(layered.remove('北京@天安门'))
+        self.assertFalse(layered.remove('北京@天安门'))
+        self.assertEqual(layered.get('北京@天安门', 0), 0)
+        self.assertNotIn('北京@天安门', layered)
+        self.assertEqual(base['北京@天安门'], 3)
+
+    def test_tenants(self):
+        a = self.d_store.tenant('a')
+        b = self.d_store.tenant('b')
+        self.assertIsInstance(a, TenantDataStore)
+        self.assertIs(self.d_store.tenant('a'), a)
+        self.assertListEqual(self.d_store.tenants, ['a', 'b'])
+        a.user_dictionary().add_word('安徽大学', 50)
+        b.user_dictionary().remove_word('安徽')
+        a.bigram_dictionary().add('安徽@大学', 3)
+
+        self.assertEqual(a.core_dct.get('安徽大学'), [(50, 0)])
+        self.assertEqual(a.core_dct.get('安徽'), [(1, 11)])
+        self.assertIsNone(b.core_dct.get('安徽大学'))
+        self.assertIsNone(b.core_dct.get('安徽'))
+        self.assertIsNone(self.d_store.core_dct.get('安徽大学'))
+        self.assertEqual(a.bigram_dct.get('安徽@大学', 0), 3)
+        self.assertEqual(b.bigram_dct.get('安徽@大学', 0), 0)
+        # 其它组件与共享DataStore相同
+        self.assertIs(a.ns_ctx, self.d_store.ns_ctx)
+        # 没有复制共享词典
+        self.assertIs(a.core_dct.base, self.d_store.core_dct)
+
+        self.assertTrue(self.d_store.remove_tenant('b'))
+        self.assertFalse(self.d_store.remove_tenant('b'))
+        self.assertListEqual(self.d_store.tenants, ['a'])
+
+    def test_refresh(self):
+        a = self.d_store.tenant('a')
+        a.user_dictionary().add_word('安徽大学', 50)
+        core_dct = a.core_dct
+        self.assertIs(self.d_store.tenant('a').core_dct, core_dct)
+        # 共享的用户词典位于租户增量层之下
+        self.d_store.user_dictionary().add_word('安徽大学', 10)
+        self.d_store.user_dictionary().add_word('安徽师范大学', 10)
+        a = self.d_store.tenant('a')
+        self.assertIsNot(a.core_dct, core_dct)
+        self.assertEqual(a.core_dct.get('安徽大学'), [(50, 0)])
+        self.assertEqual(a.core_dct.get('安徽师范大学'), [(10, 0)])
+        self.d_store.freeze()
+        a = self.d_store.tenant('a')
+        self.assertIsInstance(a.core_dct.base, FrozenDictionary)
+        self.assertIsInstance(a.bigram_dct.base, FrozenBiDictionary)
+        self.assertEqual(a.core_dct.get('安徽大学'), [(50, 0)])
+        self.assertEqual(a.core_dct.get('安徽'), [(1, 11)])
+
+
+class FrozenContextTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.ctx = Context(os.path.join(DATA_DIR, 'lexical.ctx'))
+
+    def check(self, precision, tolerance):
+        frozen = FrozenContext(self.ctx, precision)
+        self.assertListEqual(frozen.states, self.ctx.states)
+        self.assertEqual(frozen.total_freq, self.ctx.total_freq)
+        for state in self.ctx.states:
+            self.assertAlmostEqual(frozen.start_prob[state] / float(self.ctx.start_prob[state]), 1,
+                                   delta=tolerance)
+            row, expected = frozen.transition_prob[state], self.ctx.transition_prob[state]
+            self.assertSetEqual(set(row), set(expected))
+            for next_state, prob in expected.items():
+                if prob == 0:
+                    self.assertEqual(row[next_state], 0)
+                else:
+                    self.assertAlmostEqual(row[next_state] / float(prob), 1, delta=tolerance)
+        self.assertEqual(frozen.prob_to_frequence(1), self.ctx.prob_to_frequence(1))
+        return frozen
+
+    def test_float32(self):
+        frozen = self.check(QuantizedProbabilities.FLOAT32, 1e-6)
+        self.assertEqual(frozen.start_prob.values.typecode, 'f')
+
+    def test_fixed16(self):
+        frozen = self.check(QuantizedProbabilities.FIXED16,
+                            1.0 / QuantizedProbabilities.FIXED_SCALE)
+        self.assertEqual(frozen.start_prob.values.typecode, 'H')
+
+    def test_memory(self):
+        size = memory.deep_sizeof(self.ctx)[0]
+        for precision in QuantizedProbabilities.PRECISIONS:
+            self.assertLess(memory.deep_sizeof(FrozenContext(self.ctx, precision))[0], size / 2)
+
+    def test_freeze(self):
+        d_store = DataStore()
+        d_store.load(DATA_DIR, ['ns_ctx', 'ns_dct'])
+        self.assertRaises(ValueError, d_store.freeze, 'float16')
+        d_store.freeze(QuantizedProbabilities.FIXED16)
+        self.assertIsInstance(d_store.ns_ctx, FrozenContext)
+        self.assertIsInstance(d_store.ns_dct, FrozenDictionary)
+        # 未加载的组件不会被加载
+        self.assertNotIn('nr_ctx', d_store.resident_components)
+
+
+class DataStoreMemoryReportTestCase(unittest.TestCase):
+    def test_deep_sizeof(self):
+        t = Dictionary()
+        t['北京'] = [(10, 1)]
+        size, count = memory.deep_sizeof(t)
+        # Dictionary及其__dict__, 根节点和两个TrieNode及各自的children dict, 键和值
+        self.assertGreater(count, 10)
+        self.assertGreater(size, sys.getsizeof(t))
+        t['北京大学'] = [(1, 1)]
+        self.assertGreater(memory.deep_sizeof(t)[1], count)
+
+    def test_load_component(self):
+        d_store = DataStore()
+        d_store.load_component(DATA_DIR, 'ns_ctx')
+        self.assertSetEqual(d_store.loaded_components, {'ns_ctx'})
+        self.assertGreater(len(d_store.ns_ctx.states), 0)
+        self.assertRaises(ValueError, d_store.load_component, DATA_DIR, 'unknown')
+
+    def test_memory_report(self):
+        d_store = DataStore()
+        empty = d_store.memory_report()
+        d_store.load_component(DATA_DIR, 'ns_dct')
+        report = d_store.memory_report()
+        self.assertTrue(report['ns_dct']['loaded'])
+        self.assertFalse(report['core_dct']['loaded'])
+        self.assertEqual(report['core_dct']['status'], DataStore.STATUS_EMPTY)
+        self.assertGreater(report['ns_dct']['objects'], 1000)
+        self.assertGreater(report['ns_dct']['bytes'], empty['ns_dct']['bytes'] * 100)
+        self.assertEqual(report['core_dct']['bytes'], empty['core_dct']['bytes'])
+        self.assertEqual(report['total']['bytes'],
+                         sum(report[name]['bytes'] for name, _, _ in DataStore.COMPONENTS))
+
+
 if __name__ == '__main__':
     unittest.main()
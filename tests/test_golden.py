@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import os
+import unittest
+
+import pycseg
+import pycseg.definitions as definitions
+from pycseg import golden
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+# 发布的data目录中没有二元词典bigramDict.dct
+COMPONENTS = ('core_dct', 'lexical_ctx', 'nr_dct', 'nr_ctx',
+              'ns_dct', 'ns_ctx', 'tr_dct', 'tr_ctx')
+LINES = ['奥斯特洛夫斯基来到了北京天安门。张华平说的确实在理。',
+         '北京天安门。']
+
+
+class GoldenTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.reference = pycseg.Pycseg()
+        cls.reference.load(DATA_DIR, COMPONENTS)
+        cls.candidate = pycseg.Pycseg(engine=definitions.ENGINE_FMM)
+        cls.candidate.load(DATA_DIR)
+
+    def test_word_spans(self):
+        self.assertSetEqual(golden.word_spans(['北京', '天安门'], [1, 2]),
+                            {(0, 2, 1), (2, 5, 2)})
+
+    def test_identical(self):
+        report = golden.compare(self.reference, self.reference, LINES)
+        self.assertEqual(report.sentences, 3)
+        self.assertEqual(report.sentences_differ, 0)
+        self.assertEqual(report.tag_agreement, 1.0)
+        self.assertTrue(report.passed())
+        self.assertListEqual(report.diffs, [])
+
+    def test_differ(self):
+        report = golden.compare(self.reference, self.candidate, LINES)
+        self.assertEqual(report.sentences, 3)
+        self.assertEqual(report.sentences_differ, 2)
+        self.assertLess(report.word_agreement, 1.0)
+        self.assertGreater(report.word_agreement, 0.5)
+        self.assertFalse(report.passed())
+        self.assertTrue(report.passed(token_tolerance=0.5))
+        self.assertFalse(report.passed(token_tolerance=0.5, sentence_tolerance=0.5))
+        self.assertEqual(report.diffs[0].sentence, '奥斯特洛夫斯基来到了北京天安门。')
+        self.assertIn('张华平', report.format())
+
+    def test_max_diffs(self):
+        report = golden.compare(self.reference, self.candidate, LINES, max_diffs=1)
+        self.assertEqual(report.sentences_differ, 2)
+        self.assertEqual(len(report.diffs), 1)
+
+    def test_parse_config(self):
+        self.assertDictEqual(golden.parse_config('mode=seg,engine=fmm,max_sentence_length=50'),
+                             {'mode': 'seg', 'engine': 'fmm', 'max_sentence_length': 50})
+        self.assertDictEqual(golden.parse_config(''), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
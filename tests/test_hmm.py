@@ -29,6 +29,19 @@ class HMMTestCase(unittest.TestCase):
         self.assertEqual(prob, 0.01512)
         self.assertListEqual(path, ['Healthy', 'Healthy', 'Fever'])
 
+    def test_viterbi_table(self):
+        table = hmm.ViterbiTable()
+        for i in range(2):
+            prob, path = hmm.viterbi(self.observations,
+                                     self.states,
+                                     self.start_probability,
+                                     self.transition_probability,
+                                     self.emission_probability,
+                                     table=table)
+            self.assertEqual(prob, 0.01512)
+            self.assertListEqual(path, ['Healthy', 'Healthy', 'Fever'])
+        self.assertEqual(table.reused, 3)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import unittest
+
+from pycseg import max_match
+from pycseg.utils import trie
+
+
+class MaxMatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.t = trie.Trie(mapping={'abcd': 1, 'ef': 1, 'cdef': 1, 'a': 1,
+                                    'ab': 1, 'cde': 1})
+
+    def test_forward(self):
+        self.assertListEqual(max_match.forward_max_match(list('abcdef'), self.t),
+                             [(0, 4), (4, 6)])
+        self.assertListEqual(max_match.forward_max_match(list('abcdex'), self.t),
+                             [(0, 4), (4, 5), (5, 6)])
+
+    def test_backward(self):
+        self.assertListEqual(max_match.backward_max_match(list('abcdef'), self.t),
+                             [(0, 2), (2, 6)])
+        self.assertListEqual(max_match.backward_max_match(list('abcdex'), self.t),
+                             [(0, 2), (2, 5), (5, 6)])
+        self.assertListEqual(max_match.backward_max_match([], self.t), [])
+
+    def test_bidirectional(self):
+        # 词数相同时单字词少的优先
+        self.assertListEqual(max_match.bidirectional_max_match(list('abcdex'), self.t),
+                             [(0, 2), (2, 5), (5, 6)])
+        # 词数少的优先
+        del self.t['ab']
+        self.assertListEqual(max_match.backward_max_match(list('abcdef'), self.t),
+                             [(0, 1), (1, 2), (2, 6)])
+        self.assertListEqual(max_match.bidirectional_max_match(list('abcdef'), self.t),
+                             [(0, 4), (4, 6)])
+
+    def test_unknown_direction(self):
+        self.assertRaises(ValueError, max_match.MaxMatch, None, 'sideways')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from urllib.request import urlopen
+except ImportError:
+    from urllib2 import urlopen
+
+import pycseg
+from pycseg import metrics
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+COMPONENTS = ('core_dct', 'lexical_ctx', 'nr_dct', 'nr_ctx',
+              'ns_dct', 'ns_ctx', 'tr_dct', 'tr_ctx')
+
+
+class MetricsRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.registry = metrics.MetricsRegistry()
+
+    def test_counter(self):
+        counter = self.registry.counter('words_total', 'Words.', ('type',))
+        counter.inc(type='nr')
+        counter.inc(2, type='nr')
+        self.assertEqual(counter.get(type='nr'), 3)
+        self.assertRaises(ValueError, counter.inc, 1)
+        self.assertIn('words_total{type="nr"} 3', self.registry.render())
+
+    def test_histogram(self):
+        histogram = self.registry.histogram('size', 'Size.', (10, 100))
+        for value in (5, 50, 500):
+            histogram.observe(value)
+        text = self.registry.render()
+        self.assertIn('# TYPE size histogram', text)
+        self.assertIn('size_bucket{le="10"} 1', text)
+        self.assertIn('size_bucket{le="100"} 2', text)
+        self.assertIn('size_bucket{le="+Inf"} 3', text)
+        self.assertIn('size_sum 555', text)
+
+    def test_duplicated(self):
+        self.registry.gauge('value', 'Value.')
+        self.assertRaises(ValueError, self.registry.gauge, 'value', 'Value.')
+
+    def test_write_prometheus(self):
+        self.registry.gauge('value', 'Value.', lambda: 42)
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmp_dir, 'pycseg.prom')
+            self.registry.write_prometheus(filename)
+            with open(filename) as f:
+                self.assertIn('value 42', f.read())
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_serve(self):
+        self.registry.gauge('value', 'Value.', lambda: 7)
+        server = self.registry.serve(0)
+        try:
+            response = urlopen('http://127.0.0.1:{}/metrics'.format(server.server_address[1]))
+            self.assertIn('value 7', response.read().decode('utf-8'))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class EngineMetricsTestCase(unittest.TestCase):
+    def test_engine_metrics(self):
+        seg = pycseg.Pycseg()
+        seg.load(DATA_DIR, COMPONENTS)
+        registry = seg.enable_metrics()
+        self.assertIs(seg.enable_metrics(registry), registry)
+        self.assertEqual(len(seg.observers), 1)
+
+        content = '奥斯特洛夫斯基来到了北京天安门。张华平说的确实在理。'
+        seg.process(content)
+        seg.process(content)
+        engine = registry.engine_metrics
+        self.assertEqual(engine.sentences.get(), 4)
+        self.assertEqual(engine.chars.get(), 2 * len(content))
+        self.assertGreater(engine.oov_words.get(type='nr'), 0)
+        self.assertEqual(engine.paths.get(), 4)
+        self.assertGreater(engine.pool.get(result='reused'), 0)
+        self.assertGreater(engine.cache.get(cache='feature', result='hit'), 0)
+        self.assertGreater(engine.cache.get(cache='split_pattern', result='hit'), 0)
+        self.assertEqual(engine.vertices.count, 4)
+
+        text = registry.render()
+        self.assertIn('pycseg_sentences_total 4', text)
+        self.assertIn('pycseg_stage_seconds_total{stage="pos_tagging"}', text)
+        self.assertIn('pycseg_chars_per_second', text)
+        self.assertIn('pycseg_cache_requests_total{cache="feature",result="miss"}', text)
+        self.assertNotIn('hit_ratio', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
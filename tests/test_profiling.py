@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import io
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+
+import pycseg
+from pycseg import profiling
+from pycseg.__main__ import main
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+# 发布的data目录中没有二元词典bigramDict.dct
+COMPONENTS = ('core_dct', 'lexical_ctx', 'nr_dct', 'nr_ctx',
+              'ns_dct', 'ns_ctx', 'tr_dct', 'tr_ctx')
+LINES = ['奥斯特洛夫斯基来到了北京天安门。张华平说的确实在理。'] * 5
+
+
+class ProfilingTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.seg = pycseg.Pycseg()
+        cls.seg.load(DATA_DIR, COMPONENTS)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_cprofile(self):
+        report = self.seg.profile(LINES)
+        for stage in ('atom_segment', 'word_match', 'oov_detection', 'pos_tagging'):
+            self.assertGreater(report.stages[stage], 0)
+        label, seconds, stages = report.functions[0]
+        self.assertAlmostEqual(sum(stages.values()), 1.0, places=3)
+        self.assertIn('pos_tagging', report.format())
+
+        filename = os.path.join(self.tmp_dir, 'pycseg.prof')
+        report.dump(filename)
+        self.assertGreater(pstats.Stats(filename).total_calls, 0)
+
+    def test_sampling(self):
+        report = self.seg.profile(LINES * 4, profiler=profiling.PROFILER_SAMPLING,
+                                  interval=0.0005)
+        self.assertGreater(sum(report.stages.values()), 0)
+        filename = os.path.join(self.tmp_dir, 'pycseg.folded')
+        report.dump(filename)
+        with io.open(filename, encoding='utf-8') as f:
+            line = f.readline()
+        stack, count = line.rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+        self.assertIn(';', stack)
+
+    def test_unknown_profiler(self):
+        self.assertRaises(ValueError, profiling.profile, lambda: None, 'unknown')
+
+    def test_main(self):
+        in_filename = os.path.join(self.tmp_dir, 'in.txt')
+        out_filename = os.path.join(self.tmp_dir, 'out.txt')
+        profile_filename = os.path.join(self.tmp_dir, 'pycseg.prof')
+        with io.open(in_filename, 'w', encoding='utf-8') as f:
+            f.write('北京天安门。\n')
+        self.assertEqual(main([in_filename, '-o', out_filename, '--data-dir', DATA_DIR,
+                               '--mode', 'seg', '--engine', 'fmm',
+                               '--profile', profile_filename]), 0)
+        with io.open(out_filename, encoding='utf-8') as f:
+            self.assertEqual(f.read(), '北京 天安门/ns 。/w\n')
+        self.assertTrue(os.path.exists(profile_filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
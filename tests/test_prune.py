@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import pycseg.definitions as definitions
+from pycseg import prune
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+LINES = ['张华平说的确实在理。', '北京天安门。']
+
+
+class PruneTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, filename, content):
+        path = os.path.join(self.tmp_dir, filename)
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def read(self, path):
+        with io.open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def test_prune_dictionary(self):
+        src = self.write('core.dct', '始##始 0 1\n啊 3 25856\n啊 0 30976\n啊呀 0 25856\n'
+                                     '未##数 0 2\n阿 5 26624\n')
+        dst = os.path.join(self.tmp_dir, 'pruned.dct')
+        self.assertEqual(prune.prune_dictionary(src, dst, min_freq=1), (4, 2))
+        self.assertEqual(self.read(dst), '始##始 0 1\n啊 3 25856\n未##数 0 2\n阿 5 26624\n')
+        self.assertEqual(prune.prune_dictionary(src, dst, min_freq=5), (3, 3))
+
+    def test_prune_bigrams(self):
+        src = self.write('bigram.dct', '北京@大学 5\n北京@天安门 9\n北京@市 5\n北京@人 1\n'
+                                       '大学@生 0\n')
+        dst = os.path.join(self.tmp_dir, 'pruned.dct')
+        self.assertEqual(prune.prune_bigrams(src, dst, min_freq=1), (4, 1))
+        self.assertEqual(self.read(dst), '北京@大学 5\n北京@天安门 9\n北京@市 5\n北京@人 1\n')
+        # 词频相同时保留靠前的
+        self.assertEqual(prune.prune_bigrams(src, dst, min_freq=1, top_k=2), (2, 3))
+        self.assertEqual(self.read(dst), '北京@大学 5\n北京@天安门 9\n')
+
+    def test_prune_model(self):
+        out_dir = os.path.join(self.tmp_dir, 'model')
+        stats = prune.prune_model(DATA_DIR, out_dir, min_freq=1)
+        self.assertListEqual(list(stats), ['core_dct'])
+        kept, removed = stats['core_dct']
+        self.assertGreater(kept, 0)
+        self.assertGreater(removed, 0)
+        for filename in ('lexical.ctx', 'nr.dct', 'nr.ctx'):
+            self.assertEqual(self.read(os.path.join(out_dir, filename)),
+                             self.read(os.path.join(DATA_DIR, filename)))
+        self.assertFalse(os.path.exists(os.path.join(out_dir, 'bigramDict.dct')))
+
+    def test_sweep(self):
+        reports = prune.sweep(DATA_DIR, self.tmp_dir, LINES, [{'min_freq': 1}],
+                              ['core_dct'], tags=False, mode=definitions.MODE_SEG)
+        self.assertListEqual([report.name for report in reports], ['original', 'min_freq-1'])
+        original, pruned = reports
+        self.assertEqual(original.golden.word_agreement, 1.0)
+        self.assertEqual(pruned.golden.sentences, 2)
+        self.assertTrue(os.path.isdir(os.path.join(self.tmp_dir, 'min_freq-1')))
+        self.assertLess(pruned.memory_bytes, original.memory_bytes)
+        self.assertIn('core_dct', pruned.to_dict()['pruned'])
+        self.assertIn('min_freq-1', prune.format_reports(reports, tags=False))
+
+    def test_sweep_bigrams(self):
+        # 发布的data目录中没有bigramDict.dct, 复制模型并写入一个小的二元词典
+        data_dir = os.path.join(self.tmp_dir, 'data')
+        os.makedirs(data_dir)
+        for filename in os.listdir(DATA_DIR):
+            shutil.copyfile(os.path.join(DATA_DIR, filename), os.path.join(data_dir, filename))
+        self.write(os.path.join('data', 'bigramDict.dct'), '研究生@院 5000\n研究生@命 3000\n')
+
+        # min_freq=0不删除核心词典的词条, 只有top_k剪掉"研究生@命"
+        reports = prune.sweep(data_dir, os.path.join(self.tmp_dir, 'pruned'), ['研究生命起源。'],
+                              [{'min_freq': 0}, {'min_freq': 0, 'top_k': 1}],
+                              ['core_dct', 'bigram_dct'], tags=False, mode=definitions.MODE_SEG)
+        original, unpruned, pruned = reports
+        self.assertEqual(unpruned.pruned['bigram_dct'], (2, 0))
+        self.assertEqual(pruned.pruned['bigram_dct'], (1, 1))
+        self.assertEqual(pruned.pruned['core_dct'], unpruned.pruned['core_dct'])
+        self.assertEqual(unpruned.golden.word_agreement, 1.0)
+        self.assertLess(pruned.golden.word_agreement, 1.0)
+
+        table = prune.format_reports(reports, tags=False).splitlines()
+        entries = unpruned.pruned['core_dct'][0]
+        self.assertIn('{}'.format(entries + 2), table[2])
+        self.assertTrue(table[3].startswith('min_freq-0_top_k-1'))
+        self.assertIn('{}'.format(entries + 1), table[3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,11 +2,23 @@
 
 from __future__ import unicode_literals, print_function
 
+import io
 import os
+import shutil
+import subprocess
 import sys
+import tempfile
+import time
 import unittest
 
 import pycseg
+import pycseg.definitions as definitions
+from pycseg.data_store import Feature
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+# 发布的data目录中没有二元词典bigramDict.dct
+COMPONENTS = ('core_dct', 'lexical_ctx', 'nr_dct', 'nr_ctx',
+              'ns_dct', 'ns_ctx', 'tr_dct', 'tr_ctx')
 
 
 class PycsegTestCase(unittest.TestCase):
@@ -45,5 +57,321 @@ class PycsegTestCase(unittest.TestCase):
         print(results)
 
 
+class PycsegModeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.content = '张华平在北京说的确实在理。'
+
+    def _load(self, mode):
+        seg = pycseg.Pycseg(mode=mode)
+        seg.load(DATA_DIR, [c for c in pycseg.MODE_COMPONENTS[mode]
+                            if c in COMPONENTS])
+        return seg
+
+    def test_unknown_mode(self):
+        self.assertRaises(ValueError, pycseg.Pycseg, mode='pos')
+
+    def test_mode_components(self):
+        seg = self._load(definitions.MODE_SEG)
+        self.assertSetEqual(seg.d_store.loaded_components, {'core_dct'})
+
+    def test_seg(self):
+        seg = self._load(definitions.MODE_SEG)
+        result = seg.process(self.content)
+        self.assertEqual(''.join(result['words']), self.content)
+        self.assertIn('北京', result['words'])
+        self.assertEqual(len(result['words']), len(result['tags']))
+
+    def test_seg_oov(self):
+        seg = self._load(definitions.MODE_SEG_OOV)
+        result = seg.process(self.content)
+        self.assertIn('张华平', result['words'])
+
+    def test_full(self):
+        seg = self._load(definitions.MODE_FULL)
+        result = seg.process(self.content)
+        self.assertEqual(seg.format_result(result),
+                         '张华平/nr 在/p 北京/ns 说/v 的/uj 确实/ad 在理/a 。/w')
+
+
+class PycsegLazyLoadTestCase(unittest.TestCase):
+    def test_lazy_seg(self):
+        seg = pycseg.Pycseg(mode=definitions.MODE_SEG)
+        seg.load(DATA_DIR, lazy=True)
+        self.assertListEqual(seg.d_store.resident_components, [])
+        seg.process('北京天安门。')
+        self.assertListEqual(seg.d_store.resident_components, ['core_dct', 'bigram_dct'])
+        status = seg.d_store.component_status()
+        self.assertEqual(status['bigram_dct'], 'missing')
+        self.assertEqual(status['lexical_ctx'], 'pending')
+
+    def test_oov_types(self):
+        seg = pycseg.Pycseg(mode=definitions.MODE_SEG_OOV, oov_types=('nr',))
+        self.assertTupleEqual(seg.components(), ('core_dct', 'bigram_dct',
+                                                 'nr_dct', 'nr_ctx'))
+        seg.load(DATA_DIR, lazy=True)
+        result = seg.process('张华平来到了北京天安门。')
+        self.assertIn('张华平', result['words'])
+        self.assertListEqual(seg.d_store.resident_components,
+                             ['core_dct', 'bigram_dct', 'nr_dct', 'nr_ctx'])
+        self.assertRaises(ValueError, pycseg.Pycseg, oov_types=('xx',))
+
+
+class PycsegAsyncLoadTestCase(unittest.TestCase):
+    def test_load_async(self):
+        seg = pycseg.Pycseg(mode=definitions.MODE_SEG, engine=definitions.ENGINE_BMM)
+        self.assertFalse(seg.ready())
+        future = seg.load_async(DATA_DIR)
+        self.assertTupleEqual(future.names, ('core_dct',))
+        # process等待需要的组件加载完成
+        self.assertEqual(seg.format_result(seg.process('研究生命起源')), '研究 生命/n 起源')
+        self.assertTrue(future.ready(['core_dct']))
+        self.assertTrue(seg.ready())
+        self.assertIs(future.result(), seg.d_store)
+
+    def test_fail_fast(self):
+        seg = pycseg.Pycseg(mode=definitions.MODE_SEG)
+        future = seg.load_async(DATA_DIR, block=False)
+        # core_dct的加载需要零点几秒, 这时通常还没有完成
+        try:
+            seg.process('北京天安门。')
+        except pycseg.ComponentNotReady:
+            self.assertFalse(future.done())
+        future.result()
+        self.assertTrue(seg.ready())
+        self.assertEqual(seg.format_result(seg.process('北京天安门。')), '北京 天安门/ns 。/w')
+
+
+class PycsegUserDictTestCase(unittest.TestCase):
+    def setUp(self):
+        self.seg = pycseg.Pycseg(mode=definitions.MODE_SEG)
+        self.seg.load(DATA_DIR)
+
+    def test_add_remove(self):
+        sentence = '区块链技术研究'
+        self.assertEqual(self.seg.format_result(self.seg.process(sentence)),
+                         '区块/n 链 技术/n 研究')
+        self.seg.add_word('区块链', 1000, 'n')
+        self.assertEqual(self.seg.format_result(self.seg.process(sentence)),
+                         '区块链/n 技术/n 研究')
+        self.assertTrue(self.seg.remove_word('区块链'))
+        self.assertTrue(self.seg.remove_word('区块'))
+        self.assertEqual(self.seg.format_result(self.seg.process(sentence)),
+                         '区 块 链 技术/n 研究')
+
+    def test_load_user_dict(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmp_dir, 'user.dct')
+            with io.open(filename, 'w', encoding='utf-8') as f:
+                f.write('# 用户词典\n区块链 1000 n\n\n生命起源\n')
+            self.assertEqual(self.seg.load_user_dict(filename), 2)
+        finally:
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(self.seg.format_result(self.seg.process('区块链研究生命起源')),
+                         '区块链/n 研究 生命起源')
+
+
+class PycsegTenantTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.seg = pycseg.Pycseg(mode=definitions.MODE_SEG)
+        cls.seg.load(DATA_DIR)
+        cls.seg.add_word('区块链', 1000, 'n', tenant='a')
+        cls.seg.add_word('生命起源', 1000, 'n', tenant='b')
+
+    def test_process(self):
+        sentence = '区块链研究生命起源'
+        expected = {
+            None: '区块/n 链 研究 生命/n 起源',
+            'a': '区块链/n 研究 生命/n 起源',
+            'b': '区块/n 链 研究 生命起源/n',
+        }
+        for tenant, result in expected.items():
+            self.assertEqual(self.seg.format_result(self.seg.process(sentence, tenant=tenant)),
+                             result)
+            self.assertEqual(self.seg.format_result(
+                self.seg.process_offsets(sentence, tenant=tenant)), result)
+        result = self.seg.process(sentence, deadline=0, tenant='a')
+        self.assertListEqual(result['words'], ['区块链', '研究生', '命', '起源'])
+
+    def test_tenants(self):
+        self.assertIsNone(self.seg.tenant('a').core_dct.get('生命起源'))
+        self.assertEqual(self.seg.d_store.tenants, ['a', 'b'])
+
+
+# 在独立的进程中测量, 不受其它测试已加载的模型影响:
+# 在fork出的子进程中处理句子并做一次垃圾回收, 比较prefork()前后子进程新增的私有脏页
+PREFORK_SCRIPT = """
+from __future__ import unicode_literals, print_function
+import gc
+import os
+import sys
+import pycseg
+
+def private_dirty():
+    total = 0
+    with open('/proc/self/smaps') as f:
+        for line in f:
+            if line.startswith('Private_Dirty:'):
+                total += int(line.split()[1])
+    return total * 1024
+
+def child_dirty(seg, lines):
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            before = private_dirty()
+            for line in lines:
+                seg.process(line)
+            gc.collect()
+            os.write(write_fd, str(private_dirty() - before).encode('ascii'))
+            status = 0
+        finally:
+            os._exit(status)
+    os.close(write_fd)
+    chunks = []
+    while True:
+        chunk = os.read(read_fd, 64)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    return int(b''.join(chunks))
+
+seg = pycseg.Pycseg(mode='seg')
+seg.load(sys.argv[1])
+lines = ['\\u5317\\u4eac\\u5929\\u5b89\\u95e8\\u3002'] * 20
+expected = [seg.process(line) for line in lines]
+shared = child_dirty(seg, lines)
+seg.prefork()
+assert [seg.process(line) for line in lines] == expected
+print(shared, child_dirty(seg, lines))
+"""
+
+
+@unittest.skipUnless(hasattr(os, 'fork') and os.path.exists('/proc/self/smaps'),
+                     'requires fork and /proc/self/smaps')
+class PycsegPreforkTestCase(unittest.TestCase):
+    def test_prefork(self):
+        root_dir = os.path.join(DATA_DIR, '..')
+        env = dict(os.environ, PYTHONPATH=root_dir)
+        output = subprocess.check_output([sys.executable, '-c', PREFORK_SCRIPT, DATA_DIR],
+                                         cwd=root_dir, env=env)
+        shared, frozen = [int(v) for v in output.split()]
+        print('private dirty per worker: {:.1f} MB -> {:.1f} MB'.format(
+            shared / 2 ** 20, frozen / 2 ** 20))
+        self.assertLess(frozen, shared / 4)
+
+
+class PycsegLongSentenceTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.seg = pycseg.Pycseg(mode=definitions.MODE_SEG,
+                                max_sentence_length=20, window_overlap=5)
+        cls.seg.load(DATA_DIR, ['core_dct'])
+
+    def test_split_sentences(self):
+        content = '张华平在北京说的确实在理，奥斯特洛夫斯基来到了北京天安门，中华人民共和国成立了。好'
+        sentences = self.seg.split_sentences(content)
+        self.assertEqual(''.join(sentences), content)
+        self.assertListEqual(sentences, ['张华平在北京说的确实在理，',
+                                         '奥斯特洛夫斯基来到了北京天安门，',
+                                         '中华人民共和国成立了。', '好'])
+
+    def test_split_by_link(self):
+        content = '张华平在北京说的确实在理 奥斯特洛夫斯基来到了北京天安门'
+        sentences = self.seg.split_sentences(content)
+        self.assertListEqual(sentences, ['张华平在北京说的确实在理 ',
+                                         '奥斯特洛夫斯基来到了北京天安门'])
+
+    def test_process_windows(self):
+        content = '中华人民共和国成立了' * 5
+        self.assertListEqual(self.seg.split_sentences(content), [content])
+        result = self.seg.process(content)
+        self.assertEqual(''.join(result['words']), content)
+        self.assertEqual(result['words'].count('中华人民共和国'), 5)
+        self.assertEqual(len(result['words']), len(result['tags']))
+
+
+class PycsegDeadlineTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.seg = pycseg.Pycseg()
+        cls.seg.load(DATA_DIR, COMPONENTS)
+        cls.content = '奥斯特洛夫斯基来到了北京天安门。张华平说的确实在理。'
+
+    def test_no_deadline(self):
+        result = self.seg.process(self.content)
+        self.assertNotIn('degraded', result)
+
+    def test_within_deadline(self):
+        result = self.seg.process(self.content, deadline=60)
+        self.assertListEqual(result['degraded'], [])
+        self.assertListEqual(result['words'], self.seg.process(self.content)['words'])
+
+    def test_deadline_exceeded(self):
+        result = self.seg.process(self.content, deadline=0)
+        self.assertListEqual(result['degraded'], [(0, 16), (16, 26)])
+        self.assertEqual(''.join(result['words']), self.content)
+        self.assertIn('天安门', result['words'])
+        # 降级处理不识别未登录词
+        self.assertNotIn('张华平', result['words'])
+
+    def test_fallback_pos(self):
+        result = self.seg.process('北京天安门。', deadline=0, fallback_pos=True)
+        self.assertEqual(self.seg.format_result(result), '北京/ns 天安门/ns 。/w')
+
+    def test_long_sentence(self):
+        # 没有标点的超长句子在每个滑动窗口之前检查预算
+        content = '奥斯特洛夫斯基来到了北京天安门张华平说的确实在理' * 60
+        for max_sentence_length in (100, None):
+            seg = pycseg.Pycseg(max_sentence_length=max_sentence_length)
+            seg.load(DATA_DIR, COMPONENTS)
+            start = time.time()
+            result = seg.process(content, deadline=0.05)
+            self.assertLess(time.time() - start, 1.0)
+            self.assertEqual(len(result['degraded']), 1)
+            self.assertEqual(result['degraded'][0][1], len(content))
+            self.assertEqual(''.join(result['words']), content)
+
+    def test_process_greedy(self):
+        result = self.seg.process_greedy('中华人民共和国成立了2016年')
+        self.assertListEqual(result['words'], ['中华人民共和国', '成立', '了', '2016', '年'])
+        self.assertEqual(result['tags'][3], Feature.encode('m'))
+
+
+class PycsegEngineTestCase(unittest.TestCase):
+    def test_unknown_engine(self):
+        self.assertRaises(ValueError, pycseg.Pycseg, engine='unknown')
+        self.assertRaises(ValueError, pycseg.Pycseg, mode=definitions.MODE_SEG_OOV,
+                          engine=definitions.ENGINE_FMM)
+
+    def test_engine_components(self):
+        seg = pycseg.Pycseg(mode=definitions.MODE_SEG, engine=definitions.ENGINE_BMM)
+        seg.load(DATA_DIR)
+        self.assertSetEqual(seg.d_store.loaded_components, {'core_dct'})
+
+    def test_engines(self):
+        expected = {
+            definitions.ENGINE_FMM: '研究生/n 命 起源',
+            definitions.ENGINE_BMM: '研究 生命/n 起源',
+            definitions.ENGINE_BIMM: '研究 生命/n 起源',
+        }
+        for engine, result in expected.items():
+            seg = pycseg.Pycseg(mode=definitions.MODE_SEG, engine=engine)
+            seg.load(DATA_DIR)
+            self.assertEqual(seg.format_result(seg.process('研究生命起源')), result)
+
+    def test_full(self):
+        seg = pycseg.Pycseg(engine=definitions.ENGINE_BIMM)
+        seg.load(DATA_DIR)
+        self.assertEqual(seg.format_result(seg.process('北京天安门。')),
+                         '北京/ns 天安门/ns 。/w')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import os
+import pickle
+import unittest
+
+import pycseg
+import pycseg.definitions as definitions
+from pycseg.data_store import Atom, Feature
+from pycseg.result import SegResult
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+
+class SegResultTestCase(unittest.TestCase):
+    def setUp(self):
+        self.result = SegResult('北京天安门。')
+        self.result.extend(0, ['北京', '天安门', '。'],
+                           [Feature('ns').tag_code, Feature('ns').tag_code,
+                            Feature('w').tag_code])
+
+    def test_offsets(self):
+        self.assertListEqual(list(self.result.offsets()), [(0, 2), (2, 5), (5, 6)])
+        self.assertEqual(len(self.result), 3)
+
+    def test_words(self):
+        self.assertListEqual(list(self.result.words()), ['北京', '天安门', '。'])
+        self.assertEqual(self.result.word(1), '天安门')
+        self.assertEqual(self.result.tag(2), 'w')
+        self.assertEqual(self.result[0], ('北京', Feature('ns').tag_code))
+
+    def test_to_dict(self):
+        self.assertDictEqual(self.result.to_dict(), {
+            'words': ['北京', '天安门', '。'],
+            'tags': [Feature('ns').tag_code, Feature('ns').tag_code,
+                     Feature('w').tag_code]})
+
+    def test_pickle(self):
+        result = pickle.loads(pickle.dumps(self.result, pickle.HIGHEST_PROTOCOL))
+        self.assertListEqual(list(result), list(self.result))
+
+    def test_extend_spans(self):
+        result = SegResult('用Python写。')
+        atoms = [Atom(content) for content in (definitions.SENTENCE_BEGIN, '用', 'Python', '写',
+                                               '。', definitions.SENTENCE_END)]
+        self.assertEqual(result.extend_spans(0, atoms, [(1, 2), (2, 4), (4, 5)], [1, 2, 3]), 9)
+        self.assertListEqual(list(result.offsets()), [(0, 1), (1, 8), (8, 9)])
+        self.assertListEqual(list(result.words()), ['用', 'Python写', '。'])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_to_numpy(self):
+        starts, ends, tags = self.result.to_numpy()
+        self.assertListEqual((ends - starts).tolist(), [2, 3, 1])
+
+
+class ProcessOffsetsTestCase(unittest.TestCase):
+    def test_process_offsets(self):
+        seg = pycseg.Pycseg(mode=definitions.MODE_SEG, max_sentence_length=12,
+                            window_overlap=4)
+        seg.load(DATA_DIR, ['core_dct'])
+        content = '奥斯特洛夫斯基来到了北京天安门。张华平说的确实在理。'
+        result = seg.process_offsets(content)
+        self.assertDictEqual(result.to_dict(), seg.process(content))
+        self.assertEqual(result.ends[-1], len(content))
+        self.assertEqual(seg.format_result(result),
+                         seg.format_result(seg.process(content)))
+
+    def test_lattice_offsets(self):
+        # 不超长的句子用最优路径的原子区间计算偏移
+        seg = pycseg.Pycseg()
+        seg.load(DATA_DIR, ['core_dct', 'lexical_ctx', 'nr_dct', 'nr_ctx',
+                            'ns_dct', 'ns_ctx', 'tr_dct', 'tr_ctx'])
+        content = '张华平在北京说的确实在理。2016年用Python写了3.5万行'
+        result = seg.process_offsets(content)
+        self.assertDictEqual(result.to_dict(), seg.process(content))
+        self.assertEqual(result.ends[-1], len(content))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import os
+import unittest
+
+import pycseg
+import pycseg.definitions as definitions
+from pycseg.data_store import DataStore
+from pycseg.segment import Segment
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+COMPONENTS = ('core_dct', 'lexical_ctx', 'nr_dct', 'nr_ctx',
+              'ns_dct', 'ns_ctx', 'tr_dct', 'tr_ctx')
+
+
+class SegmentAtomTestCase(unittest.TestCase):
+    def atoms(self, sentence):
+        segment = Segment(sentence, DataStore())
+        segment.atom_segment()
+        return [(atom.content, atom.feature.tag_code)
+                for atom in segment.get_words_graph().get_atoms()]
+
+    def test_char_type(self):
+        self.assertEqual(Segment.char_type('a'), definitions.CT_LETTER)
+        self.assertEqual(Segment.char_type('Z'), definitions.CT_LETTER)
+        self.assertEqual(Segment.char_type('7'), definitions.CT_NUM)
+        self.assertEqual(Segment.char_type('，'), definitions.CT_DELIMITER)
+        self.assertEqual(Segment.char_type('!'), definitions.CT_DELIMITER)
+        self.assertEqual(Segment.char_type('中'), definitions.CT_CHINESE)
+        self.assertEqual(Segment.char_type('é'), definitions.CT_CHINESE)
+
+    def test_atom_segment(self):
+        self.assertListEqual(self.atoms('用Python3写, 共2016行'), [
+            (definitions.SENTENCE_BEGIN, definitions.CT_SENTENCE_BEGIN),
+            ('用', definitions.CT_CHINESE),
+            ('Python3', definitions.CT_NUM),
+            ('写', definitions.CT_CHINESE),
+            (',', definitions.CT_DELIMITER),
+            (' ', definitions.CT_CHINESE),
+            ('共', definitions.CT_CHINESE),
+            ('2016', definitions.CT_NUM),
+            ('行', definitions.CT_CHINESE),
+            (definitions.SENTENCE_END, definitions.CT_SENTENCE_END),
+        ])
+
+    def spans(self, sentence):
+        segment = Segment(sentence, DataStore())
+        segment.atom_segment()
+        atoms = segment.get_words_graph().get_atoms()
+        return sorted((''.join(atom.content for atom in atoms[left:right]), c_type)
+                      for left, (right, c_type) in segment.typed_spans().items())
+
+    def test_typed_spans(self):
+        self.assertListEqual(self.spans('二〇一六年六月十二日下午１２：３０'), [
+            ('二〇一六年六月十二日', definitions.CT_TIME),
+            ('１２：３０', definitions.CT_TIME),
+        ])
+        self.assertListEqual(self.spans('2016年6月5点30分'), [
+            ('2016年6月', definitions.CT_TIME),
+            ('5点30分', definitions.CT_TIME),
+        ])
+        self.assertListEqual(self.spans('上涨3.5%至１２３４点'), [
+            ('3.5', definitions.CT_NUM),
+            ('１２３４', definitions.CT_NUM),
+        ])
+        self.assertListEqual(self.spans('一千三百零五人'), [
+            ('一千三百零五', definitions.CT_NUM),
+        ])
+        # 原子切分不变
+        self.assertEqual(len(self.atoms('一千三百零五人')), 9)
+
+    def test_numeral_words(self):
+        # 以位数开头或者太短的中文数字串不是数字, 保留"千万"、"万一"等词
+        for sentence in ('千万', '万一', '一一', '一点'):
+            self.assertListEqual(self.spans(sentence), [])
+        # 年份需要4位数字, "20年"、"五六年"、"三十年"是时长
+        self.assertListEqual(self.spans('20年'), [])
+        self.assertListEqual(self.spans('五六年'), [])
+        self.assertListEqual(self.spans('三十年'), [('三十', definitions.CT_NUM)])
+        # 区间的两端必须是原子的边界
+        self.assertListEqual(self.spans('v1.2'), [])
+
+    def test_empty(self):
+        self.assertListEqual(self.atoms(''), [
+            (definitions.SENTENCE_BEGIN, definitions.CT_SENTENCE_BEGIN),
+            (definitions.SENTENCE_END, definitions.CT_SENTENCE_END),
+        ])
+
+
+class SegmentSpanTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.seg = pycseg.Pycseg()
+        cls.seg.load(DATA_DIR, COMPONENTS)
+
+    def test_dictionary_words(self):
+        # 包含数字的成语和专有名词仍然按词典切分
+        for sentence, expected in (('他一五一十地说了', '他/r 一五一十/i 地/uv 说/v 了/y'),
+                                   ('十五大召开', '十五大/j 召开/v'),
+                                   ('十三陵和十二生肖', '十三陵/ns 和/c 十二生肖/l'),
+                                   ('不管三七二十一', '不管三七二十一/l'),
+                                   ('五六年过去了', '五/m 六/m 年/q 过去/v 了/y')):
+            self.assertEqual(self.seg.format_result(self.seg.process(sentence)), expected)
+
+    def test_typed_words(self):
+        self.assertEqual(self.seg.format_result(self.seg.process('2016年6月12日12:30在北京')),
+                         '2016年6月12日/t 12:30/t 在/p 北京/ns')
+        self.assertEqual(self.seg.format_result(self.seg.process('上涨3.5%至１２３４点')),
+                         '上涨/v 3.5/m %/q 至/p １２３４/m 点/q')
+
+
+class SplitTestCase(unittest.TestCase):
+    def test_split_by(self):
+        split_by = pycseg.Pycseg._split_by
+        self.assertListEqual(split_by('一。二！三', '。！', True), ['一。', '二！', '三'])
+        self.assertListEqual(split_by('一。二！三', '。！'), ['一', '二', '三'])
+        self.assertListEqual(split_by('一。。二。', '。', True), ['一。', '。', '二。'])
+        self.assertListEqual(split_by('一。。二。', '。'), ['一', '', '二'])
+        self.assertListEqual(split_by('', '。', True), [])
+        self.assertListEqual(split_by('', '。'), [])
+
+    def test_time_colon(self):
+        split_by = pycseg.Pycseg._split_by
+        self.assertListEqual(split_by('１２：３０开会：好', '：', True), ['１２：３０开会：', '好'])
+        self.assertListEqual(split_by('3:2:', ':'), ['3:2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import os
+import threading
+import unittest
+
+import pycseg
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+COMPONENTS = ('core_dct', 'lexical_ctx', 'nr_dct', 'nr_ctx',
+              'ns_dct', 'ns_ctx', 'tr_dct', 'tr_ctx')
+
+
+class SessionTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.seg = pycseg.Pycseg()
+        cls.seg.load(DATA_DIR, COMPONENTS)
+
+    def test_reuse(self):
+        sentence = '张华平在北京说的确实在理。'
+        first = self.seg.process_sentence(sentence)
+        counters = self.seg.session.counters()
+        second = self.seg.process_sentence(sentence)
+        self.assertDictEqual(first, second)
+
+        reused = self.seg.session.counters()
+        self.assertEqual(reused['sentences'], counters['sentences'] + 1)
+        for name in ('objects', 'atoms', 'words', 'dicts', 'hmm_models',
+                     'viterbi_rows'):
+            self.assertGreater(reused[name], counters[name])
+
+    def test_thread_local(self):
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(self.seg.session))
+        thread.start()
+        thread.join()
+        self.assertIsNot(sessions[0], self.seg.session)
+        self.assertIs(self.seg.session, self.seg.session)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import pycseg
+from pycseg.stats import STAGES, StageStats, SlowLog, percentile
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+COMPONENTS = ('core_dct', 'lexical_ctx', 'nr_dct', 'nr_ctx',
+              'ns_dct', 'ns_ctx', 'tr_dct', 'tr_ctx')
+
+
+class PercentileTestCase(unittest.TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile(values, 0), 1)
+        self.assertEqual(percentile([], 50), 0)
+
+
+class StageStatsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.seg = pycseg.Pycseg()
+        cls.seg.load(DATA_DIR, COMPONENTS)
+
+    def test_stage_stats(self):
+        traces = []
+        stats = self.seg.add_observer(StageStats())
+        self.seg.add_observer(traces.append)
+        try:
+            self.seg.process('奥斯特洛夫斯基来到了北京天安门。张华平说的确实在理。')
+        finally:
+            del self.seg.observers[:]
+
+        self.assertEqual(stats.count, 2)
+        self.assertListEqual([stage for stage, seconds in traces[0].timings],
+                             list(STAGES))
+        self.assertEqual(traces[0].length, 16)
+        self.assertEqual(traces[0].atoms, 18)
+        self.assertGreater(traces[0].edges, traces[0].vertices)
+
+        summary = stats.summary()
+        self.assertEqual(summary['total']['count'], 2)
+        self.assertLessEqual(summary['total']['p50'], summary['total']['p99'])
+        self.assertIn('oov_detection', stats.format_summary())
+
+    def test_disabled(self):
+        self.assertListEqual(self.seg.observers, [])
+        self.seg.process_sentence('北京天安门。')
+
+
+class SlowLogTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.seg = pycseg.Pycseg()
+        cls.seg.load(DATA_DIR, COMPONENTS)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        del self.seg.observers[:]
+        shutil.rmtree(self.tmp_dir)
+
+    def test_slow_log(self):
+        filename = os.path.join(self.tmp_dir, 'slow.jsonl')
+        slow_log = self.seg.enable_slow_log(threshold=0, capacity=2,
+                                            filename=filename)
+        self.seg.process('奥斯特洛夫斯基来到了北京天安门。张华平说的确实在理。北京。')
+
+        self.assertEqual(len(slow_log.entries), 2)
+        entry = slow_log.slowest(1)[0]
+        for key in ('sentence', 'length', 'atoms', 'vertices', 'edges',
+                    'oov_words', 'oov_candidates', 'timings', 'total'):
+            self.assertIn(key, entry)
+        self.assertSetEqual(set(entry['timings']), set(STAGES))
+
+        with io.open(filename, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(entries[0]['sentence'], '奥斯特洛夫斯基来到了北京天安门。')
+        candidates = sum(entries[0]['oov_candidates'].values())
+        self.assertGreater(candidates, 0)
+        self.assertGreaterEqual(candidates, sum(entries[0]['oov_words'].values()))
+
+    def test_threshold(self):
+        slow_log = self.seg.enable_slow_log(threshold=60)
+        self.seg.process('北京天安门。')
+        self.assertEqual(len(slow_log.entries), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
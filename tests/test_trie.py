@@ -51,6 +51,11 @@ class TrieTestCase(unittest.TestCase):
         self.assertEqual(self.t.longest_key('abcdefg'), 4)
         self.assertEqual(self.t.longest_key('北京大学'), 4)
 
+    def test_prefix_lengths(self):
+        self.assertListEqual(self.t.prefix_lengths('abcdefg'), [3, 4])
+        self.assertListEqual(self.t.prefix_lengths(['北', '京', '大', '学']), [2, 4])
+        self.assertListEqual(self.t.prefix_lengths('cd'), [])
+
     def test_in(self):
         self.assertIn('abc', self.t)
         self.assertIn('北京', self.t)
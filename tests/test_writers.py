@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import pycseg
+import pycseg.definitions as definitions
+from pycseg.data_store import Feature
+from pycseg.result import SegResult
+from pycseg import writers
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+
+class WritersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.result = {'words': ['北京', '天安门', '了'],
+                       'tags': [Feature('ns').tag_code, Feature('ns').tag_code, 0]}
+
+    def _write(self, fmt, **kwargs):
+        output = io.StringIO()
+        with writers.get_writer(fmt, output, **kwargs) as writer:
+            writer.write(self.result)
+            writer.write(self.result)
+        return output.getvalue()
+
+    def test_tag_table(self):
+        self.assertEqual(writers.TAG_TABLE[Feature('uj').tag_code], 'uj')
+        self.assertEqual(writers.TAG_TABLE[4], '4')
+
+    def test_text(self):
+        self.assertEqual(self._write('text'),
+                         '北京/ns 天安门/ns 了\n北京/ns 天安门/ns 了\n')
+
+    def test_tsv(self):
+        lines = self._write('tsv').splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(lines[3], '1\t北京\tns')
+        self.assertEqual(lines[2], '0\t了\t')
+
+    def test_jsonl(self):
+        lines = self._write('jsonl').splitlines()
+        self.assertDictEqual(json.loads(lines[1]),
+                             {'words': ['北京', '天安门', '了'],
+                              'tags': ['ns', 'ns', None]})
+
+    def test_conll(self):
+        sentences = self._write('conll').split('\n\n')
+        self.assertEqual(sentences[0].splitlines()[1],
+                         '2\t天安门\t_\tn\tns\t_\t_\t_\t_\t_')
+
+    def test_seg_result(self):
+        result = SegResult('北京天安门了')
+        result.extend(0, self.result['words'], self.result['tags'])
+        output = io.StringIO()
+        writer = writers.WordTagWriter(output)
+        writer.write(result)
+        # 缓冲区未满时不写入
+        self.assertEqual(output.getvalue(), '')
+        writer.close()
+        self.assertEqual(output.getvalue(), '北京/ns 天安门/ns 了\n')
+
+    def test_buffer_size(self):
+        output = io.StringIO()
+        writer = writers.WordTagWriter(output, buffer_size=1)
+        writer.write(self.result)
+        self.assertEqual(output.getvalue(), '北京/ns 天安门/ns 了\n')
+
+    def test_unknown_format(self):
+        self.assertRaises(ValueError, writers.get_writer, 'xml', io.StringIO())
+
+
+class ProcessFileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.in_file = os.path.join(self.tmp_dir, 'in.txt')
+        with io.open(self.in_file, 'w', encoding='utf-8') as f:
+            f.write('张华平在北京说的确实在理。\n北京天安门。\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_process_file(self):
+        seg = pycseg.Pycseg(mode=definitions.MODE_SEG)
+        seg.load(DATA_DIR, ['core_dct'])
+        out_file = os.path.join(self.tmp_dir, 'out.jsonl')
+        seg.process_file(self.in_file, out_file, fmt='jsonl')
+        with io.open(out_file, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 2)
+        self.assertListEqual(lines[1]['words'], ['北京', '天安门', '。'])
+
+
+if __name__ == '__main__':
+    unittest.main()